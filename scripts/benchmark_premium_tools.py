@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Charge Wealth Premium Tools Benchmark
+Times every workbook builder at the demo data size, at 10x / 100x rows and on
+a few single tables grown far larger, and compares wall time, peak memory,
+cells, styles and output size to a baseline.
+
+Cells, styles and bytes are the same on every machine and are always compared.
+Timings and peak memory are kept per machine and only compared against a run
+on the same one. Build time is compared as a ratio to a fixed calibration
+workload timed alongside it, so a busy or throttled host does not show up as
+a regression. The baseline changes only when someone runs --update-baseline
+on purpose.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from zipfile import ZipFile
+
+import generate_premium_tools as tools
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+SCALES = (1, 10, 100)
+REPEATS = 3
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "benchmarks", "premium_tools_baseline.json")
+
+SAMPLE_DATA = {
+    'cash_flow': tools.CASH_FLOW_SAMPLE_DATA,
+    'tax_planning': tools.TAX_PLANNING_SAMPLE_DATA,
+    'net_worth': tools.NET_WORTH_SAMPLE_DATA,
+    'debt_planner': tools.DEBT_PLANNER_SAMPLE_DATA,
+    'fee_analyzer': tools.FEE_ANALYZER_SAMPLE_DATA,
+}
+
+# Cases that grow one table far past SCALES: (tool, profile key, rows).
+# 100,000 months of net worth history checks that streamed tables stay out of
+# memory while their formulas are evaluated.
+LARGE_TABLES = [
+    ('net_worth', 'history', 100000),
+]
+
+# Largest allowed growth over the baseline before a metric counts as a
+# regression. Timings and memory are noisy; the counts are deterministic.
+# MACHINE_METRICS depend on the host and are stored per machine fingerprint.
+# 'relative' is build time over calibration time; 'seconds' is reported only.
+TOLERANCES = {
+    'relative': 0.25,
+    'peak_mib': 0.20,
+    'cells': 0.0,
+    'styles': 0.0,
+    'bytes': 0.02,
+}
+MACHINE_METRICS = ('seconds', 'relative', 'peak_mib')
+# Builds faster than this are too short to time reliably; their timings are
+# recorded but not compared
+MIN_TIMED_SECONDS = 0.25
+# Fewer timed runs than this leave the fastest one at the mercy of a single
+# noisy run, so their build times are printed but never pass or fail
+MIN_COMPARED_REPEATS = 3
+
+_CELL_RE = re.compile(rb'<c r=')
+_CELL_XFS_RE = re.compile(rb'<cellXfs count="(\d+)"')
+
+# ============================================================================
+# INPUT SCALING
+# ============================================================================
+def scale_rows(rows, factor):
+    """Repeat a list of row tuples factor times, numbering the copies' names"""
+    scaled = list(rows)
+    for copy_no in range(2, factor + 1):
+        for row in rows:
+            if isinstance(row, tuple) and row and isinstance(row[0], str):
+                row = (f"{row[0]} #{copy_no}",) + row[1:]
+            scaled.append(row)
+    return scaled
+
+def scale_data(sample, factor):
+    """Sample data with every row list repeated factor times"""
+    return {key: scale_rows(value, factor) if isinstance(value, list) else value
+            for key, value in sample.items()}
+
+def grow_table(sample, key, rows):
+    """Sample data with one row list repeated out to exactly rows rows"""
+    data = dict(sample)
+    data[key] = scale_rows(sample[key], -(-rows // len(sample[key])))[:rows]
+    return data
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+def count_cells_and_styles(path):
+    """Cells written across all sheets, and cell formats in the style table"""
+    cells = 0
+    with ZipFile(path) as archive:
+        for name in archive.namelist():
+            if name.startswith('xl/worksheets/sheet'):
+                cells += len(_CELL_RE.findall(archive.read(name)))
+        match = _CELL_XFS_RE.search(archive.read('xl/styles.xml'))
+    return cells, int(match.group(1)) if match else 0
+
+def calibration_workload():
+    """Fixed string, list and zlib work, the same mix the builders spend their time on"""
+    rows = [[f"{row}:{col}" for col in range(20)] for row in range(5000)]
+    zlib.compress(json.dumps(rows).encode(), 6)
+
+def timed(function, *args, **kwargs):
+    """Wall time of one call"""
+    started = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - started
+
+def measure(key, case, repeats=REPEATS):
+    """Build one tool for one case (a scale, or a (profile key, rows) pair from
+    LARGE_TABLES); best-of-N wall time and ratio to the calibration workload,
+    plus a traced run for memory"""
+    builder = next(builder for name, builder, _ in tools.BUILDERS if name == key)
+    if isinstance(case, tuple):
+        data = grow_table(SAMPLE_DATA[key], *case)
+        label = f"{case[1]:,} {case[0]}"
+    else:
+        data = scale_data(SAMPLE_DATA[key], case)
+        label = f"{case}x"
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "out.xlsx")
+        timings, ratios = [], []
+        with redirect_stdout(StringIO()):
+            for _ in range(repeats):
+                # Calibrate on both sides of each build, so the ratio sees the
+                # same load on the host as the build did
+                calibration = timed(calibration_workload)
+                seconds = timed(builder, path, data=data)
+                calibration = (calibration + timed(calibration_workload)) / 2
+                timings.append(seconds)
+                ratios.append(seconds / calibration)
+
+            # tracemalloc slows the build down, so memory gets its own run
+            tracemalloc.start()
+            builder(path, data=data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        cells, styles = count_cells_and_styles(path)
+        return {
+            'builder': builder.__name__,
+            'case': label,
+            'seconds': round(min(timings), 4),
+            'relative': round(min(ratios), 2),
+            'peak_mib': round(peak / 2**20, 2),
+            'cells': cells,
+            'styles': styles,
+            'bytes': os.path.getsize(path),
+        }
+
+def run_benchmarks(keys, scales, repeats=REPEATS, large_tables=True):
+    """Measure every (tool, case) pair, each in a fresh process so caches start cold"""
+    results = []
+    for key in keys:
+        cases = list(scales)
+        if large_tables:
+            cases += [(table, rows) for tool, table, rows in LARGE_TABLES if tool == key]
+        for case in cases:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(measure, key, case, repeats).result()
+            print(f"  ⏱️  {result['builder']:<40} {result['case']:>15} {result['seconds']:8.3f}s "
+                  f"{result['relative']:8.2f}x {result['peak_mib']:8.1f} MiB {result['cells']:>9,} cells "
+                  f"{result['styles']:>4} styles {result['bytes']:>11,} bytes")
+            results.append(result)
+    return results
+
+# ============================================================================
+# BASELINE COMPARISON
+# ============================================================================
+def cpu_model():
+    """CPU model name, from /proc/cpuinfo where platform.processor() is blank"""
+    model = platform.processor()
+    if not model and os.path.exists('/proc/cpuinfo'):
+        with open('/proc/cpuinfo', encoding='utf-8', errors='replace') as f:
+            model = next((line.split(':', 1)[1].strip() for line in f if line.startswith('model name')), '')
+    return model or platform.machine()
+
+def machine_fingerprint():
+    """Key for timings and memory: OS, CPU, core count and Python/openpyxl versions"""
+    return (f"{platform.system()} {cpu_model()} x{os.cpu_count()} "
+            f"python {platform.python_version()} openpyxl {tools.openpyxl.__version__}")
+
+def load_baseline(path):
+    """The stored report: {'results': [...], 'machines': {fingerprint: [...]}}"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def baseline_results(baseline, fingerprint):
+    """Baseline metrics keyed by (builder, case); timings only from the same machine"""
+    merged = {(result['builder'], result['case']): dict(result) for result in baseline['results']}
+    for result in baseline['machines'].get(fingerprint, []):
+        merged.setdefault((result['builder'], result['case']), {}).update(result)
+    return merged
+
+def compare_to_baseline(results, baseline, timed=True):
+    """One line per metric that grew past its tolerance; baseline is from baseline_results().
+    Build times are left out unless timed (see MIN_COMPARED_REPEATS)."""
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['builder'], result['case']))
+        if previous is None:
+            continue
+        for metric, tolerance in TOLERANCES.items():
+            if metric == 'relative' and (not timed or result['seconds'] < MIN_TIMED_SECONDS):
+                continue
+            before, after = previous.get(metric), result[metric]
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"{result['builder']} {result['case']} {metric}: "
+                                   f"{before} -> {after} (+{after / before - 1:.0%})")
+    return regressions
+
+def write_report(path, results):
+    """Save results as JSON along with the machine they were taken on"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    report = {'machine': machine_fingerprint(), 'results': results}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+def update_baseline(path, results):
+    """Store a run in the baseline: the counts for every machine, and the
+    timings and memory under this machine's fingerprint, keeping other machines"""
+    baseline = load_baseline(path) or {'results': [], 'machines': {}}
+    fingerprint = machine_fingerprint()
+    shared = {(result['builder'], result['case']): result for result in baseline['results']}
+    timed = {(result['builder'], result['case']): result for result in baseline['machines'].get(fingerprint, [])}
+    for result in results:
+        key = (result['builder'], result['case'])
+        shared[key] = {name: value for name, value in result.items() if name not in MACHINE_METRICS}
+        timed[key] = {'builder': key[0], 'case': key[1], **{name: result[name] for name in MACHINE_METRICS}}
+    baseline = {
+        'results': list(shared.values()),
+        'machines': {**baseline['machines'], fingerprint: list(timed.values())},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+# ============================================================================
+# MAIN EXECUTION
+# ============================================================================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Charge Wealth premium tool builders")
+    parser.add_argument("--tools", nargs="+", choices=list(SAMPLE_DATA), default=list(SAMPLE_DATA),
+                        help="tools to benchmark (default: all)")
+    parser.add_argument("--scales", nargs="+", type=int, default=list(SCALES),
+                        help="row multipliers applied to the demo data (default: 1 10 100)")
+    parser.add_argument("--no-large-tables", dest="large_tables", action="store_false",
+                        help="skip the LARGE_TABLES cases (e.g. 100,000 months of net worth history)")
+    parser.add_argument("--repeats", type=int, default=REPEATS,
+                        help="timed runs per measurement; the fastest is kept (default: 3). "
+                             f"Below {MIN_COMPARED_REPEATS}, build times are informational only")
+    parser.add_argument("--output", metavar="PATH",
+                        help="write the results as JSON to PATH")
+    parser.add_argument("--baseline", metavar="PATH", default=BASELINE_FILE,
+                        help="baseline results to compare against")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store this run in the baseline instead of comparing: counts for "
+                             "every machine, timings and memory for this one")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("SOURCE_DATE_EPOCH", "1700000000")
+    timed = args.repeats >= MIN_COMPARED_REPEATS
+    if args.update_baseline and not timed:
+        print(f"❌ --update-baseline needs --repeats {MIN_COMPARED_REPEATS} or more", file=sys.stderr)
+        return 2
+
+    print("\n📊 Benchmarking Charge Wealth Premium Financial Tools...\n")
+    results = run_benchmarks(args.tools, args.scales, args.repeats, args.large_tables)
+    if args.output:
+        write_report(args.output, results)
+
+    if args.update_baseline:
+        update_baseline(args.baseline, results)
+        print(f"\n💾 Baseline saved to {args.baseline}\n")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\n⚠️  No baseline at {args.baseline}; run with --update-baseline to create one.\n")
+        return 0
+
+    fingerprint = machine_fingerprint()
+    if fingerprint not in baseline['machines']:
+        print(f"\n⚠️  No timings for this machine ({fingerprint}); comparing cells, styles "
+              f"and bytes only. Run with --update-baseline to record them.")
+    if not timed:
+        print(f"\n⚠️  Fewer than {MIN_COMPARED_REPEATS} repeats: build times above are for "
+              f"information only and not compared.")
+    regressions = compare_to_baseline(results, baseline_results(baseline, fingerprint), timed)
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        print()
+        return 1
+
+    print("\n✅ No regressions against baseline\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
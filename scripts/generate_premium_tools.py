@@ -4,16 +4,78 @@ Charge Wealth Premium Financial Tools Generator
 Creates 5 CFO-grade Excel files with professional formatting, formulas, and charts.
 """
 
+import argparse
+import cProfile
+import csv
+import hashlib
+import heapq
+import inspect
+import json
+import math
+import mmap
 import os
-from datetime import datetime, timedelta
+import re
+import struct
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache, partial
+from io import BytesIO, StringIO
+from itertools import groupby, islice
+from types import CodeType, ModuleType
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
+import numpy as np
+import openpyxl
 from openpyxl import Workbook
+from openpyxl.cell.cell import Cell
 from openpyxl.styles import Font, Fill, PatternFill, Border, Side, Alignment, NamedStyle
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import (column_index_from_string, coordinate_to_tuple, get_column_letter,
+                            quote_sheetname, range_boundaries)
 from openpyxl.formatting.rule import ColorScaleRule, FormulaRule, DataBarRule
-from openpyxl.chart import LineChart, PieChart, BarChart, Reference
+from openpyxl.formula.tokenizer import Token, Tokenizer, TokenizerError
+from openpyxl.chart import LineChart, PieChart, BarChart, Reference, Series
 from openpyxl.chart.label import DataLabelList
 from openpyxl.chart.series import DataPoint
+from openpyxl.compat import safe_string
 from openpyxl.drawing.fill import PatternFillProperties, ColorChoice
+from openpyxl.drawing.spreadsheet_drawing import SpreadsheetDrawing
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.xml.functions import Element, SubElement, xmlfile
+
+# openpyxl internals behind the fast paths: style ids copied straight into
+# cells, streamed table rows and cached formula results. openpyxl makes no
+# promises about them between releases, so if any is missing the builders
+# use public openpyxl only: styles set through cell attributes, every table
+# written as ordinary cells, and formulas saved without cached results.
+try:
+    from openpyxl.cell._writer import _set_attributes, write_cell
+    from openpyxl.comments.comment_sheet import CommentRecord
+    from openpyxl.styles.cell_style import StyleArray
+    from openpyxl.worksheet._writer import WorksheetWriter
+except ImportError:
+    _set_attributes = write_cell = CommentRecord = StyleArray = None
+    WorksheetWriter = object
+
+def _openpyxl_internals():
+    """Whether every openpyxl internal the fast paths use is still there"""
+    if WorksheetWriter is object:
+        return False
+    try:
+        wb = Workbook()
+        ws = wb.active
+        cell = ws.cell(row=1, column=1, value=1)
+        cell._style, cell._value, cell._comment, ws._cells, ws._comments
+        writer = ExcelWriter(wb, ZipFile(BytesIO(), 'w'))
+        writer._archive, writer.manifest, writer.workbook
+        return all(hasattr(WorksheetWriter, name) for name in ('rows', 'write_row', 'write_dimensions'))
+    except AttributeError:
+        return False
+
+OPENPYXL_INTERNALS = _openpyxl_internals()
 
 # Charge Wealth Brand Colors
 HONEY = "F5A623"  # Primary gold/amber
@@ -25,8 +87,13 @@ ACCENT_RED = "E74C3C"  # Warning/negative
 GRAY_HEADER = "636E72"  # Subtle headers
 
 # Style definitions
+@lru_cache(maxsize=None)
 def get_styles():
-    """Create reusable styles for consistent formatting"""
+    """Create reusable styles for consistent formatting.
+
+    Built once per process and shared by every workbook; treat the returned
+    dicts as read-only (derive variants with {**styles['data'], ...}).
+    """
     styles = {}
     
     # Header style
@@ -111,15 +178,121 @@ def get_styles():
         'fill': PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
     }
     
+    # Branding header and instructions sheet text
+    styles['powered_by'] = {
+        'font': Font(name='Calibri', size=10, italic=True, color=GRAY_HEADER)
+    }
+    styles['welcome'] = {
+        'font': Font(name='Calibri', size=12, color=DARK_TEXT)
+    }
+    styles['instruction_item'] = {
+        'font': Font(name='Calibri', size=11, color=DARK_TEXT),
+        'alignment': Alignment(wrap_text=True, vertical='top')
+    }
+    styles['footer'] = {
+        'font': Font(name='Calibri', size=10, italic=True, color=HONEY)
+    }
+    
+    # Layout blocks: KPI values and table totals
+    styles['kpi_value'] = {
+        'font': Font(name='Calibri', size=14, bold=True, color=DARK_TEXT)
+    }
+    styles['total_label'] = {
+        'font': Font(bold=True, color=HONEY)
+    }
+    styles['total_value'] = {
+        'font': Font(bold=True, size=12)
+    }
+    styles['subtotal'] = {
+        'font': Font(bold=True)
+    }
+    styles['emphasis'] = {
+        'font': Font(bold=True, size=14)
+    }
+    styles['highlight'] = {
+        'font': Font(bold=True, size=14, color=HONEY),
+        'fill': PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
+    }
+
+    # Cells members fill in, and small print
+    styles['input'] = {
+        'fill': PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
+    }
+    styles['note'] = {
+        'font': Font(italic=True, size=9, color=GRAY_HEADER)
+    }
+
     return styles
 
+# StyleArray slot for each style dict key
+_STYLE_SLOTS = {
+    'font': 'fontId',
+    'fill': 'fillId',
+    'border': 'borderId',
+    'number_format': 'numFmtId',
+    'protection': 'protectionId',
+    'alignment': 'alignmentId',
+}
+
+def _style_slots(ws, style_dict):
+    """Register a style dict with the sheet's workbook once; return its StyleArray ids.
+
+    The first use of a style dict in a workbook registers its font, fill, etc.
+    through a scratch cell; after that the ids are copied straight into cells,
+    skipping openpyxl's per-attribute hashing and lookups. Without the openpyxl
+    internals the style dict itself is returned and set attribute by attribute.
+    """
+    if not OPENPYXL_INTERNALS:
+        return style_dict
+    refs = ws.parent.__dict__.setdefault('_style_refs', {})
+    entry = refs.get(id(style_dict))
+    if entry is None:
+        scratch = Cell(ws)
+        for key, value in style_dict.items():
+            setattr(scratch, key, value)
+        slots = [(_STYLE_SLOTS[key], getattr(scratch._style, _STYLE_SLOTS[key])) for key in style_dict]
+        # Keep the dict alive alongside its ids so its id() can't be reused
+        entry = refs[id(style_dict)] = (style_dict, slots)
+    return entry[1]
+
+def _set_style_slots(obj, slots):
+    if not OPENPYXL_INTERNALS:
+        # slots are the style dict itself; see _style_slots()
+        for key, value in slots.items():
+            setattr(obj, key, value)
+        return
+    style = obj._style
+    if style is None:
+        style = obj._style = StyleArray()
+    for slot, value in slots:
+        setattr(style, slot, value)
+
 def apply_style(cell, style_dict):
     """Apply a style dictionary to a cell"""
-    for key, value in style_dict.items():
-        if key == 'number_format':
-            cell.number_format = value
-        else:
-            setattr(cell, key, value)
+    _set_style_slots(cell, _style_slots(cell.parent, style_dict))
+
+def style_range(ws, cell_range, style_dict):
+    """Apply a style dictionary to a whole range such as 'B12:H16', '12:16' or 'B:D'.
+
+    Whole rows and whole columns are styled through row/column formats, so
+    Excel formats every empty cell in them without one <c> element per cell.
+    Bounded ranges style each cell, but resolve the style only once.
+    """
+    min_col, min_row, max_col, max_row = range_boundaries(cell_range)
+    slots = _style_slots(ws, style_dict)
+
+    if min_col is None:  # whole rows, e.g. '12:16'
+        for row in range(min_row, max_row + 1):
+            _set_style_slots(ws.row_dimensions[row], slots)
+        return
+    if min_row is None:  # whole columns, e.g. 'B:D'
+        for col in range(min_col, max_col + 1):
+            _set_style_slots(ws.column_dimensions[get_column_letter(col)], slots)
+        return
+
+    for cells in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
+        for cell in cells:
+            _set_style_slots(cell, slots)
 
 def add_branding_header(ws, title, subtitle=""):
     """Add Charge Wealth branding header to worksheet"""
@@ -138,12 +311,13 @@ def add_branding_header(ws, title, subtitle=""):
     # Add "Powered by Charge Wealth" 
     ws.merge_cells('B4:D4')
     ws['B4'] = "Powered by Charge Wealth"
-    ws['B4'].font = Font(name='Calibri', size=10, italic=True, color=GRAY_HEADER)
+    apply_style(ws['B4'], styles['powered_by'])
     
-    return 6  # Return row to start content
+    return CONTENT_START_ROW
 
 def create_instructions_sheet(wb, tool_name, instructions):
     """Create a comprehensive instructions sheet"""
+    section("Instructions")
     ws = wb.create_sheet("Instructions", 0)
     styles = get_styles()
     
@@ -161,7 +335,7 @@ def create_instructions_sheet(wb, tool_name, instructions):
     
     # Welcome message
     ws[f'B{row}'] = "Welcome to your premium financial planning tool from Charge Wealth!"
-    ws[f'B{row}'].font = Font(name='Calibri', size=12, color=DARK_TEXT)
+    apply_style(ws[f'B{row}'], styles['welcome'])
     row += 2
     
     # Instructions sections
@@ -173,8 +347,7 @@ def create_instructions_sheet(wb, tool_name, instructions):
         
         for item in section_content:
             ws[f'B{row}'] = f"  • {item}"
-            ws[f'B{row}'].font = Font(name='Calibri', size=11, color=DARK_TEXT)
-            ws[f'B{row}'].alignment = Alignment(wrap_text=True, vertical='top')
+            apply_style(ws[f'B{row}'], styles['instruction_item'])
             ws.row_dimensions[row].height = max(20, len(item) // 80 * 15 + 20)
             row += 1
         row += 1
@@ -182,18 +355,1913 @@ def create_instructions_sheet(wb, tool_name, instructions):
     # Footer
     row += 1
     ws[f'B{row}'] = "Questions? Visit chargewealth.co for support and more premium tools."
-    ws[f'B{row}'].font = Font(name='Calibri', size=10, italic=True, color=HONEY)
-    
+    apply_style(ws[f'B{row}'], styles['footer'])
+
     return ws
 
+def merge_profile(sample, data):
+    """Overlay a member's data on a tool's sample data (one level deep for dicts)"""
+    merged = dict(sample)
+    for key, value in (data or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+def get_build_timestamp():
+    """Timestamp stamped into every workbook (honours SOURCE_DATE_EPOCH)"""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch is None:
+        return datetime.now(tz=timezone.utc).replace(tzinfo=None, microsecond=0)
+    return datetime.fromtimestamp(int(epoch), tz=timezone.utc).replace(tzinfo=None)
+
+class _ReproducibleZipFile(ZipFile):
+    """ZipFile that stamps every entry with a fixed date instead of the wall clock"""
+
+    def __init__(self, *args, date_time, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._date_time = date_time
+
+    def writestr(self, zinfo_or_arcname, data, *args, **kwargs):
+        if not isinstance(zinfo_or_arcname, ZipInfo):
+            zinfo_or_arcname = ZipInfo(zinfo_or_arcname, date_time=self._date_time)
+            zinfo_or_arcname.compress_type = self.compression
+            zinfo_or_arcname.external_attr = 0o600 << 16
+        super().writestr(zinfo_or_arcname, data, *args, **kwargs)
+
+    def write(self, filename, arcname=None, *args, **kwargs):
+        # openpyxl spools worksheets to temp files; route them through writestr
+        # so they get the fixed date too.
+        with open(filename, 'rb') as f:
+            self.writestr(arcname or filename, f.read())
+
+# Table bodies longer than this are streamed at save time instead of being
+# held in memory as one Cell object per cell.
+STREAMING_ROW_THRESHOLD = 500
+
+def _table_row_cells(values, start_col):
+    """Yield (column, value, style) for a table row; a cell is a value or (value, style)"""
+    for col_idx, spec in enumerate(values, start_col):
+        if spec is None:
+            continue
+        if isinstance(spec, tuple):
+            yield col_idx, spec[0], spec[1]
+        else:
+            yield col_idx, spec, None
+
+def write_table_rows(ws, start_row, rows, row_count, start_col=2):
+    """Write a row-oriented table body and return the first row after it.
+
+    Each row is a sequence of cells starting at start_col, where a cell is a
+    value, a (value, style dict) pair or None. rows is a sequence of rows or a
+    function returning a fresh iterator over them. Bodies longer than
+    STREAMING_ROW_THRESHOLD are not materialized: they are read one row at a
+    time, once to evaluate their formulas and once while the workbook is
+    saved, so pass a function (e.g. a generator function) for large tables.
+    Merged cells, charts and conditional formats that point into the table
+    work the same either way. Without the openpyxl internals every body is
+    written as ordinary cells.
+    """
+    if row_count > STREAMING_ROW_THRESHOLD and OPENPYXL_INTERNALS:
+        if not callable(rows):
+            rows = partial(iter, rows if isinstance(rows, (list, tuple)) else list(rows))
+        if not hasattr(ws, 'streamed_tables'):
+            ws.streamed_tables = []
+        ws.streamed_tables.append((start_row, start_col, rows, row_count))
+        return start_row + row_count
+
+    for row_idx, values in enumerate(rows() if callable(rows) else rows, start_row):
+        for col_idx, value, style in _table_row_cells(values, start_col):
+            cell = ws.cell(row=row_idx, column=col_idx, value=value)
+            if style:
+                apply_style(cell, style)
+    return start_row + row_count
+
+class _StreamedCell(Cell):
+    """Cell of a streamed table row, carrying its formula's result"""
+
+    __slots__ = ('result',)
+
+class _StreamingWorksheetWriter(WorksheetWriter):
+    """Worksheet writer that merges streamed table rows in with the in-memory cells
+    and caches formula results computed by evaluate_workbook()"""
+
+    def write_dimensions(self):
+        # The in-memory cells don't cover the streamed rows; the <dimension>
+        # element is optional, so leave it out rather than write a wrong one.
+        if not getattr(self.ws, 'streamed_tables', None):
+            super().write_dimensions()
+
+    def rows(self):
+        if not getattr(self.ws, 'streamed_tables', None):
+            return super().rows()
+        return self._merged_rows()
+
+    def _merged_rows(self):
+        sources = [super().rows()]
+        for (_, start_col, _, _), table_rows in zip(self.ws.streamed_tables, self.ws.evaluated_tables):
+            sources.append(self._streamed_rows(start_col, table_rows()))
+        merged = heapq.merge(*sources, key=lambda item: item[0])
+        for row_idx, group in groupby(merged, key=lambda item: item[0]):
+            cells = [cell for _, row in group for cell in row]
+            yield row_idx, sorted(cells, key=lambda cell: cell.column)
+
+    def _streamed_rows(self, start_col, table_rows):
+        for row_idx, values, results in table_rows:
+            cells = []
+            for col_idx, value, style in _table_row_cells(values, start_col):
+                cell = _StreamedCell(self.ws, row=row_idx, column=col_idx, value=value)
+                cell.result = results.get(col_idx)
+                if style:
+                    apply_style(cell, style)
+                cells.append(cell)
+            yield row_idx, cells
+
+    def write_row(self, xf, row, row_idx):
+        cached_values = getattr(self.ws, 'cached_values', None)
+        if not cached_values and not getattr(self.ws, 'streamed_tables', None):
+            return super().write_row(xf, row, row_idx)
+
+        attrs = {'r': f"{row_idx}"}
+        attrs.update(self.ws.row_dimensions.get(row_idx, {}))
+        with xf.element("row", attrs):
+            for cell in row:
+                if cell._comment is not None:
+                    self.ws._comments.append(CommentRecord.from_cell(cell))
+                if cell._value is None and not cell.has_style and not cell._comment:
+                    continue
+                result = None
+                if cell.data_type == 'f':
+                    result = cell.result if type(cell) is _StreamedCell else cached_values.get((row_idx, cell.column))
+                if result is None:
+                    write_cell(xf, self.ws, cell, cell.has_style)
+                else:
+                    write_formula_cell(xf, cell, cell.has_style, result)
+
+class _StreamingExcelWriter(ExcelWriter):
+    """ExcelWriter that streams any tables registered through write_table_rows
+    and writes cached formula results"""
+
+    def write_worksheet(self, ws):
+        if self.workbook.write_only:
+            return super().write_worksheet(ws)
+
+        ws._drawing = SpreadsheetDrawing()
+        ws._drawing.charts = ws._charts
+        ws._drawing.images = ws._images
+        writer = _StreamingWorksheetWriter(ws)
+        writer.write()
+
+        ws._rels = writer._rels
+        self._archive.write(writer.out, ws.path[1:])
+        self.manifest.append(ws)
+        writer.cleanup()
+
+def save_workbook(wb, output_path):
+    """Save a workbook so the same inputs always produce byte-identical files"""
+    section("save")
+    stamp = get_build_timestamp()
+    wb.properties.created = stamp
+    wb.properties.modified = stamp
+    if wb.write_only and not wb.worksheets:
+        wb.create_sheet()
+    # Zip entries can't predate 1980, so clamp very old SOURCE_DATE_EPOCH values
+    date_time = max(stamp.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+    archive = _ReproducibleZipFile(output_path, 'w', ZIP_DEFLATED, allowZip64=True,
+                                   date_time=date_time)
+    if not OPENPYXL_INTERNALS:
+        ExcelWriter(wb, archive).save()
+        return
+    with span("formulas"):
+        evaluate_workbook(wb)
+    _StreamingExcelWriter(wb, archive).save()
+
+
+# ============================================================================
+# BUILD TIMING
+# ============================================================================
+# Builders mark each sheet with section("Dashboard"), which runs until the next
+# section() or the end of the enclosing span, and wrap smaller steps in
+# `with span("charts"):`. Nothing is recorded outside record_spans(), so
+# instrumented code only pays for a function call and an attribute check.
+
+class _Spans:
+    """Per-process span state: finished spans and the stack of open ones"""
+    records = None  # [(path, start, seconds)] while recording, else None
+    stack = []      # (name, start, is_section) for each open span
+
+    @classmethod
+    def open(cls, name, is_section):
+        cls.stack.append((name, time.perf_counter(), is_section))
+
+    @classmethod
+    def close(cls):
+        path = tuple(entry[0] for entry in cls.stack)
+        _, start, _ = cls.stack.pop()
+        cls.records.append((path, start, time.perf_counter() - start))
+
+    @classmethod
+    def close_section(cls):
+        if cls.stack and cls.stack[-1][2]:
+            cls.close()
+
+class _Span:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _Spans.open(self.name, False)
+
+    def __exit__(self, *exc_info):
+        _Spans.close_section()
+        _Spans.close()
+
+def span(name):
+    """Time a block as a child of the current section/span"""
+    if _Spans.records is None:
+        return nullcontext()
+    return _Span(name)
+
+def section(name):
+    """End the current section, if any, and start timing the next one"""
+    if _Spans.records is None:
+        return
+    _Spans.close_section()
+    _Spans.open(name, True)
+
+@contextmanager
+def record_spans(root):
+    """Record every span opened inside the block under a root span named root"""
+    _Spans.records, _Spans.stack = [], []
+    records = _Spans.records
+    try:
+        with _Span(root):
+            yield records
+    finally:
+        _Spans.records = None
+
+def span_totals(records):
+    """Total seconds per span path, ordered by when each path first started"""
+    totals = {}
+    for path, _, seconds in sorted(records, key=lambda record: record[1]):
+        totals[path] = totals.get(path, 0.0) + seconds
+    return totals
+
+def write_collapsed_stacks(path, records):
+    """Write spans as collapsed stacks (flamegraph.pl input), self time in microseconds"""
+    totals = span_totals(records)
+    self_times = dict(totals)
+    for span_path, seconds in totals.items():
+        if len(span_path) > 1:
+            self_times[span_path[:-1]] -= seconds
+    with open(path, 'w', encoding='utf-8') as f:
+        for span_path, seconds in self_times.items():
+            f.write(f"{';'.join(span_path)} {max(0, round(seconds * 1e6))}\n")
+
+
+# ============================================================================
+# FORMULA EVALUATION
+# ============================================================================
+# openpyxl writes formulas without results, so viewers that don't recalculate
+# (file previews, mobile apps, the server) show blank cells. Before saving,
+# every formula is parsed into a tree of Python closures over the workbook's
+# cell values, run in dependency order, and its result written into the cell's <v> element
+# the way Excel caches values. Excel still recalculates on open.
+#
+# Only the functions the builders use are supported. A formula using anything
+# else (or caught in a reference cycle) is written without a cached value, as
+# is every formula that depends on it.
+
+# Infix operators by precedence, lowest first
+_FORMULA_PRECEDENCE = {'=': 1, '<>': 1, '<': 1, '>': 1, '<=': 1, '>=': 1,
+                       '&': 2, '+': 3, '-': 3, '*': 4, '/': 4, '^': 5}
+
+class FormulaError(Exception):
+    """An Excel error value such as #DIV/0!; a code of None means the result is unknown"""
+
+    def __init__(self, code=None):
+        super().__init__(code)
+        self.code = code
+
+def _xl_num(value):
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, FormulaError):
+        raise value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    raise FormulaError('#VALUE!')
+
+def _xl_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, FormulaError):
+        raise value
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f'{value:.15g}'
+    return str(value)
+
+def _xl_bool(value):
+    if isinstance(value, FormulaError):
+        raise value
+    if isinstance(value, str):
+        if value.upper() not in ('TRUE', 'FALSE'):
+            raise FormulaError('#VALUE!')
+        return value.upper() == 'TRUE'
+    return bool(value)
+
+def _xl_compare(left, right):
+    """-1, 0 or 1; numbers sort before text before booleans, text ignores case"""
+    for value in (left, right):
+        if isinstance(value, FormulaError):
+            raise value
+    if left is None:
+        left = '' if isinstance(right, str) else False if isinstance(right, bool) else 0
+    if right is None:
+        right = '' if isinstance(left, str) else False if isinstance(left, bool) else 0
+    left = (2, left) if isinstance(left, bool) else (1, left.lower()) if isinstance(left, str) else (0, left)
+    right = (2, right) if isinstance(right, bool) else (1, right.lower()) if isinstance(right, str) else (0, right)
+    return (left > right) - (left < right)
+
+def _xl_div(numerator, denominator):
+    numerator = _xl_num(numerator)
+    denominator = _xl_num(denominator)
+    if denominator == 0:
+        raise FormulaError('#DIV/0!')
+    return numerator / denominator
+
+def _xl_pow(base, exponent):
+    result = _xl_num(base) ** _xl_num(exponent)
+    if isinstance(result, complex):
+        raise FormulaError('#NUM!')
+    return result
+
+def _xl_numbers(args):
+    """Numbers in function arguments: ranges skip text and blanks, direct values are coerced"""
+    for arg in args:
+        if not isinstance(arg, list):
+            yield _xl_num(arg)
+            continue
+        for value in arg:
+            if isinstance(value, FormulaError):
+                raise value
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield value
+
+def _xl_sum(*args):
+    return sum(_xl_numbers(args))
+
+def _xl_max(*args):
+    return max(_xl_numbers(args), default=0)
+
+def _xl_min(*args):
+    return min(_xl_numbers(args), default=0)
+
+def _xl_logicals(args):
+    for arg in args:
+        if not isinstance(arg, list):
+            yield _xl_bool(arg)
+            continue
+        for value in arg:
+            if isinstance(value, FormulaError):
+                raise value
+            if isinstance(value, (int, float)):
+                yield bool(value)
+
+def _xl_or(*args):
+    values = list(_xl_logicals(args))
+    if not values:
+        raise FormulaError('#VALUE!')
+    return any(values)
+
+def _xl_and(*args):
+    values = list(_xl_logicals(args))
+    if not values:
+        raise FormulaError('#VALUE!')
+    return all(values)
+
+def _xl_rank(number, values, keys, order=0):
+    # A ranked column has one RANK per row, all over the same range, so the
+    # sorted range is kept in values (under a key no cell can have) for the
+    # rest of the evaluation. Every cell in the range is final by then.
+    number = _xl_num(number)
+    ranked = values.get(('RANK', keys))
+    if ranked is None:
+        ranked = values[('RANK', keys)] = sorted(_xl_numbers([list(map(values.get, keys))]))
+    low, high = bisect_left(ranked, number), bisect_right(ranked, number)
+    if low == high:
+        raise FormulaError('#N/A')
+    return 1 + low if _xl_num(order) else 1 + len(ranked) - high
+
+def _xl_match(value, array, match_type=1):
+    # match_type 1: last value <= value in an ascending range; 0: first equal value
+    match_type = _xl_num(match_type)
+    if isinstance(value, FormulaError):
+        raise value
+    found = None
+    for position, candidate in enumerate(array, 1):
+        if candidate is None:
+            continue
+        if isinstance(candidate, FormulaError):
+            raise candidate
+        order = _xl_compare(candidate, value)
+        if match_type == 0:
+            if order == 0:
+                return position
+        elif match_type > 0:
+            if order > 0:
+                break
+            found = position
+        else:
+            raise FormulaError(None)
+    if found is None:
+        raise FormulaError('#N/A')
+    return found
+
+def _xl_index(array, position):
+    position = int(_xl_num(position))
+    if not 1 <= position <= len(array):
+        raise FormulaError('#REF!')
+    value = array[position - 1]
+    if isinstance(value, FormulaError):
+        raise value
+    return value
+
+def _xl_sumproduct(*arrays):
+    arrays = [array if isinstance(array, list) else [array] for array in arrays]
+    if len({len(array) for array in arrays}) > 1:
+        raise FormulaError('#VALUE!')
+    total = 0
+    for values in zip(*arrays):
+        product = 1
+        for value in values:
+            if isinstance(value, FormulaError):
+                raise value
+            product *= value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+        total += product
+    return total
+
+def _sumif_key(value):
+    """Values SUMIF treats as equal share a key: text ignores case, numbers and booleans differ"""
+    if isinstance(value, str):
+        return ('text', value.lower())
+    return (type(value) is bool, value)
+
+def _xl_sumif(values, keys, criteria, sum_keys):
+    # Equality criteria only, e.g. SUMIF(B5:B20,"Housing",E5:E20). As with
+    # RANK, the totals for every criteria value are built on the first call
+    # and kept in values for the other SUMIFs over the same ranges.
+    if len(keys) != len(sum_keys):
+        raise FormulaError('#VALUE!')
+    if isinstance(criteria, FormulaError):
+        raise criteria
+    if criteria is None:
+        return 0
+    totals = values.get(('SUMIF', keys, sum_keys))
+    if totals is None:
+        totals = values[('SUMIF', keys, sum_keys)] = {}
+        for key, sum_key in zip(keys, sum_keys):
+            candidate = values.get(key)
+            if candidate is None or isinstance(candidate, FormulaError):
+                continue
+            group = _sumif_key(candidate)
+            total, value = totals.get(group, 0), values.get(sum_key)
+            if isinstance(total, FormulaError):
+                continue
+            if isinstance(value, FormulaError):
+                totals[group] = value
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[group] = total + value
+    total = totals.get(_sumif_key(criteria), 0)
+    if isinstance(total, FormulaError):
+        raise total
+    return total
+
+_FORMULA_OPERATORS = {
+    '=': lambda left, right: _xl_compare(left, right) == 0,
+    '<>': lambda left, right: _xl_compare(left, right) != 0,
+    '<': lambda left, right: _xl_compare(left, right) < 0,
+    '>': lambda left, right: _xl_compare(left, right) > 0,
+    '<=': lambda left, right: _xl_compare(left, right) <= 0,
+    '>=': lambda left, right: _xl_compare(left, right) >= 0,
+    '&': lambda left, right: _xl_text(left) + _xl_text(right),
+    '+': lambda left, right: _xl_num(left) + _xl_num(right),
+    '-': lambda left, right: _xl_num(left) - _xl_num(right),
+    '*': lambda left, right: _xl_num(left) * _xl_num(right),
+    '/': _xl_div,
+    '^': _xl_pow,
+}
+# Functions whose arguments may be whole ranges
+_RANGE_FUNCTIONS = {'SUM': _xl_sum, 'MAX': _xl_max, 'MIN': _xl_min, 'OR': _xl_or, 'AND': _xl_and,
+                    'SUMPRODUCT': _xl_sumproduct}
+
+def _constant(value):
+    return lambda values, row: value
+
+# Formulas copied down a column differ only in their relative row numbers, so
+# each is compiled once as a template: every relative row r of a formula in row
+# R is written as r - R + RELATIVE_ROW_ANCHOR, and the compiled function takes
+# the row it runs for.
+RELATIVE_ROW_ANCHOR = 4000000  # far above the 1,048,576 rows a sheet can have
+# Relative cell references (absolute rows don't match), skipping string
+# literals and quoted sheet names
+_FORMULA_REF_RE = re.compile(r'"[^"]*"|\'[^\']*\'|(?<![\w.$])(\$?[A-Z]{1,3})([0-9]+)(?![\w(!])')
+_CELL_REF_RE = re.compile(r'(\$?)([A-Z]{1,3})(\$?)([0-9]+)')
+
+def _formula_template(formula, row):
+    """formula in row, with its relative row numbers made relative to RELATIVE_ROW_ANCHOR"""
+    offset = RELATIVE_ROW_ANCHOR - row
+    return _FORMULA_REF_RE.sub(lambda match: match[0] if match[2] is None else f'{match[1]}{int(match[2]) + offset}',
+                               formula)
+
+class _FormulaParser:
+    """Turns one formula template into a function of a dict of cell values and
+    the row the formula is in.
+
+    Cells are keyed (sheet title, row, column). Parse nodes are ('value',
+    function) or ('ref', span) so functions can take whole ranges while
+    operators only accept single cells. A span is (sheet, min_col, min_row,
+    max_col, max_row) where each row is (offset from the formula's row, True)
+    or (row, False). Every function in the tree takes (values, row).
+    """
+
+    def __init__(self, sheet, formula):
+        self.sheet = sheet
+        self.tokens = [token for token in Tokenizer(formula).items if token.type != Token.WSPACE]
+        self.pos = 0
+        self.refs = []
+
+    def parse(self):
+        node = self.expression(1)
+        if self.pos != len(self.tokens):
+            raise ValueError(f"unexpected {self.tokens[self.pos].value!r}")
+        return self.scalar(node)
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+    def scalar(self, node):
+        kind, payload = node
+        if kind == 'value':
+            return payload
+        sheet, min_col, min_row, max_col, max_row = payload
+        if min_col != max_col or min_row != max_row:
+            raise ValueError("range used as a single value")
+        number, relative = min_row
+        if relative:
+            return lambda values, row: values.get((sheet, row + number, min_col))
+        key = (sheet, number, min_col)
+        return lambda values, row: values.get(key)
+
+    def array(self, node):
+        kind, payload = node
+        if kind == 'value':
+            return payload
+        keys = self.range_keys(payload)
+        return lambda values, row: list(map(values.get, keys(row)))
+
+    def range_keys(self, span):
+        """Function of the row giving the keys of every cell in span"""
+        if span[2][1] or span[4][1]:
+            return partial(_span_keys, span)
+        keys = _span_keys(span, 0)
+        return lambda row: keys
+
+    def expression(self, min_precedence):
+        left = self.unary()
+        while self.peek() is not None and self.peek().type == Token.OP_IN:
+            operator = self.peek().value
+            precedence = _FORMULA_PRECEDENCE.get(operator)
+            if precedence is None:
+                raise ValueError(f"unsupported operator {operator!r}")
+            if precedence < min_precedence:
+                break
+            self.take()
+            right = self.scalar(self.expression(precedence + 1))
+            left = ('value', self.binary(_FORMULA_OPERATORS[operator], self.scalar(left), right))
+        return left
+
+    @staticmethod
+    def binary(operator, left, right):
+        return lambda values, row: operator(left(values, row), right(values, row))
+
+    def unary(self):
+        token = self.take()
+        if token.type == Token.OP_PRE:
+            operand = self.scalar(self.unary())
+            if token.value == '-':
+                node = ('value', lambda values, row, operand=operand: -_xl_num(operand(values, row)))
+            else:
+                node = ('value', operand)
+        elif token.type == Token.OPERAND:
+            node = self.operand(token)
+        elif token.type == Token.FUNC and token.subtype == Token.OPEN:
+            node = self.function(token.value[:-1].upper())
+        elif token.type == Token.PAREN and token.subtype == Token.OPEN:
+            node = self.expression(1)
+            if self.take().type != Token.PAREN:
+                raise ValueError("unbalanced parentheses")
+        else:
+            raise ValueError(f"unexpected {token.value!r}")
+        while self.peek() is not None and self.peek().type == Token.OP_POST:
+            self.take()
+            operand = self.scalar(node)
+            node = ('value', lambda values, row, operand=operand: _xl_num(operand(values, row)) / 100)
+        return node
+
+    def operand(self, token):
+        if token.subtype == Token.NUMBER:
+            try:
+                return ('value', _constant(int(token.value)))
+            except ValueError:
+                return ('value', _constant(float(token.value)))
+        if token.subtype == Token.TEXT:
+            return ('value', _constant(token.value[1:-1].replace('""', '"')))
+        if token.subtype == Token.LOGICAL:
+            return ('value', _constant(token.value.upper() == 'TRUE'))
+        if token.subtype == Token.ERROR:
+            return ('value', _constant(FormulaError(token.value)))
+        return ('ref', self.reference(token.value))
+
+    def reference(self, text):
+        sheet = self.sheet
+        if '!' in text:
+            sheet, text = text.rsplit('!', 1)
+            if sheet.startswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+        corners = []
+        for corner in text.split(':', 1):
+            match = _CELL_REF_RE.fullmatch(corner)
+            if match is None:
+                raise ValueError(f"unsupported reference {text!r}")
+            number = int(match[4])
+            if match[3]:
+                row = (number, False)
+            elif number > RELATIVE_ROW_ANCHOR // 2:
+                row = (number - RELATIVE_ROW_ANCHOR, True)
+            else:
+                raise ValueError(f"reference {text!r} is not from a formula template")
+            corners.append((column_index_from_string(match[2]), row))
+        (first_col, first_row), (last_col, last_row) = corners[0], corners[-1]
+        span = (sheet, min(first_col, last_col), first_row, max(first_col, last_col), last_row)
+        self.refs.append(span)
+        return span
+
+    def function(self, name):
+        args = []
+        while True:
+            token = self.peek()
+            if token.type == Token.FUNC and token.subtype == Token.CLOSE and not args:
+                self.take()
+                break
+            if token.type in (Token.SEP, Token.FUNC) and token.subtype in (Token.ARG, Token.CLOSE):
+                args.append(('value', _constant(None)))
+            else:
+                args.append(self.expression(1))
+            token = self.take()
+            if token.type == Token.FUNC and token.subtype == Token.CLOSE:
+                break
+            if token.type != Token.SEP:
+                raise ValueError(f"unexpected {token.value!r} in {name}()")
+
+        if name == 'IF' and len(args) in (2, 3):
+            condition, if_true = self.scalar(args[0]), self.scalar(args[1])
+            if_false = self.scalar(args[2]) if len(args) == 3 else _constant(False)
+            return ('value', lambda values, row: (if_true(values, row) if _xl_bool(condition(values, row))
+                                                  else if_false(values, row)))
+        if name == 'RANK' and len(args) in (2, 3) and args[1][0] == 'ref':
+            number, keys = self.scalar(args[0]), self.range_keys(args[1][1])
+            rest = [self.scalar(arg) for arg in args[2:]]
+            return ('value', lambda values, row: _xl_rank(number(values, row), values, keys(row),
+                                                          *(arg(values, row) for arg in rest)))
+        if name == 'MATCH' and len(args) in (2, 3) and args[1][0] == 'ref':
+            value, array = self.scalar(args[0]), self.array(args[1])
+            rest = [self.scalar(arg) for arg in args[2:]]
+            return ('value', lambda values, row: _xl_match(value(values, row), array(values, row),
+                                                           *(arg(values, row) for arg in rest)))
+        if name == 'SUMIF' and len(args) == 3 and args[0][0] == 'ref' and args[2][0] == 'ref':
+            keys, criteria, sum_keys = self.range_keys(args[0][1]), self.scalar(args[1]), self.range_keys(args[2][1])
+            return ('value', lambda values, row: _xl_sumif(values, keys(row), criteria(values, row), sum_keys(row)))
+        if name == 'INDEX' and len(args) == 2 and args[0][0] == 'ref':
+            array, position = self.array(args[0]), self.scalar(args[1])
+            return ('value', lambda values, row: _xl_index(array(values, row), position(values, row)))
+        if name in _RANGE_FUNCTIONS and args:
+            function, arrays = _RANGE_FUNCTIONS[name], [self.array(arg) for arg in args]
+            return ('value', lambda values, row: function(*(array(values, row) for array in arrays)))
+        raise ValueError(f"unsupported function {name}()")
+
+@lru_cache(maxsize=1024)
+def _range_at(sheet, min_col, min_row, max_col, max_row):
+    """(sheet, row, col) key of every cell in a range, shared by all formulas reading it"""
+    if min_row > max_row:
+        min_row, max_row = max_row, min_row
+    return tuple((sheet, row, col) for row in range(min_row, max_row + 1)
+                 for col in range(min_col, max_col + 1))
+
+def _span_keys(span, row):
+    """Keys of the cells a formula in row reads through one of its spans"""
+    sheet, min_col, (min_row, min_relative), max_col, (max_row, max_relative) = span
+    return _range_at(sheet, min_col, min_row + row if min_relative else min_row,
+                     max_col, max_row + row if max_relative else max_row)
+
+@lru_cache(maxsize=4096)
+def _compile_template(sheet, template):
+    """(function of the cell values dict and the row, spans it reads, rows it looks
+    back, columns it reads in its own row or None if it reads anything but rows
+    above it on its sheet) for a formula template on sheet, or None if unsupported"""
+    parser = _FormulaParser(sheet, template)
+    try:
+        function = parser.parse()
+    except (ValueError, IndexError, TokenizerError):
+        return None
+    spans = tuple(dict.fromkeys(parser.refs))
+    lookback = max((-number for span in spans if span[0] == sheet
+                    for number, relative in (span[2], span[4]) if relative), default=0)
+    own_row = set()
+    for span_sheet, min_col, min_row, max_col, max_row in spans:
+        if span_sheet != sheet or not (min_row[1] and max_row[1]) or max(min_row[0], max_row[0]) > 0:
+            own_row = None
+            break
+        if min(min_row[0], max_row[0]) <= 0 <= max(min_row[0], max_row[0]):
+            own_row.update(range(min_col, max_col + 1))
+    own_cols = None if own_row is None else frozenset(own_row)
+    return function, spans, max(lookback, 0), own_cols
+
+def compile_formula(sheet, formula, row):
+    """(function of the cell values dict, cells it reads) for a formula in row on sheet, or None if unsupported"""
+    program = _compile_template(sheet, _formula_template(formula, row))
+    if program is None:
+        return None
+    function, spans, _, _ = program
+    refs = tuple(dict.fromkeys(key for span in spans for key in _span_keys(span, row)))
+    return partial(function, row=row), refs
+
+def _is_formula(value):
+    """Whether openpyxl would store value as a formula"""
+    return isinstance(value, str) and len(value) > 1 and value.startswith('=')
+
+# Rows of a streamed table kept behind the current one even before any of its
+# formulas has looked that far back (a table's first row often looks back less)
+TABLE_FORMULA_WINDOW = 16
+
+def _formula_value(function, *args):
+    """Run a compiled formula, turning anything Excel would show as an error into a FormulaError"""
+    try:
+        value = function(*args)
+        if value is None:
+            return 0
+        if isinstance(value, float) and not math.isfinite(value):
+            return FormulaError('#NUM!')
+        return value
+    except FormulaError as exc:
+        return exc
+    except ArithmeticError:
+        return FormulaError('#NUM!')
+    except (TypeError, ValueError):
+        return FormulaError()
+
+def _is_known(value):
+    return not isinstance(value, FormulaError) or value.code is not None
+
+class WorkbookFormulas:
+    """Every formula in a workbook, compiled and ordered so each runs after the cells it reads.
+
+    Streamed table bodies are never held in memory. Their formulas run row by
+    row as the table streams by (once while evaluating, again while saving),
+    reading the rows just above them, the rest of the workbook and whichever
+    table cells other formulas read, which are the only table cells kept. A
+    table formula that reads anything else gets no cached value.
+    """
+
+    def __init__(self, wb):
+        self.values = {}
+        self.formulas = {}
+        self.tables = []  # (sheet title, first row, last row, start column, rows function)
+        for ws in wb.worksheets:
+            for (row, col), cell in ws._cells.items():
+                if cell.data_type == 'f':
+                    self.formulas[(ws.title, row, col)] = cell._value
+                elif cell._value is not None:
+                    self.values[(ws.title, row, col)] = cell._value
+            for start_row, start_col, rows, row_count in getattr(ws, 'streamed_tables', ()):
+                self.tables.append((ws.title, start_row, start_row + row_count - 1, start_col, rows))
+
+        compiled = {}
+        for key, formula in self.formulas.items():
+            program = compile_formula(key[0], formula, key[1])
+            if program is None:
+                self.values[key] = FormulaError()
+            else:
+                compiled[key] = program
+
+        # Kahn's algorithm; whatever is left waiting sits on a reference cycle
+        waiting = {}
+        dependents = {}
+        for key, (_, refs) in compiled.items():
+            reads = [ref for ref in refs if ref in compiled]
+            waiting[key] = len(reads)
+            for ref in reads:
+                dependents.setdefault(ref, []).append(key)
+        ready = [key for key, count in waiting.items() if not count]
+        order = []
+        while ready:
+            key = ready.pop()
+            order.append((key, compiled[key][0]))
+            for dependent in dependents.get(key, ()):
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    ready.append(dependent)
+        if len(order) < len(compiled):
+            for key in compiled.keys() - {key for key, _ in order}:
+                self.values[key] = FormulaError()
+
+        # Formulas reading table cells (directly or through another formula)
+        # run after the tables have streamed by, which keeps the cells they read
+        self.wanted = set()
+        self.late = set()
+        for key, _ in order:
+            refs = compiled[key][1]
+            streamed = [ref for ref in refs if self._table_of(ref) is not None]
+            if streamed or any(ref in self.late for ref in refs):
+                self.late.add(key)
+                self.wanted.update(streamed)
+        self.order = [(key, function) for key, function in order if key not in self.late]
+        self.late_order = [(key, function) for key, function in order if key in self.late]
+        # Last row of each table the late formulas read
+        self.wanted_rows = {}
+        for key in self.wanted:
+            index = self._table_of(key)
+            self.wanted_rows[index] = max(self.wanted_rows.get(index, 0), key[1])
+        self.late_in_table = {self._table_of(key) for key in self.late}
+
+    def _table_of(self, key):
+        """Index of the streamed table holding key, or None"""
+        for index, (title, first, last, _, _) in enumerate(self.tables):
+            if key[0] == title and first <= key[1] <= last:
+                return index
+        return None
+
+    def _readable(self, key, index, row, oldest, pending):
+        """Whether a formula in row of table index can read key yet"""
+        if key in self.late:
+            return False
+        table = self._table_of(key)
+        if table is None:
+            return True
+        if table != index:
+            return table < index and key in self.wanted
+        if key[1] > row or key[1] == row and key[2] in pending:
+            return False
+        return key[1] >= oldest or key in self.wanted
+
+    def _can_run(self, spans, index, row, oldest, pending):
+        """Whether every cell a table formula in row reads is available"""
+        title = self.tables[index][0]
+        for span in spans:
+            sheet, min_col, (min_row, min_relative), max_col, (max_row, max_relative) = span
+            low = min_row + row if min_relative else min_row
+            high = max_row + row if max_relative else max_row
+            if low > high:
+                low, high = high, low
+            if sheet == title and oldest <= low and high <= row and index not in self.late_in_table:
+                # Rows still in the window: only this row's pending formulas are missing
+                if high < row or not any(min_col <= col <= max_col for col in pending):
+                    continue
+            for key in _range_at(sheet, min_col, low, max_col, high):
+                if not self._readable(key, index, row, oldest, pending):
+                    return False
+        return True
+
+    def table_rows(self, values, index):
+        """Yield (row, cells, formula results by column) for a streamed table, running
+        each row's formulas as it goes by; values keeps only the cells in self.wanted"""
+        title, first, _, start_col, rows = self.tables[index]
+        window = deque()  # (row, keys) of the rows formulas can still look back to
+        lookback = TABLE_FORMULA_WINDOW
+        late_free = index not in self.late_in_table
+        try:
+            for row, cells in enumerate(rows(), first):
+                while window and window[0][0] < row - lookback:
+                    self._forget(values, window.popleft()[1])
+                oldest = window[0][0] if window else row
+
+                keys = []
+                formulas = []
+                for col, value, _ in _table_row_cells(cells, start_col):
+                    if _is_formula(value):
+                        formulas.append((col, value))
+                    elif value is not None:
+                        values[(title, row, col)] = value
+                        keys.append((title, row, col))
+
+                results = {}
+                pending = {col for col, _ in formulas}
+                for col, formula in formulas:
+                    program = _compile_template(title, _formula_template(formula, row))
+                    if program is None:
+                        value = FormulaError()
+                    else:
+                        function, spans, rows_back, own_cols = program
+                        lookback = max(lookback, rows_back)
+                        if (own_cols is not None and oldest <= row - rows_back and late_free
+                                and own_cols.isdisjoint(pending)) or self._can_run(spans, index, row, oldest, pending):
+                            value = _formula_value(function, values, row)
+                        else:
+                            value = FormulaError()
+                    pending.discard(col)
+                    values[(title, row, col)] = value
+                    keys.append((title, row, col))
+                    if _is_known(value):
+                        results[col] = value
+                window.append((row, keys))
+                yield row, cells, results
+        finally:
+            for _, keys in window:
+                self._forget(values, keys)
+
+    def _forget(self, values, keys):
+        for key in keys:
+            if key not in self.wanted:
+                values.pop(key, None)
+
+    def run(self, inputs=None):
+        """(cell values, results of every formula outside the streamed tables that could be computed)"""
+        values = dict(self.values)
+        if inputs:
+            values.update(inputs)
+        results = {}
+        self._run(self.order, values, results)
+        for index in sorted(self.wanted_rows):
+            for row, _, _ in self.table_rows(values, index):
+                if row >= self.wanted_rows[index]:
+                    break
+        self._run(self.late_order, values, results)
+        return values, results
+
+    def _run(self, order, values, results):
+        for key, function in order:
+            value = values[key] = _formula_value(function, values)
+            if _is_known(value):
+                results[key] = value
+
+    def evaluate(self, inputs=None):
+        """Results of every formula outside the streamed tables that could be computed, keyed by (sheet, row, col)"""
+        return self.run(inputs)[1]
+
+def evaluate_workbook(wb):
+    """Compute every formula in wb and keep the results for the writer: ws.cached_values
+    for the in-memory cells, ws.evaluated_tables to stream each table with its results"""
+    formulas = WorkbookFormulas(wb)
+    values, results = formulas.run()
+    cached_values = {ws.title: {} for ws in wb.worksheets}
+    for (title, row, col), value in results.items():
+        cached_values[title][(row, col)] = value
+    for ws in wb.worksheets:
+        ws.cached_values = cached_values[ws.title]
+        ws.evaluated_tables = [partial(formulas.table_rows, values, index)
+                               for index, table in enumerate(formulas.tables) if table[0] == ws.title]
+    return formulas
+
+def write_formula_cell(xf, cell, styled, result):
+    """Write a formula cell with its result cached in <v>, the way Excel saves it"""
+    formula, attributes = _set_attributes(cell, styled)
+    if isinstance(result, FormulaError):
+        attributes['t'], text = 'e', result.code
+    elif isinstance(result, bool):
+        attributes['t'], text = 'b', '1' if result else '0'
+    elif isinstance(result, str):
+        attributes['t'], text = 'str', result
+    else:
+        text = safe_string(result)
+    el = Element('c', attributes)
+    SubElement(el, 'f').text = formula[1:]
+    SubElement(el, 'v').text = text
+    xf.write(el)
+
+
+# ============================================================================
+# DECLARATIVE LAYOUTS
+# ============================================================================
+# Every tool's sheets are described by a layout spec in LAYOUTS: each sheet's
+# blocks from top to bottom. compile_layout() assigns every block its rows
+# once per spec and table size and records where each named cell or range
+# landed, so formulas say [income.monthly_total] instead of a hand-counted
+# Income!J15. render_layout() then only has to write the values. Builders
+# compute whatever the Python engines contribute (payoff schedules, fee
+# projections, trend metrics) into the data the spec reads.
+#
+# Block kinds:
+#   section  styled heading, 'rows' high (2), merged across to 'merge_to'
+#   gap      'rows' empty rows
+#   text     one row per line of 'lines'; a line is text or (text, style)
+#   fields   labelled cells, one row per (name, label, value, number_format)
+#            item, with an optional dict of per-item label/value styles
+#   table    header, body and optional total row; the body comes from
+#            records through 'columns' or from ready-made 'rows'
+#   grid     month-by-month grid with a row per formula
+#   chart    line or pie chart over named ranges or table columns; takes no
+#            rows and is anchored 'offset' rows below where it appears (or
+#            at a fixed 'anchor'), so one listed before a section sits
+#            beside it
+# Any block can name a data flag in 'when'; it keeps its rows but is only
+# drawn when the flag is set. A style is the name of one of get_styles() or
+# a style dict.
+#
+# Formula templates use [name] for a relative and [$name] for an absolute
+# reference to a named cell or range, and [name#3] for the third cell of a
+# one-column or one-row range; the sheet prefix is added when the name lives
+# on another sheet. Text and field formulas are first filled in from the data
+# with str.format_map, e.g. "{projection_years}-YEAR PROJECTION". Inside
+# tables and grids, {placeholders} stand for cells of the current row (table
+# column keys, {prev[key]} for the row above, {record[i]} for the record) or
+# column (grid row names). Grid formulas also get {i} (months from the first
+# column), {month} (1-based) and, on rows repeated once per data record,
+# that record's number {n}.
+
+CONTENT_START_ROW = 6  # first free row under add_branding_header()
+
+_LAYOUT_REF_RE = re.compile(r'\[(\$?)([a-z_][a-z0-9_]*(?:\.[a-z0-9_]+)*)(?:#(\d+))?\]')
+
+def _sheet_prefix(title):
+    return title if re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', title) else quote_sheetname(title)
+
+class WorkbookLayout:
+    """Named cells and ranges of a workbook, and the formulas that refer to them by name"""
+
+    def __init__(self, names=None):
+        self.names = dict(names or {})  # name -> (sheet title, min_col, min_row, max_col, max_row)
+
+    def ref(self, name, sheet=None, absolute=False, index=None):
+        """Address of a named cell or range as seen from the given sheet; with an
+        index, of that (1-based) cell of a one-row or one-column range"""
+        if name not in self.names:
+            raise KeyError(f"Unknown layout reference [{name}]")
+        title, min_col, min_row, max_col, max_row = self.names[name]
+        if index is not None:
+            if min_col == max_col:
+                min_row = max_row = min_row + index - 1
+            else:
+                min_col = max_col = min_col + index - 1
+            if max_row > self.names[name][4] or max_col > self.names[name][3]:
+                raise KeyError(f"Layout reference [{name}#{index}] is outside the range")
+        dollar = '$' if absolute else ''
+        address = f'{dollar}{get_column_letter(min_col)}{dollar}{min_row}'
+        if (min_col, min_row) != (max_col, max_row):
+            address += f':{dollar}{get_column_letter(max_col)}{dollar}{max_row}'
+        if title != sheet:
+            address = f'{_sheet_prefix(title)}!{address}'
+        return address
+
+    def resolve(self, formula, sheet=None):
+        """Replace every [name] / [$name] / [name#3] in a formula with its address"""
+        return _LAYOUT_REF_RE.sub(lambda m: self.ref(m[2], sheet, absolute=bool(m[1]),
+                                                     index=int(m[3]) if m[3] else None), formula)
+
+def _lookup(data, path):
+    for key in path:
+        data = data[key]
+    return data
+
+def _data(data, key):
+    """What a spec points at in the render data: a key, or a path such as ('settings', 'emergency_fund')"""
+    return _lookup(data, key) if isinstance(key, tuple) else data[key]
+
+def _style(styles, style):
+    return styles[style] if isinstance(style, str) else style
+
+def _projection_months(value, name):
+    """A projection horizon in months, checked against PROJECTION_MONTH_RANGE"""
+    months = int(value)
+    low, high = PROJECTION_MONTH_RANGE
+    if not low <= months <= high:
+        raise ValueError(f"{name} must be {low}-{high} months, not {months}")
+    return months
+
+def _grid_months(block, data):
+    """Month columns of a grid sized by a profile value, e.g. ('settings', 'projection_months')"""
+    return _projection_months(_lookup(data, block['months']), '.'.join(block['months']))
+
+def _table_source(block, data):
+    """A table's inline 'records', or its 'data' records or ready-made 'rows' from the
+    render data, and how many there are; a function (for 'count' tables) is called
+    for a fresh iterator each time the body is read"""
+    if 'records' in block:
+        source = block['records']
+    else:
+        source = _data(data, block['rows'] if 'rows' in block else block['data'])
+    return source, _data(data, block['count']) if 'count' in block else len(source)
+
+def layout_table_sizes(spec, data):
+    """Size of every data-driven block in a spec, in spec order (the compile cache key):
+    table row counts (and blank row counts taken from the data), and for grids the
+    month count and each repeated row's record count"""
+    sizes = []
+    for sheet in spec:
+        for block in sheet['blocks']:
+            if block['kind'] == 'table':
+                sizes.append(_table_source(block, data)[1])
+                if isinstance(block.get('blank_rows'), (str, tuple)):
+                    sizes.append(_data(data, block['blank_rows']))
+            elif block['kind'] == 'grid':
+                if 'months' in block:
+                    sizes.append(_grid_months(block, data))
+                sizes.extend(len(data[key]) for key in block.get('repeat', {}).values())
+    return tuple(sizes)
+
+def projection_month_labels(months):
+    """Grid column headers: Jan-Dec, with a year number once the projection runs past one year"""
+    names = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+    if months <= 12:
+        return list(names[:months])
+    return [f"{names[i % 12]} Y{i // 12 + 1}" for i in range(months)]
+
+def _compile_table(block, title, row, sizes, names):
+    """Rows of a table block starting at row; returns its frame"""
+    columns = block.get('columns', ())
+    if 'head' in block:
+        head_rows = block['head_rows']
+    else:
+        head_rows = 1 if block.get('header', True) else 0
+    frame = {'row': row, 'first': row + head_rows}
+    frame['data_end'] = frame['first'] + next(sizes) - 1
+    blank_rows = block.get('blank_rows', 0)
+    frame['last'] = frame['data_end'] + (next(sizes) if isinstance(blank_rows, (str, tuple)) else blank_rows)
+    offset = block.get('total_offset', 2)
+    frame['total'] = None if offset is None else frame['last'] + offset
+
+    name = block.get('name')
+    if name and columns:
+        width = len(columns)
+        if head_rows == 1:
+            names[f"{name}.header"] = (title, 2, row, 1 + width, row)
+        names[f"{name}.rows"] = (title, 2, frame['first'], 1 + width, frame['last'])
+        names[f"{name}.records"] = (title, 2, frame['first'], 1 + width, frame['data_end'])
+        for col_idx, column in enumerate(columns, 2):
+            if 'key' in column:
+                names[f"{name}.{column['key']}"] = (title, col_idx, frame['first'], col_idx, frame['last'])
+            if 'total' in column:
+                names[f"{name}.{column['total'][0]}"] = (title, col_idx, frame['total'],
+                                                         col_idx, frame['total'])
+    return frame
+
+@lru_cache(maxsize=64)
+def compile_layout(layout_name, sizes):
+    """Place every block of LAYOUTS[layout_name] for the given table sizes.
+
+    Returns (names, frames): the named placements, and for each sheet the
+    row numbers each block was given. Both are shared between renders and
+    must not be modified.
+    """
+    names = {}
+    frames = []
+    sizes = iter(sizes)
+    for sheet in LAYOUTS[layout_name]:
+        title = sheet['sheet']
+        row = sheet.get('start_row', CONTENT_START_ROW)
+        sheet_frames = []
+        for block in sheet['blocks']:
+            kind = block['kind']
+            frame = {'row': row}
+            if kind == 'section':
+                row += block.get('rows', 2)
+            elif kind == 'gap':
+                row += block['rows']
+            elif kind == 'text':
+                row += len(block['lines'])
+            elif kind == 'fields':
+                value_col = column_index_from_string(block.get('value_col', 'C'))
+                for offset, (name, *_) in enumerate(block['items']):
+                    names[f"{block['name']}.{name}"] = (title, value_col, row + offset, value_col, row + offset)
+                row += len(block['items'])
+            elif kind == 'table':
+                frame = _compile_table(block, title, row, sizes, names)
+                row = (frame['last'] if frame['total'] is None else frame['total']) + 1
+            elif kind == 'grid':
+                width = next(sizes) if 'months' in block else len(block['columns'])
+                repeat = block.get('repeat', {})
+                frame['width'] = width
+                frame['rows'] = {}
+                names[f"{block['name']}.header"] = (title, 3, row, 2 + width, row)
+                row += 1
+                for name, *_ in block['rows']:
+                    count = next(sizes) if name in repeat else 1
+                    frame['rows'][name] = (row, count)
+                    if count:
+                        names[f"{block['name']}.{name}"] = (title, 3, row, 2 + width, row + count - 1)
+                    row += count
+            elif kind != 'chart':
+                raise ValueError(f"Unknown layout block kind {kind!r}")
+            sheet_frames.append(frame)
+        frames.append(sheet_frames)
+    return names, frames
+
+def _render_rules(ws, layout, rules):
+    """Conditional formats on named ranges: ('formula', name, '{cell}>=0', color),
+    ('databar', name, start, end, color) or ('color_scale', name, (value, color) x 3).
+    Ranges without rows (e.g. an empty table's column) get none."""
+    for rule in rules:
+        _, _, min_row, _, max_row = layout.names[rule[1]]
+        if max_row < min_row:
+            continue
+        cell_range = layout.ref(rule[1], ws.title)
+        first_cell = cell_range.split(':')[0]
+        if rule[0] == 'formula':
+            ws.conditional_formatting.add(cell_range, FormulaRule(
+                formula=[rule[2].format(cell=first_cell)], fill=PatternFill(bgColor=rule[3])))
+        elif rule[0] == 'databar':
+            ws.conditional_formatting.add(cell_range, DataBarRule(
+                start_type='num', start_value=rule[2], end_type='num', end_value=rule[3], color=rule[4]))
+        else:
+            (start, start_color), (mid, mid_color), (end, end_color) = rule[2:]
+            ws.conditional_formatting.add(cell_range, ColorScaleRule(
+                start_type='num', start_value=start, start_color=start_color,
+                mid_type='num', mid_value=mid, mid_color=mid_color,
+                end_type='num', end_value=end, end_color=end_color))
+
+def _render_fields(ws, block, frame, layout, data, styles):
+    label_col = block.get('label_col', 'B')
+    value_col = block.get('value_col', 'C')
+    for offset, (name, label, value, number_format, *options) in enumerate(block['items']):
+        options = options[0] if options else {}
+        row = frame['row'] + offset
+        cell = ws[f'{label_col}{row}']
+        cell.value = label.format_map(data)
+        label_style = options.get('label_style', block.get('label_style'))
+        if label_style:
+            apply_style(cell, _style(styles, label_style))
+
+        # A tuple is a path into the data, a string text or a formula; None leaves the cell empty
+        if isinstance(value, tuple):
+            value = _lookup(data, value)
+        elif isinstance(value, str):
+            value = layout.resolve(value.format_map(data), ws.title)
+        value_style = options.get('value_style', block.get('value_style'))
+        if value is None and not value_style and not number_format:
+            continue
+        cell = ws[f'{value_col}{row}']
+        if value is not None:
+            cell.value = value
+        if value_style:
+            apply_style(cell, _style(styles, value_style))
+        if number_format:
+            cell.number_format = number_format
+
+def _resolved_rows(rows, first_row, layout, sheet):
+    """Ready-made table rows with {row} and [names] filled into their formulas"""
+    def resolve(cell, row):
+        value = cell[0] if isinstance(cell, tuple) else cell
+        if not (isinstance(value, str) and value.startswith('=')):
+            return cell
+        value = layout.resolve(value.replace('{row}', str(row)), sheet)
+        return (value, cell[1]) if isinstance(cell, tuple) else value
+
+    def body():
+        for row, cells in enumerate(rows() if callable(rows) else rows, first_row):
+            yield [resolve(cell, row) for cell in cells]
+    return body
+
+def _render_table(ws, block, frame, layout, data, styles):
+    columns = block.get('columns', ())
+    letters = {column['key']: get_column_letter(col_idx)
+               for col_idx, column in enumerate(columns, 2) if 'key' in column}
+    if 'head' in block:
+        write_table_rows(ws, frame['row'], _data(data, block['head']), block['head_rows'])
+        for offset, first_col, last_col in _data(data, block['merges']):
+            ws.merge_cells(start_row=frame['row'] + offset, start_column=first_col,
+                           end_row=frame['row'] + offset, end_column=last_col)
+    elif block.get('header', True):
+        for col_idx, column in enumerate(columns, 2):
+            cell = ws.cell(row=frame['row'], column=col_idx, value=column['header'].format_map(data))
+            apply_style(cell, styles['header'])
+
+    source, _ = _table_source(block, data)
+    row_count = frame['last'] - frame['first'] + 1
+    if 'rows' in block:
+        write_table_rows(ws, frame['first'], _resolved_rows(source, frame['first'], layout, ws.title),
+                         row_count)
+    else:
+        # One style dict per column for the whole table (apply_style caches by dict)
+        body_styles = []
+        for column in columns:
+            style = dict(_style(styles, column['style'])) if 'style' in column else {}
+            if 'format' in column:
+                style['number_format'] = column['format']
+            body_styles.append(style or None)
+
+        def cell_formula(template, cells, prev, record=None):
+            return layout.resolve(template.format(**cells, prev=prev, record=record), ws.title)
+
+        def body_rows():
+            prev = {key: f'{letter}{frame["first"] - 1}' for key, letter in letters.items()}
+            records = source() if callable(source) else source
+            for n, (row, record) in enumerate(zip(range(frame['first'], frame['data_end'] + 1), records)):
+                cells = {key: f'{letter}{row}' for key, letter in letters.items()}
+                values = []
+                for column, style in zip(columns, body_styles):
+                    value = record[column['value']] if 'value' in column else None
+                    if value is not None and column.get('resolve'):
+                        value = layout.resolve(value, ws.title)
+                    elif value is None and 'formula' in column:
+                        template = column['first_formula'] if n == 0 and 'first_formula' in column else column['formula']
+                        value = cell_formula(template, cells, prev, record)
+                    values.append(None if value is None else (value, style) if style else value)
+                yield values
+                prev = cells
+            # Blank rows for more records: 'blank_formula', or 'formula' on formula-only columns
+            blank = styles['data']
+            for row in range(frame['data_end'] + 1, frame['last'] + 1):
+                cells = {key: f'{letter}{row}' for key, letter in letters.items()}
+                values = []
+                for column in columns:
+                    template = column.get('blank_formula', None if 'value' in column else column.get('formula'))
+                    values.append((cell_formula(template, cells, prev) if template else None, blank))
+                yield values
+                prev = cells
+
+        write_table_rows(ws, frame['first'], body_rows, row_count)
+
+    total_row = frame['total']
+    if total_row is None:
+        return
+    cell = ws[f'B{total_row}']
+    cell.value = block.get('total_label', "TOTAL")
+    label_style = block.get('total_label_style', 'total_label')
+    if label_style:
+        apply_style(cell, _style(styles, label_style))
+    value_style = block.get('total_style', 'total_value')
+    for col_idx, column in enumerate(columns, 2):
+        if 'total' not in column:
+            continue
+        letter = get_column_letter(col_idx)
+        cells = {key: f'{other}{total_row}' for key, other in letters.items()}
+        cell = ws[f'{letter}{total_row}']
+        cell.value = layout.resolve(column['total'][1].format(
+            range=f'{letter}{frame["first"]}:{letter}{frame["last"]}', **cells), ws.title)
+        if value_style:
+            apply_style(cell, _style(styles, value_style))
+        cell.number_format = column.get('format', 'General')
+
+def _render_grid(ws, block, frame, layout, styles):
+    header_row = frame['row']
+    width = frame['width']
+    ws.cell(row=header_row, column=2, value=block['corner'])
+    apply_style(ws.cell(row=header_row, column=2), styles['header'])
+    labels = block['columns'] if 'columns' in block else projection_month_labels(width)
+    for col_idx, label in enumerate(labels, 3):
+        apply_style(ws.cell(row=header_row, column=col_idx, value=label), styles['header'])
+
+    # A repeated row's name stands for its first row (or the next row when it has none)
+    rows = {name: first for name, (first, _) in frame['rows'].items()}
+    for name, label, formula, first_formula in block['rows']:
+        first, count = frame['rows'][name]
+        for n, row in enumerate(range(first, first + count), 1):
+            cell = ws.cell(row=row, column=2, value=layout.resolve(label.format(n=n), ws.title))
+            apply_style(cell, styles['label'])
+            for i in range(width):
+                template = first_formula if i == 0 and first_formula else formula
+                cell = ws.cell(row=row, column=3 + i, value=layout.resolve(template.format(
+                    i=i, month=i + 1, n=n, col=get_column_letter(3 + i), prev=get_column_letter(2 + i),
+                    **rows), ws.title))
+                cell.number_format = block['format']
+
+def _named_reference(ws, layout, name):
+    _, min_col, min_row, max_col, max_row = layout.names[name]
+    return Reference(ws, min_col=min_col, min_row=min_row, max_col=max_col, max_row=max_row)
+
+def _render_chart(ws, block, frame, layout, data):
+    if block.get('type') == 'pie':
+        chart = PieChart()
+        chart.title = block['title'].format_map(data)
+    else:
+        chart = LineChart()
+        chart.title = block['title'].format_map(data)
+        chart.style = 10
+        chart.y_axis.title = block['y_title']
+        chart.x_axis.title = block['x_title']
+    chart.width = block.get('width', 18)
+    chart.height = block.get('height', 10)
+
+    if 'table' in block:
+        # Columns of a table's records, titled by its header row if it has one
+        table = block['table']
+        _, _, first, _, last = layout.names[f'{table}.records']
+        titled = f'{table}.header' in layout.names
+        for key in block['columns']:
+            _, col, _, _, _ = layout.names[f'{table}.{key}']
+            chart.add_data(Reference(ws, min_col=col, min_row=first - titled, max_row=last),
+                           titles_from_data=titled)
+        _, col, _, _, _ = layout.names[f"{table}.{block['categories']}"]
+        chart.set_categories(Reference(ws, min_col=col, min_row=first, max_row=last))
+    else:
+        for series_title, name in block['series']:
+            chart.series.append(Series(_named_reference(ws, layout, name), title=series_title))
+        chart.set_categories(_named_reference(ws, layout, block['categories']))
+    for index in block.get('dashed', ()):
+        chart.series[index].graphicalProperties.line.dashStyle = "dash"
+
+    if 'anchor' in block:
+        anchor = block['anchor']
+    else:
+        anchor = f"{block.get('anchor_col', 'B')}{frame['row'] + block.get('offset', 2)}"
+    ws.add_chart(chart, anchor)
+
+def render_layout(wb, layout_name, data):
+    """Add the sheets of LAYOUTS[layout_name] to a workbook, filled in from data"""
+    spec = LAYOUTS[layout_name]
+    names, frames = compile_layout(layout_name, layout_table_sizes(spec, data))
+    layout = WorkbookLayout(names)
+    styles = get_styles()
+
+    for sheet, sheet_frames in zip(spec, frames):
+        section(sheet['sheet'])
+        ws = wb.create_sheet(sheet['sheet'])
+        if sheet.get('hidden'):
+            ws.sheet_state = 'hidden'
+        if 'title' in sheet:
+            add_branding_header(ws, sheet['title'].format_map(data), sheet.get('subtitle', ""))
+        elif 'heading' in sheet:
+            ws['B2'] = sheet['heading']
+            apply_style(ws['B2'], styles['title'])
+        for columns, width in sheet.get('widths', {}).items():
+            min_col, _, max_col, _ = range_boundaries(columns if ':' in columns else f'{columns}:{columns}')
+            for col_idx in range(min_col, max_col + 1):
+                ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+        for block, frame in zip(sheet['blocks'], sheet_frames):
+            if 'when' in block and not _data(data, block['when']):
+                continue
+            kind = block['kind']
+            row = frame['row']
+            if kind == 'section':
+                ws[f'B{row}'] = block['text'].format_map(data)
+                apply_style(ws[f'B{row}'], styles['section'])
+                if 'merge_to' in block:
+                    merge_to = block['merge_to']
+                    if isinstance(merge_to, tuple):
+                        merge_to = _lookup(data, merge_to)
+                    ws.merge_cells(f"B{row}:{merge_to}{row}")
+            elif kind == 'text':
+                for offset, line in enumerate(block['lines']):
+                    text, style = line if isinstance(line, tuple) else (line, block.get('style'))
+                    cell = ws[f'B{row + offset}']
+                    cell.value = text.format_map(data)
+                    if style:
+                        apply_style(cell, _style(styles, style))
+                    if 'merge_to' in block:
+                        ws.merge_cells(f"B{row + offset}:{block['merge_to']}{row + offset}")
+            elif kind == 'fields':
+                _render_fields(ws, block, frame, layout, data, styles)
+            elif kind == 'table':
+                _render_table(ws, block, frame, layout, data, styles)
+            elif kind == 'grid':
+                _render_grid(ws, block, frame, layout, styles)
+            elif kind == 'chart':
+                with span("charts"):
+                    _render_chart(ws, block, frame, layout, data)
+            if 'rules' in block:
+                with span("conditional formatting"):
+                    _render_rules(ws, layout, block['rules'])
+    return layout
 
 # ============================================================================
 # 1. CASH FLOW COMMAND CENTER
 # ============================================================================
-def create_cash_flow_command_center(output_path):
+CASH_FLOW_SAMPLE_DATA = {
+    # (source, type, frequency, amount)
+    'income_sources': [
+        ('Primary Salary', 'W-2', 'Bi-weekly', 3500),
+        ('Side Business', '1099', 'Monthly', 1200),
+        ('Dividends', 'Investment', 'Quarterly', 500),
+        ('Rental Income', 'Passive', 'Monthly', 1800),
+        ('Freelance', '1099', 'Variable', 800),
+    ],
+    # (expense, category, due day, amount)
+    'fixed_expenses': [
+        ('Rent/Mortgage', 'Housing', 1, 2200),
+        ('Car Payment', 'Transportation', 15, 450),
+        ('Car Insurance', 'Insurance', 5, 125),
+        ('Health Insurance', 'Insurance', 1, 350),
+        ('Phone', 'Utilities', 20, 85),
+        ('Internet', 'Utilities', 12, 75),
+        ('Streaming Services', 'Entertainment', 1, 45),
+        ('Gym Membership', 'Health', 1, 50),
+    ],
+    # (category, budget, actual)
+    'variable_expenses': [
+        ('Groceries', 600, 580),
+        ('Dining Out', 300, 420),
+        ('Gas/Transportation', 200, 175),
+        ('Shopping', 200, 310),
+        ('Entertainment', 150, 125),
+        ('Personal Care', 100, 95),
+        ('Gifts', 100, 150),
+        ('Miscellaneous', 200, 180),
+    ],
+    # (category, annual growth) -- categories that grow at their own rate
+    'category_growth': [
+        ('Housing', 0.04),
+        ('Insurance', 0.06),
+        ('Groceries', 0.03),
+    ],
+    # (expense, month of the projection, amount) -- one-off costs
+    'planned_expenses': [
+        ('Vacation', 7, 3500),
+        ('Car Maintenance', 10, 900),
+        ('Holiday Gifts', 12, 1200),
+    ],
+    'settings': {
+        'emergency_fund': 15000,
+        'target_savings_rate': 0.20,
+        'income_growth': 0.03,
+        'expense_growth': 0.025,
+        'projection_months': 24,
+    },
+    # Bank or card export (CSV or OFX); when set, its monthly averages replace
+    # the variable expense actuals and the income sources
+    'transactions': None,
+    # (description keyword, category) for money out, first match wins; None
+    # skips bills and transfers tracked elsewhere, the rest is Miscellaneous
+    'transaction_rules': [
+        ('WHOLE FOODS', 'Groceries'), ('TRADER JOE', 'Groceries'), ('SAFEWAY', 'Groceries'),
+        ('KROGER', 'Groceries'), ('COSTCO', 'Groceries'),
+        ('UBER EATS', 'Dining Out'), ('DOORDASH', 'Dining Out'), ('STARBUCKS', 'Dining Out'),
+        ('RESTAURANT', 'Dining Out'), ('CAFE', 'Dining Out'),
+        ('SHELL', 'Gas/Transportation'), ('CHEVRON', 'Gas/Transportation'), ('EXXON', 'Gas/Transportation'),
+        ('UBER', 'Gas/Transportation'), ('LYFT', 'Gas/Transportation'), ('PARKING', 'Gas/Transportation'),
+        ('AMAZON', 'Shopping'), ('TARGET', 'Shopping'), ('WALMART', 'Shopping'),
+        ('CINEMA', 'Entertainment'), ('TICKETMASTER', 'Entertainment'),
+        ('CVS', 'Personal Care'), ('WALGREENS', 'Personal Care'), ('SALON', 'Personal Care'),
+        ('ETSY', 'Gifts'),
+        ('MORTGAGE', None), ('RENT PAYMENT', None), ('INSURANCE', None), ('NETFLIX', None),
+        ('VERIZON', None), ('COMCAST', None), ('TRANSFER', None), ('PAYMENT THANK YOU', None),
+    ],
+    # (description keyword, income source) for money in; the rest is Other Income
+    'income_rules': [
+        ('PAYROLL', 'Primary Salary'), ('DIRECT DEP', 'Primary Salary'), ('DIVIDEND', 'Dividends'),
+        ('INTEREST', 'Interest'), ('TRANSFER', None), ('REFUND', None),
+    ],
+}
+
+PROJECTION_MONTH_RANGE = (12, 120)
+
+INCOME_ANNUAL_FORMULA = ('=IF({frequency}="Weekly",{amount}*52,IF({frequency}="Bi-weekly",{amount}*26,'
+                         'IF({frequency}="Monthly",{amount}*12,IF({frequency}="Quarterly",{amount}*4,{amount}))))')
+
+CASH_FLOW_LAYOUT = [
+    {'sheet': "Dashboard", 'title': "Cash Flow Command Center", 'subtitle': "Your Complete Financial Picture",
+     'widths': {'A:N': 15, 'B': 20},
+     'blocks': [
+        {'kind': 'section', 'text': "KEY METRICS", 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'kpi', 'label_style': 'label', 'value_style': 'kpi_value',
+         'items': [
+            ('monthly_income', "Monthly Income", "=[income.monthly_total]", '"$"#,##0.00'),
+            ('monthly_expenses', "Monthly Expenses", "=[fixed.total]+[variable.actual_total]", '"$"#,##0.00'),
+            ('net_cash_flow', "Net Cash Flow", "=[kpi.monthly_income]-[kpi.monthly_expenses]", '"$"#,##0.00'),
+            ('savings_rate', "Savings Rate",
+             "=IF([kpi.monthly_income]>0,[kpi.net_cash_flow]/[kpi.monthly_income],0)", '0.0%'),
+            ('runway', "Emergency Runway",
+             "=IF([kpi.monthly_expenses]>0,[settings.emergency_fund]/[kpi.monthly_expenses],0)", '0.0 "months"'),
+         ],
+         'rules': [('formula', 'kpi.net_cash_flow', '{cell}>=0', ACCENT_GREEN),
+                   ('formula', 'kpi.net_cash_flow', '{cell}<0', ACCENT_RED)]},
+        {'kind': 'gap', 'rows': 3},
+        {'kind': 'section', 'text': "CASH FLOW PROJECTION", 'merge_to': 'N'},
+        {'kind': 'grid', 'name': 'projection', 'corner': "Category", 'format': '"$"#,##0',
+         'months': ('settings', 'projection_months'),
+         # (name, label, formula, formula for the first month if different);
+         # growth rates are annual, compounded monthly
+         'rows': [
+            ('income', "Projected Income", "=[$kpi.monthly_income]*(1+[$settings.income_growth])^({i}/12)", None),
+            ('categories', "=[$growth.category#{n}]", "=[$growth.monthly#{n}]*(1+[$growth.rate#{n}])^({i}/12)", None),
+            ('other', "Other Expenses",
+             "=([$kpi.monthly_expenses]-[$growth.monthly_total])*(1+[$settings.expense_growth])^({i}/12)", None),
+            ('planned', "Planned Expenses", "=SUMIF([$planned.month],{month},[$planned.amount])", None),
+            ('expenses', "Projected Expenses", "=SUM({col}{categories}:{col}{planned})", None),
+            ('net', "Net Cash Flow", "={col}{income}-{col}{expenses}", None),
+            ('balance', "Cumulative Balance", "={prev}{balance}+{col}{net}", "=[$settings.emergency_fund]+{col}{net}"),
+         ],
+         # One 'categories' row per category_growth record
+         'repeat': {'categories': 'category_growth'}},
+        {'kind': 'chart', 'title': "Cash Flow Projection", 'y_title': "Amount ($)", 'x_title': "Month",
+         'series': [("Net Cash Flow", 'projection.net'), ("Cumulative Balance", 'projection.balance')],
+         'categories': 'projection.header'},
+     ]},
+    {'sheet': "Income", 'title': "Income Tracking", 'subtitle': "All Revenue Sources",
+     'widths': {'A:I': 15, 'B': 25},
+     'blocks': [
+        {'kind': 'table', 'name': 'income', 'data': 'income_sources', 'blank_rows': 5,
+         'columns': [
+            {'key': 'source', 'header': "Source", 'value': 0, 'style': 'label'},
+            {'key': 'type', 'header': "Type", 'value': 1},
+            {'key': 'frequency', 'header': "Frequency", 'value': 2},
+            {'key': 'amount', 'header': "Amount", 'value': 3, 'format': '"$"#,##0.00'},
+            {'key': 'annual', 'header': "Annual Total", 'formula': INCOME_ANNUAL_FORMULA,
+             'format': '"$"#,##0.00', 'total': ('annual_total', '=SUM({range})')},
+            {'key': 'monthly', 'header': "Monthly Equiv.", 'formula': '={annual}/12',
+             'format': '"$"#,##0.00', 'total': ('monthly_total', '=SUM({range})')},
+            {'key': 'notes', 'header': "Notes"},
+         ]},
+     ]},
+    {'sheet': "Fixed Expenses", 'title': "Fixed Expenses", 'subtitle': "Recurring Monthly Bills",
+     'widths': {'A:G': 15, 'B': 25},
+     'blocks': [
+        {'kind': 'table', 'name': 'fixed', 'data': 'fixed_expenses', 'blank_rows': 5,
+         'columns': [
+            {'key': 'expense', 'header': "Expense", 'value': 0, 'style': 'label'},
+            {'key': 'category', 'header': "Category", 'value': 1},
+            {'key': 'due', 'header': "Due Date", 'value': 2},
+            {'key': 'amount', 'header': "Amount", 'value': 3, 'format': '"$"#,##0.00',
+             'total': ('total', '=SUM({range})')},
+            {'key': 'annual', 'header': "Annual Total", 'formula': '={amount}*12', 'format': '"$"#,##0.00'},
+         ]},
+     ]},
+    {'sheet': "Variable Expenses", 'title': "Variable Expenses", 'subtitle': "Discretionary Spending",
+     'widths': {'A:G': 15, 'B': 25},
+     'blocks': [
+        {'kind': 'table', 'name': 'variable', 'data': 'variable_expenses', 'blank_rows': 5,
+         'columns': [
+            {'key': 'category', 'header': "Category", 'value': 0, 'style': 'label'},
+            {'key': 'budget', 'header': "Budget", 'value': 1, 'format': '"$"#,##0.00',
+             'total': ('budget_total', '=SUM({range})')},
+            {'key': 'actual', 'header': "Actual", 'value': 2, 'format': '"$"#,##0.00',
+             'total': ('actual_total', '=SUM({range})')},
+            {'key': 'variance', 'header': "Variance", 'formula': '={budget}-{actual}', 'format': '"$"#,##0.00',
+             'total': ('variance_total', '={budget}-{actual}')},
+            {'key': 'used', 'header': "% of Budget", 'formula': '=IF({budget}>0,{actual}/{budget},0)', 'format': '0%'},
+         ],
+         'rules': [('formula', 'variable.variance', '{cell}>=0', "C6EFCE"),
+                   ('formula', 'variable.variance', '{cell}<0', "FFC7CE"),
+                   ('databar', 'variable.used', 0, 1.5, HONEY)]},
+     ]},
+    {'sheet': "Settings", 'heading': "Settings & Assumptions", 'start_row': 5,
+     'widths': {'A': 5, 'B': 30, 'C': 20, 'D': 18},
+     'blocks': [
+        {'kind': 'fields', 'name': 'settings', 'label_col': 'A', 'value_col': 'B',
+         'items': [
+            ('emergency_fund', "Emergency Fund Balance", ('settings', 'emergency_fund'), '"$"#,##0.00'),
+            ('target_savings_rate', "Target Savings Rate", ('settings', 'target_savings_rate'), '0%'),
+            ('income_growth', "Expected Income Growth", ('settings', 'income_growth'), '0.0%'),
+            ('expense_growth', "Expected Expense Growth", ('settings', 'expense_growth'), '0.0%'),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "CATEGORY GROWTH", 'merge_to': 'D'},
+        {'kind': 'table', 'name': 'growth', 'data': 'category_growth',
+         'columns': [
+            {'key': 'category', 'header': "Category", 'value': 0, 'style': 'label'},
+            {'key': 'rate', 'header': "Annual Growth", 'value': 1, 'format': '0.0%'},
+            {'key': 'monthly', 'header': "Monthly Amount",
+             'formula': '=SUMIF([$fixed.category],{category},[$fixed.amount])'
+                        '+SUMIF([$variable.category],{category},[$variable.actual])',
+             'format': '"$"#,##0.00', 'total': ('monthly_total', '=SUM({range})')},
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "PLANNED EXPENSES", 'merge_to': 'D'},
+        {'kind': 'table', 'name': 'planned', 'data': 'planned_expenses', 'blank_rows': 5,
+         'columns': [
+            {'key': 'expense', 'header': "Expense", 'value': 0, 'style': 'label'},
+            {'key': 'month', 'header': "Month", 'value': 1},
+            {'key': 'amount', 'header': "Amount", 'value': 2, 'format': '"$"#,##0.00',
+             'total': ('total', '=SUM({range})')},
+         ]},
+     ]},
+]
+
+# Annual multiplier for each income frequency, as in INCOME_ANNUAL_FORMULA
+INCOME_PERIODS_PER_YEAR = {'weekly': 52, 'bi-weekly': 26, 'monthly': 12, 'quarterly': 4}
+
+def cash_flow_profile_columns(profiles):
+    """One NumPy array per projection input across a list of cash flow profiles
+    (each overlaid on the sample data).
+
+    Category growth rows become [profile, category] arrays padded with zeros;
+    planned expenses become flat planned_profile/planned_month/planned_amount arrays.
+    """
+    profiles = [apply_transactions(merge_profile(CASH_FLOW_SAMPLE_DATA, profile)) for profile in profiles]
+    count = len(profiles)
+    width = max((len(profile['category_growth']) for profile in profiles), default=0)
+    columns = {name: np.zeros(count) for name in
+               ('income', 'expenses', 'emergency_fund', 'income_growth', 'expense_growth')}
+    columns['months'] = np.zeros(count, dtype=int)
+    columns['category_amount'] = np.zeros((count, width))
+    columns['category_rate'] = np.zeros((count, width))
+    planned = []
+    for i, profile in enumerate(profiles):
+        settings = profile['settings']
+        columns['income'][i] = sum(float(amount) * INCOME_PERIODS_PER_YEAR.get(f"{frequency}".lower(), 1)
+                                   for _, _, frequency, amount in profile['income_sources']) / 12
+        # Monthly spending by category, matched the way SUMIF does (ignoring case)
+        spending = {}
+        for category, amount in ([(row[1], row[3]) for row in profile['fixed_expenses']]
+                                 + [(row[0], row[2]) for row in profile['variable_expenses']]):
+            key = f"{category}".lower()
+            spending[key] = spending.get(key, 0.0) + float(amount)
+        columns['expenses'][i] = sum(spending.values())
+        for k, (category, rate) in enumerate(profile['category_growth']):
+            columns['category_amount'][i, k] = spending.get(f"{category}".lower(), 0.0)
+            columns['category_rate'][i, k] = float(rate)
+        planned.extend((i, float(month), float(amount)) for _, month, amount in profile['planned_expenses'])
+        columns['emergency_fund'][i] = float(settings['emergency_fund'])
+        columns['income_growth'][i] = float(settings['income_growth'])
+        columns['expense_growth'][i] = float(settings['expense_growth'])
+        columns['months'][i] = _projection_months(settings['projection_months'], 'settings.projection_months')
+    planned = np.array(planned).reshape(-1, 3)
+    columns['planned_profile'] = planned[:, 0].astype(int)
+    columns['planned_month'] = planned[:, 1]
+    columns['planned_amount'] = planned[:, 2]
+    return columns
+
+def project_cash_flows(columns):
+    """Month-by-month income, expenses, net cash flow and balance as [profile, month] arrays.
+
+    Mirrors the Dashboard projection grid. Columns run to the longest horizon;
+    months past a profile's own horizon are NaN. Memory is a few
+    profiles x months float arrays, so split very large batches.
+    """
+    months = columns['months']
+    horizon = int(months.max(initial=0))
+    years = np.arange(horizon) / 12
+
+    income = columns['income'][:, None] * (1 + columns['income_growth'][:, None]) ** years
+    amounts, rates = columns['category_amount'], columns['category_rate']
+    expenses = ((columns['expenses'] - amounts.sum(axis=1))[:, None]
+                * (1 + columns['expense_growth'][:, None]) ** years)
+    for k in range(amounts.shape[1]):
+        expenses += amounts[:, k, None] * (1 + rates[:, k, None]) ** years
+
+    # One-off costs land in their month; like SUMIF, only whole months match
+    month = columns['planned_month']
+    due = (month == np.floor(month)) & (month >= 1) & (month <= horizon)
+    np.add.at(expenses, (columns['planned_profile'][due], month[due].astype(int) - 1),
+              columns['planned_amount'][due])
+
+    net = income - expenses
+    balance = columns['emergency_fund'][:, None] + np.cumsum(net, axis=1)
+    past = np.arange(horizon) >= months[:, None]
+    projection = {'income': income, 'expenses': expenses, 'net': net, 'balance': balance}
+    for values in projection.values():
+        values[past] = np.nan
+    return projection
+
+TRANSACTION_CHUNK_SIZE = 1 << 20  # characters read at a time from OFX exports
+UNCATEGORIZED_EXPENSE = 'Miscellaneous'
+UNCATEGORIZED_INCOME = 'Other Income'
+TRANSACTION_CACHE_SIZE = 65536  # descriptions remembered; exports repeat the same merchants
+
+_OFX_TRANSACTION_RE = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.DOTALL | re.IGNORECASE)
+_OFX_FIELD_RE = re.compile(r'<(DTPOSTED|TRNAMT|NAME|MEMO)>([^<\r\n]*)', re.IGNORECASE)
+
+def _transaction_month(text):
+    """(year, month) of a date written YYYY-MM-DD, YYYYMMDD (as in OFX) or MM/DD/YYYY"""
+    text = text.strip()
+    if '/' in text:
+        month, _, year = text.split('/')
+        year = int(year[:4])
+        month_key = (year + 2000 if year < 100 else year, int(month))
+    elif text[4:5] == '-':
+        month_key = (int(text[:4]), int(text[5:7]))
+    else:
+        month_key = (int(text[:4]), int(text[4:6]))
+    if not 1 <= month_key[1] <= 12:
+        raise ValueError(f"bad month in {text!r}")
+    return month_key
+
+def _csv_transactions(path):
+    """(month, description, amount) for every row of a date, description, amount CSV"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        try:
+            columns = [header.index(name) for name in ('date', 'description', 'amount')]
+        except ValueError:
+            raise ValueError(f"{path}: expected date, description and amount columns") from None
+        date_col, description_col, amount_col = columns
+        months = {}  # one entry per distinct date, so a few thousand at most
+        for line_no, fields in enumerate(reader, 2):
+            if not fields:
+                continue
+            try:
+                text = fields[date_col]
+                month = months.get(text)
+                if month is None:
+                    month = months[text] = _transaction_month(text)
+                yield month, fields[description_col], _parse_amount(fields[amount_col])
+            except (IndexError, ValueError):
+                raise ValueError(f"{path}:{line_no}: bad transaction {fields!r}") from None
+
+def _ofx_transactions(path):
+    """(month, description, amount) for every <STMTTRN> of an OFX or QFX export, read in chunks"""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        pending = ''
+        while True:
+            chunk = f.read(TRANSACTION_CHUNK_SIZE)
+            pending += chunk
+            end = 0
+            for match in _OFX_TRANSACTION_RE.finditer(pending):
+                fields = {tag.upper(): value.strip() for tag, value in _OFX_FIELD_RE.findall(match[1])}
+                try:
+                    yield (_transaction_month(fields['DTPOSTED']), fields.get('NAME') or fields.get('MEMO', ''),
+                           _parse_amount(fields['TRNAMT']))
+                except (KeyError, ValueError):
+                    raise ValueError(f"{path}: bad transaction {match[0][:200]!r}") from None
+                end = match.end()
+            # Keep only an unfinished transaction for the next chunk
+            pending = pending[end:]
+            if not chunk:
+                return
+            start = pending.upper().rfind('<STMTTRN>')
+            pending = pending[start:] if start >= 0 else pending[-len('<STMTTRN>'):]
+
+def read_transactions(path):
+    """Stream (month, description, amount) from a CSV or OFX/QFX transaction export"""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        head = f.read(512).lstrip().upper()
+    if head.startswith(('OFXHEADER', '<?XML', '<OFX')):
+        return _ofx_transactions(path)
+    return _csv_transactions(path)
+
+@lru_cache(maxsize=16)
+def _keyword_rules(rules):
+    """(case-insensitive pattern, name) per (keyword, name) rule, in rule order"""
+    return [(re.compile(re.escape(keyword), re.IGNORECASE), name) for keyword, name in rules]
+
+def categorize_transactions(transactions, rules, income_rules):
+    """Monthly totals per expense category and per income source, in one pass.
+
+    Memory grows with categories x months, never with the number of rows.
+    Returns ({(category, month): spent}, {(source, month): received}, months seen).
+    """
+    # Profiles loaded from JSON give lists; the compiled rules are cached by tuple
+    expense_matchers = _keyword_rules(tuple(map(tuple, rules)))
+    income_matchers = _keyword_rules(tuple(map(tuple, income_rules)))
+    spent, received, months = {}, {}, set()
+    categories = {}  # (description, money out) -> category, bounded by TRANSACTION_CACHE_SIZE
+    for month, description, amount in transactions:
+        months.add(month)
+        out = amount < 0
+        try:
+            name = categories[description, out]
+        except KeyError:
+            # Rules apply in list order; the first one that matches names it
+            name = UNCATEGORIZED_EXPENSE if out else UNCATEGORIZED_INCOME
+            for pattern, rule_name in (expense_matchers if out else income_matchers):
+                if pattern.search(description):
+                    name = rule_name
+                    break
+            if len(categories) >= TRANSACTION_CACHE_SIZE:
+                categories.clear()
+            categories[description, out] = name
+        if name is not None:
+            totals = spent if out else received
+            key = (name, month)
+            totals[key] = totals.get(key, 0.0) + abs(amount)
+    return spent, received, months
+
+def apply_transactions(data):
+    """A cash flow profile with its transaction export folded in, if it has one.
+
+    Actuals become the average month in the export. Budgeted categories keep
+    their budget and order; categories found only in the export follow with
+    no budget, largest first. Income sources are replaced by what came in.
+    """
+    if not data['transactions']:
+        return data
+    path = os.path.expanduser(data['transactions'])
+    spent, received, months = categorize_transactions(read_transactions(path), data['transaction_rules'],
+                                                      data['income_rules'])
+
+    def monthly(totals):
+        averages = {}
+        for (name, _), total in totals.items():
+            averages[name] = averages.get(name, 0.0) + total
+        return {name: round(total / len(months), 2) for name, total in averages.items()}
+
+    actuals, income = monthly(spent), monthly(received)
+    variable = [(category, budget, actuals.pop(category, 0))
+                for category, budget, _ in data['variable_expenses']]
+    variable += [(category, 0, actual) for category, actual in
+                 sorted(actuals.items(), key=lambda item: (-item[1], item[0]))]
+    income_sources = [(source, 'Imported', 'Monthly', amount) for source, amount in
+                      sorted(income.items(), key=lambda item: (-item[1], item[0]))]
+    return {**data, 'variable_expenses': variable, 'income_sources': income_sources}
+
+def create_cash_flow_command_center(output_path, data=None):
     """Create comprehensive cash flow tracking with projections"""
+    data = apply_transactions(merge_profile(CASH_FLOW_SAMPLE_DATA, data))
     wb = Workbook()
-    styles = get_styles()
     
     # Instructions
     instructions = {
@@ -210,7 +2278,7 @@ def create_cash_flow_command_center(output_path):
         ],
         "💡 Pro Tips": [
             "Update weekly for best results - 15 minutes every Sunday",
-            "Use the 12-month projection to plan for large purchases",
+            "Add large one-off purchases under Planned Expenses in 'Settings' to see them in the projection",
             "Set up alerts when cash flow drops below your emergency threshold",
             "Review the trends chart monthly to spot spending creep"
         ],
@@ -221,330 +2289,663 @@ def create_cash_flow_command_center(output_path):
         ]
     }
     create_instructions_sheet(wb, "Cash Flow Command Center", instructions)
+    render_layout(wb, 'cash_flow', data)
     
-    # Dashboard Sheet
-    ws = wb.create_sheet("Dashboard")
-    start_row = add_branding_header(ws, "Cash Flow Command Center", "Your Complete Financial Picture")
-    
-    # Set column widths
-    for col in range(1, 15):
-        ws.column_dimensions[get_column_letter(col)].width = 15
-    ws.column_dimensions['B'].width = 20
-    
-    # KPI Section
-    row = start_row
-    ws[f'B{row}'] = "KEY METRICS"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    # KPI Cards
-    kpis = [
-        ("Monthly Income", "=Income!H15", "currency"),
-        ("Monthly Expenses", "='Fixed Expenses'!E20+'Variable Expenses'!E25", "currency"),
-        ("Net Cash Flow", "=B9-B10", "currency"),
-        ("Savings Rate", "=IF(B9>0,B11/B9,0)", "percent"),
-        ("Emergency Runway", "=IF(B10>0,Settings!B5/B10,0)", "months")
-    ]
-    
-    for i, (label, formula, fmt) in enumerate(kpis):
-        ws[f'B{row}'] = label
-        apply_style(ws[f'B{row}'], styles['label'])
-        ws[f'C{row}'] = formula
-        if fmt == "currency":
-            ws[f'C{row}'].number_format = '"$"#,##0.00'
-        elif fmt == "percent":
-            ws[f'C{row}'].number_format = '0.0%'
-        else:
-            ws[f'C{row}'].number_format = '0.0 "months"'
-        ws[f'C{row}'].font = Font(name='Calibri', size=14, bold=True, color=DARK_TEXT)
-        row += 1
-    
-    # Add conditional formatting for net cash flow
-    ws.conditional_formatting.add('C11',
-        FormulaRule(formula=['C11>=0'], fill=PatternFill(bgColor=ACCENT_GREEN)))
-    ws.conditional_formatting.add('C11',
-        FormulaRule(formula=['C11<0'], fill=PatternFill(bgColor=ACCENT_RED)))
+    # Remove default sheet
+    if "Sheet" in wb.sheetnames:
+        del wb["Sheet"]
     
-    # 12-Month Projection Section
-    row += 3
-    ws[f'B{row}'] = "12-MONTH CASH FLOW PROJECTION"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:N{row}')
-    row += 2
-    
-    # Month headers
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    ws[f'B{row}'] = "Category"
-    apply_style(ws[f'B{row}'], styles['header'])
-    for i, month in enumerate(months):
-        col = get_column_letter(3 + i)
-        ws[f'{col}{row}'] = month
-        apply_style(ws[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    # Projection rows
-    proj_categories = ['Projected Income', 'Projected Expenses', 'Net Cash Flow', 'Cumulative Balance']
-    for cat in proj_categories:
-        ws[f'B{row}'] = cat
-        apply_style(ws[f'B{row}'], styles['label'])
-        for i in range(12):
-            col = get_column_letter(3 + i)
-            if cat == 'Projected Income':
-                ws[f'{col}{row}'] = '=$C$9*(1+Settings!$B$7)^' + str(i)
-            elif cat == 'Projected Expenses':
-                ws[f'{col}{row}'] = '=$C$10*(1+Settings!$B$8)^' + str(i)
-            elif cat == 'Net Cash Flow':
-                ws[f'{col}{row}'] = f'={col}{row-2}-{col}{row-1}'
-            else:  # Cumulative
-                if i == 0:
-                    ws[f'{col}{row}'] = f'=Settings!$B$5+{col}{row-1}'
-                else:
-                    prev_col = get_column_letter(2 + i)
-                    ws[f'{col}{row}'] = f'={prev_col}{row}+{col}{row-1}'
-            ws[f'{col}{row}'].number_format = '"$"#,##0'
-        row += 1
-    
-    # Add cash flow chart
-    chart = LineChart()
-    chart.title = "12-Month Cash Flow Projection"
-    chart.style = 10
-    chart.y_axis.title = "Amount ($)"
-    chart.x_axis.title = "Month"
-    chart.width = 18
-    chart.height = 10
-    
-    # Data references for chart
-    data = Reference(ws, min_col=3, min_row=row-2, max_col=14, max_row=row-1)
-    cats = Reference(ws, min_col=3, min_row=row-5, max_col=14)
-    chart.add_data(data, titles_from_data=False)
-    chart.set_categories(cats)
-    chart.series[0].name = "Net Cash Flow"
-    chart.series[1].name = "Cumulative Balance"
-    
-    ws.add_chart(chart, f'B{row + 2}')
-    
-    # Income Sheet
-    ws_income = wb.create_sheet("Income")
-    start_row = add_branding_header(ws_income, "Income Tracking", "All Revenue Sources")
-    
-    for col in range(1, 10):
-        ws_income.column_dimensions[get_column_letter(col)].width = 15
-    ws_income.column_dimensions['B'].width = 25
-    
-    row = start_row
-    headers = ['Source', 'Type', 'Frequency', 'Amount', 'Annual Total', 'Monthly Equiv.', 'Notes']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_income[f'{col}{row}'] = h
-        apply_style(ws_income[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    # Sample income rows
-    income_sources = [
-        ('Primary Salary', 'W-2', 'Bi-weekly', 3500),
-        ('Side Business', '1099', 'Monthly', 1200),
-        ('Dividends', 'Investment', 'Quarterly', 500),
-        ('Rental Income', 'Passive', 'Monthly', 1800),
-        ('Freelance', '1099', 'Variable', 800),
-    ]
-    
-    for source, type_, freq, amount in income_sources:
-        ws_income[f'B{row}'] = source
-        ws_income[f'C{row}'] = type_
-        ws_income[f'D{row}'] = freq
-        ws_income[f'E{row}'] = amount
-        ws_income[f'E{row}'].number_format = '"$"#,##0.00'
-        # Annual calculation based on frequency
-        ws_income[f'F{row}'] = f'=IF(D{row}="Weekly",E{row}*52,IF(D{row}="Bi-weekly",E{row}*26,IF(D{row}="Monthly",E{row}*12,IF(D{row}="Quarterly",E{row}*4,E{row}))))'
-        ws_income[f'F{row}'].number_format = '"$"#,##0.00'
-        ws_income[f'G{row}'] = f'=F{row}/12'
-        ws_income[f'G{row}'].number_format = '"$"#,##0.00'
-        apply_style(ws_income[f'B{row}'], styles['label'])
-        row += 1
-    
-    # Add more empty rows for user input
-    for _ in range(5):
-        for i in range(7):
-            col = get_column_letter(2 + i)
-            apply_style(ws_income[f'{col}{row}'], styles['data'])
-        ws_income[f'F{row}'] = f'=IF(D{row}="Weekly",E{row}*52,IF(D{row}="Bi-weekly",E{row}*26,IF(D{row}="Monthly",E{row}*12,IF(D{row}="Quarterly",E{row}*4,E{row}))))'
-        ws_income[f'G{row}'] = f'=F{row}/12'
-        row += 1
-    
-    # Totals
-    row += 1
-    ws_income[f'B{row}'] = "TOTAL"
-    ws_income[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws_income[f'F{row}'] = f'=SUM(F{start_row+1}:F{row-2})'
-    ws_income[f'F{row}'].number_format = '"$"#,##0.00'
-    ws_income[f'F{row}'].font = Font(bold=True, size=12)
-    ws_income[f'G{row}'] = f'=SUM(G{start_row+1}:G{row-2})'
-    ws_income[f'G{row}'].number_format = '"$"#,##0.00'
-    ws_income[f'G{row}'].font = Font(bold=True, size=12)
-    ws_income['H15'] = f'=G{row}'  # Reference for dashboard
-    
-    # Fixed Expenses Sheet
-    ws_fixed = wb.create_sheet("Fixed Expenses")
-    start_row = add_branding_header(ws_fixed, "Fixed Expenses", "Recurring Monthly Bills")
-    
-    for col in range(1, 8):
-        ws_fixed.column_dimensions[get_column_letter(col)].width = 15
-    ws_fixed.column_dimensions['B'].width = 25
-    
-    row = start_row
-    headers = ['Expense', 'Category', 'Due Date', 'Amount', 'Annual Total']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_fixed[f'{col}{row}'] = h
-        apply_style(ws_fixed[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    fixed_expenses = [
-        ('Rent/Mortgage', 'Housing', 1, 2200),
-        ('Car Payment', 'Transportation', 15, 450),
-        ('Car Insurance', 'Insurance', 5, 125),
-        ('Health Insurance', 'Insurance', 1, 350),
-        ('Phone', 'Utilities', 20, 85),
-        ('Internet', 'Utilities', 12, 75),
-        ('Streaming Services', 'Entertainment', 1, 45),
-        ('Gym Membership', 'Health', 1, 50),
-    ]
-    
-    for expense, category, due, amount in fixed_expenses:
-        ws_fixed[f'B{row}'] = expense
-        ws_fixed[f'C{row}'] = category
-        ws_fixed[f'D{row}'] = due
-        ws_fixed[f'E{row}'] = amount
-        ws_fixed[f'E{row}'].number_format = '"$"#,##0.00'
-        ws_fixed[f'F{row}'] = f'=E{row}*12'
-        ws_fixed[f'F{row}'].number_format = '"$"#,##0.00'
-        apply_style(ws_fixed[f'B{row}'], styles['label'])
-        row += 1
-    
-    for _ in range(5):
-        for i in range(5):
-            col = get_column_letter(2 + i)
-            apply_style(ws_fixed[f'{col}{row}'], styles['data'])
-        ws_fixed[f'F{row}'] = f'=E{row}*12'
-        row += 1
-    
-    row += 1
-    ws_fixed[f'B{row}'] = "TOTAL"
-    ws_fixed[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws_fixed[f'E{row}'] = f'=SUM(E{start_row+1}:E{row-2})'
-    ws_fixed[f'E{row}'].number_format = '"$"#,##0.00'
-    ws_fixed[f'E{row}'].font = Font(bold=True, size=12)
-    ws_fixed['E20'] = f'=E{row}'  # Reference for dashboard
-    
-    # Variable Expenses Sheet
-    ws_var = wb.create_sheet("Variable Expenses")
-    start_row = add_branding_header(ws_var, "Variable Expenses", "Discretionary Spending")
-    
-    for col in range(1, 8):
-        ws_var.column_dimensions[get_column_letter(col)].width = 15
-    ws_var.column_dimensions['B'].width = 25
-    
-    row = start_row
-    headers = ['Category', 'Budget', 'Actual', 'Variance', '% of Budget']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_var[f'{col}{row}'] = h
-        apply_style(ws_var[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    var_categories = [
-        ('Groceries', 600, 580),
-        ('Dining Out', 300, 420),
-        ('Gas/Transportation', 200, 175),
-        ('Shopping', 200, 310),
-        ('Entertainment', 150, 125),
-        ('Personal Care', 100, 95),
-        ('Gifts', 100, 150),
-        ('Miscellaneous', 200, 180),
-    ]
-    
-    for category, budget, actual in var_categories:
-        ws_var[f'B{row}'] = category
-        ws_var[f'C{row}'] = budget
-        ws_var[f'C{row}'].number_format = '"$"#,##0.00'
-        ws_var[f'D{row}'] = actual
-        ws_var[f'D{row}'].number_format = '"$"#,##0.00'
-        ws_var[f'E{row}'] = f'=C{row}-D{row}'
-        ws_var[f'E{row}'].number_format = '"$"#,##0.00'
-        ws_var[f'F{row}'] = f'=IF(C{row}>0,D{row}/C{row},0)'
-        ws_var[f'F{row}'].number_format = '0%'
-        apply_style(ws_var[f'B{row}'], styles['label'])
-        row += 1
-    
-    # Add conditional formatting for variance
-    ws_var.conditional_formatting.add(f'E{start_row+1}:E{row-1}',
-        FormulaRule(formula=[f'E{start_row+1}>=0'], fill=PatternFill(bgColor="C6EFCE")))
-    ws_var.conditional_formatting.add(f'E{start_row+1}:E{row-1}',
-        FormulaRule(formula=[f'E{start_row+1}<0'], fill=PatternFill(bgColor="FFC7CE")))
-    
-    # Data bars for % of budget
-    ws_var.conditional_formatting.add(f'F{start_row+1}:F{row-1}',
-        DataBarRule(start_type='num', start_value=0, end_type='num', end_value=1.5,
-                   color=HONEY))
-    
-    for _ in range(5):
-        for i in range(5):
-            col = get_column_letter(2 + i)
-            apply_style(ws_var[f'{col}{row}'], styles['data'])
-        ws_var[f'E{row}'] = f'=C{row}-D{row}'
-        ws_var[f'F{row}'] = f'=IF(C{row}>0,D{row}/C{row},0)'
-        row += 1
-    
-    row += 1
-    ws_var[f'B{row}'] = "TOTAL"
-    ws_var[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws_var[f'C{row}'] = f'=SUM(C{start_row+1}:C{row-2})'
-    ws_var[f'C{row}'].number_format = '"$"#,##0.00'
-    ws_var[f'D{row}'] = f'=SUM(D{start_row+1}:D{row-2})'
-    ws_var[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_var[f'E{row}'] = f'=C{row}-D{row}'
-    ws_var[f'E{row}'].number_format = '"$"#,##0.00'
-    ws_var['E25'] = f'=D{row}'  # Reference for dashboard
-    
-    # Settings Sheet
-    ws_settings = wb.create_sheet("Settings")
-    ws_settings.column_dimensions['A'].width = 5
-    ws_settings.column_dimensions['B'].width = 30
-    ws_settings.column_dimensions['C'].width = 20
-    
-    ws_settings['B2'] = "Settings & Assumptions"
-    apply_style(ws_settings['B2'], styles['title'])
-    
-    settings = [
-        ('Emergency Fund Balance', 15000, '"$"#,##0.00'),
-        ('Target Savings Rate', 0.20, '0%'),
-        ('Expected Income Growth', 0.03, '0.0%'),
-        ('Expected Expense Growth', 0.025, '0.0%'),
-    ]
-    
-    row = 5
-    for setting, value, fmt in settings:
-        ws_settings[f'A{row}'] = setting
-        ws_settings[f'B{row}'] = value
-        ws_settings[f'B{row}'].number_format = fmt
-        row += 1
-    
-    # Remove default sheet
-    if "Sheet" in wb.sheetnames:
-        del wb["Sheet"]
-    
-    wb.save(output_path)
+    save_workbook(wb, output_path)
     print(f"✅ Created: {output_path}")
 
 
 # ============================================================================
 # 2. TAX PLANNING COMMAND CENTER
 # ============================================================================
-def create_tax_planning_command_center(output_path):
+TAX_PLANNING_SAMPLE_DATA = {
+    'filing_status': 'Single',
+    'tax_year': 2024,
+    'state': 'NC',  # any of STATE_TAX_BRACKETS
+    'income': {
+        'w2_wages': 85000,
+        'self_employment': 25000,
+        'interest': 500,
+        'dividends': 1200,
+        'qualified_dividends': 1000,  # the part of dividends taxed at capital gain rates
+        'long_term_gains': 3000,
+        'short_term_gains': 1500,
+        'other': 0,
+    },
+    'adjustments': {
+        'traditional_ira': 6500,
+        'hsa': 3850,
+        'student_loan_interest': 2500,
+        'educator_expenses': 300,
+    },
+    'salt': {
+        'state_income_tax': 4500,
+        'property_tax': 5200,
+        'personal_property_tax': 300,
+    },
+    'mortgage_interest': 8500,
+    'withholding': 12000,
+    'retirement_contributions': {
+        '401k': 15000,
+        'traditional_ira': 6500,
+        'hsa': 3850,
+        'sep_ira': 5000,
+    },
+}
+
+# Federal tax tables, written to the hidden 'Tax Tables' sheet. Formulas look
+# them up by the Tax Year and Filing Status cells, so members can switch either.
+FILING_STATUSES = ('Single', 'Married Filing Jointly', 'Married Filing Separately', 'Head of Household')
+TAX_BRACKET_RATES = (0.10, 0.12, 0.22, 0.24, 0.32, 0.35, 0.37)
+# Taxable income where each rate after 10% starts
+TAX_BRACKET_THRESHOLDS = {
+    2024: {
+        'Single': (11600, 47150, 100525, 191950, 243725, 609350),
+        'Married Filing Jointly': (23200, 94300, 201050, 383900, 487450, 731200),
+        'Married Filing Separately': (11600, 47150, 100525, 191950, 243725, 365600),
+        'Head of Household': (16550, 63100, 100500, 191950, 243700, 609350),
+    },
+    2025: {
+        'Single': (11925, 48475, 103350, 197300, 250525, 626350),
+        'Married Filing Jointly': (23850, 96950, 206700, 394600, 501050, 751600),
+        'Married Filing Separately': (11925, 48475, 103350, 197300, 250525, 375800),
+        'Head of Household': (17000, 64850, 103350, 197300, 250500, 626350),
+    },
+}
+# Taxable income where the 15% and 20% rates on long-term gains and qualified dividends start
+CAPITAL_GAIN_THRESHOLDS = {
+    2024: {
+        'Single': (47025, 518900),
+        'Married Filing Jointly': (94050, 583750),
+        'Married Filing Separately': (47025, 291850),
+        'Head of Household': (63000, 551350),
+    },
+    2025: {
+        'Single': (48350, 533400),
+        'Married Filing Jointly': (96700, 600050),
+        'Married Filing Separately': (48350, 300000),
+        'Head of Household': (64750, 566700),
+    },
+}
+CAPITAL_GAIN_RATES = (0.15, 0.20)
+SE_TAX_RATE = 0.153  # on self-employment income; half of it is an adjustment
+SALT_CAP = 10000
+STANDARD_DEDUCTIONS = {
+    2024: {'Single': 14600, 'Married Filing Jointly': 29200,
+           'Married Filing Separately': 14600, 'Head of Household': 21900},
+    2025: {'Single': 15750, 'Married Filing Jointly': 31500,
+           'Married Filing Separately': 15750, 'Head of Household': 23625},
+}
+# Annual limits: 401(k) employee deferral, IRA, HSA self-only coverage
+CONTRIBUTION_LIMITS = {
+    2024: {'401k': 23000, 'traditional_ira': 7000, 'hsa': 4150},
+    2025: {'401k': 23500, 'traditional_ira': 7000, 'hsa': 4300},
+}
+# State income tax by postal code (and DC): (bracket start, rate) pairs from
+# the 2024 single-filer schedules, applied to federal taxable income. States
+# without a wage income tax have a single 0% bracket.
+STATE_TAX_BRACKETS = {
+    'AL': ((0, 0.02), (500, 0.04), (3000, 0.05)),
+    'AK': ((0, 0.0),),
+    'AZ': ((0, 0.025),),
+    'AR': ((0, 0.0), (5500, 0.02), (10900, 0.03), (15600, 0.034), (25700, 0.039)),
+    'CA': ((0, 0.01), (10756, 0.02), (25499, 0.04), (40245, 0.06), (55866, 0.08), (70606, 0.093),
+           (360659, 0.103), (432787, 0.113), (721314, 0.123), (1000000, 0.133)),
+    'CO': ((0, 0.0425),),
+    'CT': ((0, 0.02), (10000, 0.045), (50000, 0.055), (100000, 0.06), (200000, 0.065),
+           (250000, 0.069), (500000, 0.0699)),
+    'DE': ((0, 0.0), (2000, 0.022), (5000, 0.039), (10000, 0.048), (20000, 0.052),
+           (25000, 0.0555), (60000, 0.066)),
+    'DC': ((0, 0.04), (10000, 0.06), (40000, 0.065), (60000, 0.085), (250000, 0.0925),
+           (500000, 0.0975), (1000000, 0.1075)),
+    'FL': ((0, 0.0),),
+    'GA': ((0, 0.0539),),
+    'HI': ((0, 0.014), (9600, 0.032), (14400, 0.055), (19200, 0.064), (24000, 0.068),
+           (36000, 0.072), (48000, 0.076), (125000, 0.079), (175000, 0.0825), (225000, 0.09),
+           (275000, 0.10), (325000, 0.11)),
+    'ID': ((0, 0.05695),),
+    'IL': ((0, 0.0495),),
+    'IN': ((0, 0.0305),),
+    'IA': ((0, 0.044), (6210, 0.0482), (31050, 0.057)),
+    'KS': ((0, 0.052), (23000, 0.0558)),
+    'KY': ((0, 0.04),),
+    'LA': ((0, 0.0185), (12500, 0.035), (50000, 0.0425)),
+    'ME': ((0, 0.058), (26050, 0.0675), (61600, 0.0715)),
+    'MD': ((0, 0.02), (1000, 0.03), (2000, 0.04), (3000, 0.0475), (100000, 0.05),
+           (125000, 0.0525), (150000, 0.055), (250000, 0.0575)),
+    'MA': ((0, 0.05), (1053750, 0.09)),
+    'MI': ((0, 0.0425),),
+    'MN': ((0, 0.0535), (31690, 0.068), (104090, 0.0785), (193240, 0.0985)),
+    'MS': ((0, 0.0), (10000, 0.047)),
+    'MO': ((0, 0.0), (1273, 0.02), (2546, 0.025), (3819, 0.03), (5092, 0.035), (6365, 0.04),
+           (7638, 0.045), (8911, 0.048)),
+    'MT': ((0, 0.047), (20500, 0.059)),
+    'NE': ((0, 0.0246), (3880, 0.0351), (23370, 0.0501), (37670, 0.0584)),
+    'NV': ((0, 0.0),),
+    'NH': ((0, 0.0),),
+    'NJ': ((0, 0.014), (20000, 0.0175), (35000, 0.035), (40000, 0.05525), (75000, 0.0637),
+           (500000, 0.0897), (1000000, 0.1075)),
+    'NM': ((0, 0.017), (5500, 0.032), (11000, 0.047), (16000, 0.049), (210000, 0.059)),
+    'NY': ((0, 0.04), (8500, 0.045), (11700, 0.0525), (13900, 0.055), (80650, 0.06),
+           (215400, 0.0685), (1077550, 0.0965), (5000000, 0.103), (25000000, 0.109)),
+    'NC': ((0, 0.045),),
+    'ND': ((0, 0.0), (47150, 0.0195), (238200, 0.025)),
+    'OH': ((0, 0.0), (26050, 0.0275), (100000, 0.035)),
+    'OK': ((0, 0.0025), (1000, 0.0075), (2500, 0.0175), (3750, 0.0275), (4900, 0.0375), (7200, 0.0475)),
+    'OR': ((0, 0.0475), (4300, 0.0675), (10750, 0.0875), (125000, 0.099)),
+    'PA': ((0, 0.0307),),
+    'RI': ((0, 0.0375), (77450, 0.0475), (176050, 0.0599)),
+    'SC': ((0, 0.0), (3460, 0.03), (17330, 0.062)),
+    'SD': ((0, 0.0),),
+    'TN': ((0, 0.0),),
+    'TX': ((0, 0.0),),
+    'UT': ((0, 0.0455),),
+    'VT': ((0, 0.0335), (45400, 0.066), (110050, 0.076), (229550, 0.0875)),
+    'VA': ((0, 0.02), (3000, 0.03), (5000, 0.05), (17000, 0.0575)),
+    'WA': ((0, 0.0),),
+    'WV': ((0, 0.0236), (10000, 0.0315), (25000, 0.0354), (40000, 0.0472), (60000, 0.0512)),
+    'WI': ((0, 0.035), (14320, 0.044), (28640, 0.053), (315310, 0.0765)),
+    'WY': ((0, 0.0),),
+}
+# The 2024 married-filing-jointly schedules of the states where they differ
+# from single; every other state taxes joint filers on its single brackets.
+# California's 1% surcharge starts at $1M for every filing status.
+STATE_JOINT_TAX_BRACKETS = {
+    'AL': ((0, 0.02), (1000, 0.04), (6000, 0.05)),
+    'CA': ((0, 0.01), (21512, 0.02), (50998, 0.04), (80490, 0.06), (111732, 0.08), (141212, 0.093),
+           (721318, 0.103), (865574, 0.113), (1000000, 0.123), (1442628, 0.133)),
+    'CT': ((0, 0.02), (20000, 0.045), (100000, 0.055), (200000, 0.06), (400000, 0.065),
+           (500000, 0.069), (1000000, 0.0699)),
+    'HI': ((0, 0.014), (19200, 0.032), (28800, 0.055), (38400, 0.064), (48000, 0.068),
+           (72000, 0.072), (96000, 0.076), (250000, 0.079), (350000, 0.0825), (450000, 0.09),
+           (550000, 0.10), (650000, 0.11)),
+    'IA': ((0, 0.044), (12420, 0.0482), (62100, 0.057)),
+    'KS': ((0, 0.052), (46000, 0.0558)),
+    'LA': ((0, 0.0185), (25000, 0.035), (100000, 0.0425)),
+    'ME': ((0, 0.058), (52100, 0.0675), (123250, 0.0715)),
+    'MD': ((0, 0.02), (1000, 0.03), (2000, 0.04), (3000, 0.0475), (150000, 0.05),
+           (175000, 0.0525), (225000, 0.055), (300000, 0.0575)),
+    'MN': ((0, 0.0535), (46330, 0.068), (184040, 0.0785), (321450, 0.0985)),
+    'MT': ((0, 0.047), (41000, 0.059)),
+    'NE': ((0, 0.0246), (7770, 0.0351), (46750, 0.0501), (75340, 0.0584)),
+    'NJ': ((0, 0.014), (20000, 0.0175), (50000, 0.0245), (70000, 0.035), (80000, 0.05525),
+           (150000, 0.0637), (500000, 0.0897), (1000000, 0.1075)),
+    'NM': ((0, 0.017), (8000, 0.032), (16000, 0.047), (24000, 0.049), (315000, 0.059)),
+    'NY': ((0, 0.04), (17150, 0.045), (23600, 0.0525), (27900, 0.055), (161550, 0.06),
+           (323200, 0.0685), (2155350, 0.0965), (5000000, 0.103), (25000000, 0.109)),
+    'ND': ((0, 0.0), (78775, 0.0195), (289975, 0.025)),
+    'OK': ((0, 0.0025), (2000, 0.0075), (5000, 0.0175), (7500, 0.0275), (9800, 0.0375), (12200, 0.0475)),
+    'OR': ((0, 0.0475), (8600, 0.0675), (21500, 0.0875), (250000, 0.099)),
+    'VT': ((0, 0.0335), (75850, 0.066), (183400, 0.076), (279450, 0.0875)),
+    'WI': ((0, 0.035), (19090, 0.044), (38190, 0.053), (420420, 0.0765)),
+}
+# State schedules, in table order within each state. Married Filing Jointly
+# has its own; the other filing statuses use Single (head-of-household
+# schedules, where a state has one, aren't modelled).
+STATE_SCHEDULES = ('Single', 'Married Filing Jointly')
+# Brackets of every table sit in one sorted column keyed table number *
+# TAX_TABLE_STRIDE + bracket start, so a single MATCH finds the bracket
+TAX_TABLE_STRIDE = 10 ** 9
+
+def tax_tables():
+    """(tax year, filing status, standard deduction, capital gain thresholds, bracket starts) for every table"""
+    for year, statuses in TAX_BRACKET_THRESHOLDS.items():
+        for status in FILING_STATUSES:
+            yield (year, status, STANDARD_DEDUCTIONS[year][status],
+                   CAPITAL_GAIN_THRESHOLDS[year][status], (0,) + statuses[status])
+
+def _bracket_rows(tables):
+    """Lookup rows for (name, ((start, rate), ...)) tables: name, lookup key, start, rate, tax below the start"""
+    for number, (name, brackets) in enumerate(tables, 1):
+        tax_below = 0
+        for i, (start, rate) in enumerate(brackets):
+            if i:
+                previous_start, previous_rate = brackets[i - 1]
+                tax_below = round(tax_below + (start - previous_start) * previous_rate, 2)
+            yield name, number * TAX_TABLE_STRIDE + start, start, rate, tax_below
+
+def tax_bracket_rows():
+    """Federal bracket table rows: table name, lookup key, bracket start, rate, tax on income below the bracket"""
+    return _bracket_rows((f"{year} {status}", tuple(zip(starts, TAX_BRACKET_RATES)))
+                         for year, status, _, _, starts in tax_tables())
+
+def state_tax_tables():
+    """(state, schedule, brackets) for every state table, each state's STATE_SCHEDULES in order"""
+    for state, brackets in STATE_TAX_BRACKETS.items():
+        yield state, 'Single', brackets
+        yield state, 'Married Filing Jointly', STATE_JOINT_TAX_BRACKETS.get(state, brackets)
+
+def state_bracket_rows():
+    """State bracket table rows, laid out like tax_bracket_rows()"""
+    return _bracket_rows((f"{state} {schedule}", brackets) for state, schedule, brackets in state_tax_tables())
+
+# Tax profile fields the engine reads, by section of the profile
+TAX_PROFILE_FIELDS = {
+    'income': ('w2_wages', 'self_employment', 'interest', 'dividends', 'qualified_dividends',
+               'long_term_gains', 'short_term_gains', 'other'),
+    'adjustments': ('traditional_ira', 'hsa', 'student_loan_interest', 'educator_expenses'),
+    'salt': ('state_income_tax', 'property_tax', 'personal_property_tax'),
+}
+
+def _bracket_arrays(rows):
+    """Bracket lookup rows as [table, bracket] arrays of starts, rates and bases, padded with empty brackets"""
+    tables = [list(group) for _, group in groupby(rows, key=lambda row: row[0])]
+    shape = (len(tables), max(len(brackets) for brackets in tables))
+    arrays = {'starts': np.full(shape, np.inf), 'rates': np.zeros(shape), 'bases': np.zeros(shape)}
+    for i, brackets in enumerate(tables):
+        for j, (_, _, start, rate, base) in enumerate(brackets):
+            arrays['starts'][i, j], arrays['rates'][i, j], arrays['bases'][i, j] = start, rate, base
+    return arrays
+
+@lru_cache(maxsize=1)
+def _tax_table_arrays():
+    """The federal tax tables as arrays indexed by table position; shared, don't modify"""
+    tables = list(tax_tables())
+    return {
+        'index': {(year, status): i for i, (year, status, _, _, _) in enumerate(tables)},
+        'deduction': np.array([deduction for _, _, deduction, _, _ in tables], dtype=float),
+        'gains': np.array([gains for _, _, _, gains, _ in tables], dtype=float),
+        **_bracket_arrays(tax_bracket_rows()),
+    }
+
+@lru_cache(maxsize=1)
+def _state_table_arrays():
+    """The state tax tables as arrays indexed by position in state_tax_tables(); shared, don't modify"""
+    return {'index': {state: i for i, state in enumerate(STATE_TAX_BRACKETS)},
+            **_bracket_arrays(state_bracket_rows())}
+
+def state_indexes(states, filing_statuses='Single'):
+    """Position in state_tax_tables() of each state code's table for the filing status
+    beside it (or one status for all), or -1 for unknown codes"""
+    index = _state_table_arrays()['index']
+    codes, inverse = np.unique(np.asarray(states, dtype=str), return_inverse=True)
+    state = np.array([index.get(code, -1) for code in codes.tolist()], dtype=int)[inverse.reshape(-1)]
+    schedule = np.asarray(filing_statuses, dtype=str) == STATE_SCHEDULES[1]
+    return np.where(state < 0, -1, state * len(STATE_SCHEDULES) + schedule)
+
+def compute_state_taxes(income, states, filing_statuses='Single'):
+    """State income tax on arrays of taxable income, one state code (or index from
+    state_indexes()) per income; NaN for unknown states.
+
+    Married Filing Jointly uses the state's joint schedule, every other
+    filing status its single one. The engine passes federal taxable income
+    (after the federal standard or itemized deduction) as the state base;
+    state deductions, exemptions and credits aren't modelled.
+    """
+    income = np.asarray(income, dtype=float)
+    states = np.asarray(states)
+    state = states if states.dtype.kind in 'iu' else state_indexes(states, filing_statuses)
+    tax, _ = _bracket_tax(_state_table_arrays(), np.maximum(state, 0), income)
+    return np.where(state < 0, np.nan, tax)
+
+def tax_profile_columns(profiles):
+    """One NumPy array per tax input across a list of profiles (each overlaid on the sample data).
+
+    'table' is each profile's position in tax_tables(), or -1 when its tax
+    year and filing status have no table; 'state' likewise indexes
+    state_tax_tables() by state and filing status.
+    """
+    profiles = [merge_profile(TAX_PLANNING_SAMPLE_DATA, profile) for profile in profiles]
+    index = _tax_table_arrays()['index']
+    columns = {'table': np.array([index.get((profile['tax_year'], profile['filing_status']), -1)
+                                  for profile in profiles], dtype=int),
+               'state': state_indexes([f"{profile['state']}" for profile in profiles],
+                                      [f"{profile['filing_status']}" for profile in profiles])}
+    for group, fields in TAX_PROFILE_FIELDS.items():
+        for field in fields:
+            columns[field] = np.array([float(profile[group][field]) for profile in profiles])
+    columns['mortgage_interest'] = np.array([float(profile['mortgage_interest']) for profile in profiles])
+    return columns
+
+def _bracket_tax(tables, table, income):
+    """Tax on income under each row's bracket table, and the rate of the bracket it ends in"""
+    starts = tables['starts'][table]
+    bracket = (income[:, None] >= starts).sum(axis=1) - 1
+    rows = np.arange(len(income))
+    rate = tables['rates'][table, bracket]
+    return tables['bases'][table, bracket] + (income - starts[rows, bracket]) * rate, rate
+
+def compute_taxes(columns):
+    """Every Tax Estimator line for arrays of profiles (see tax_profile_columns()), as a dict of arrays.
+
+    Mirrors the Tax Estimator formulas line by line, so the workbook and the
+    engine agree. Profiles without a tax table get NaN.
+    """
+    tables = _tax_table_arrays()
+    table = np.maximum(columns['table'], 0)
+    c = columns
+
+    gross = (c['w2_wages'] + c['self_employment'] + c['interest'] + c['dividends'] + c['long_term_gains']
+             + c['short_term_gains'] + c['other'])
+    adjustments = (c['traditional_ira'] + c['hsa'] + c['self_employment'] * (SE_TAX_RATE / 2)
+                   + c['student_loan_interest'] + c['educator_expenses'])
+    agi = gross - adjustments
+    itemized = (np.minimum(SALT_CAP, c['state_income_tax'] + c['property_tax'] + c['personal_property_tax'])
+                + c['mortgage_interest'])
+    standard = tables['deduction'][table]
+    taxable = np.maximum(0, agi - np.maximum(standard, itemized))
+
+    # Long-term gains and qualified dividends stack on top of ordinary income
+    preferential = np.minimum(taxable, c['qualified_dividends'] + np.maximum(0, c['long_term_gains']))
+    ordinary = taxable - preferential
+    regular_tax, marginal = _bracket_tax(tables, table, taxable)
+    ordinary_tax, _ = _bracket_tax(tables, table, ordinary)
+    gains_15, gains_20 = tables['gains'][table].T
+    gains_tax = (CAPITAL_GAIN_RATES[0] * np.maximum(0, np.minimum(taxable, gains_20) - np.maximum(ordinary, gains_15))
+                 + CAPITAL_GAIN_RATES[1] * np.maximum(0, taxable - np.maximum(ordinary, gains_20)))
+    federal = np.minimum(regular_tax, ordinary_tax + gains_tax)
+
+    se_tax = c['self_employment'] * SE_TAX_RATE
+    state = compute_state_taxes(taxable, columns['state'])
+    total = federal + se_tax + state
+    effective = np.divide(total, gross, out=np.zeros_like(total), where=gross > 0)
+
+    result = {
+        'gross_income': gross, 'adjustments': adjustments, 'agi': agi, 'standard_deduction': standard,
+        'itemized_deductions': itemized, 'taxable_income': taxable, 'preferential_income': preferential,
+        'ordinary_income': ordinary, 'ordinary_tax': ordinary_tax, 'gains_tax': gains_tax,
+        'federal_tax': federal, 'se_tax': se_tax, 'state_tax': state, 'total_tax': total,
+        'effective_rate': effective, 'marginal_rate': marginal,
+    }
+    unknown = columns['table'] < 0
+    if unknown.any():
+        for name in ('standard_deduction', 'taxable_income', 'preferential_income', 'ordinary_income',
+                     'ordinary_tax', 'gains_tax', 'federal_tax', 'state_tax', 'total_tax',
+                     'effective_rate', 'marginal_rate'):
+            result[name] = np.where(unknown, np.nan, result[name])
+    return result
+
+TAX_PLANNING_LAYOUT = [
+    {'sheet': "Tax Estimator", 'title': "Tax Planning Command Center", 'subtitle': "Estimate Your Tax Liability",
+     'widths': {'A:K': 16, 'B': 28},
+     'blocks': [
+        {'kind': 'section', 'text': "FILING INFORMATION", 'merge_to': 'D'},
+        {'kind': 'fields', 'name': 'tax', 'label_style': 'label',
+         'items': [
+            ('filing_status', "Filing Status", ('filing_status',), None),  # any of FILING_STATUSES
+            ('year', "Tax Year", ('tax_year',), None),
+            ('state', "State", ('state',), None),  # postal code, e.g. CA or DC
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "INCOME", 'merge_to': 'D'},
+        {'kind': 'fields', 'name': 'income', 'label_style': 'label',
+         'items': [
+            ('w2_wages', "W-2 Wages", ('income', 'w2_wages'), '"$"#,##0.00'),
+            ('self_employment', "Self-Employment Income", ('income', 'self_employment'), '"$"#,##0.00'),
+            ('interest', "Interest Income", ('income', 'interest'), '"$"#,##0.00'),
+            ('dividends', "Dividend Income", ('income', 'dividends'), '"$"#,##0.00'),
+            ('long_term_gains', "Capital Gains (Long-term)", ('income', 'long_term_gains'), '"$"#,##0.00'),
+            ('short_term_gains', "Capital Gains (Short-term)", ('income', 'short_term_gains'), '"$"#,##0.00'),
+            ('other', "Other Income", ('income', 'other'), '"$"#,##0.00'),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'fields', 'name': 'income',
+         'items': [
+            ('gross', "GROSS INCOME", "=SUM([income.w2_wages]:[income.other])", '"$"#,##0.00',
+             {'label_style': 'total_label', 'value_style': 'total_value'}),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "ADJUSTMENTS (Above-the-Line)", 'merge_to': 'D'},
+        {'kind': 'fields', 'name': 'adjustments', 'label_style': 'label',
+         'items': [
+            ('traditional_ira', "Traditional IRA Contribution", ('adjustments', 'traditional_ira'), '"$"#,##0.00'),
+            ('hsa', "HSA Contribution", ('adjustments', 'hsa'), '"$"#,##0.00'),
+            ('se_tax', "Self-Employment Tax (50%)", f"=[income.self_employment]*{SE_TAX_RATE / 2}",
+             '"$"#,##0.00'),
+            ('student_loan_interest', "Student Loan Interest", ('adjustments', 'student_loan_interest'),
+             '"$"#,##0.00'),
+            ('educator_expenses', "Educator Expenses", ('adjustments', 'educator_expenses'), '"$"#,##0.00'),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'fields', 'name': 'adjustments',
+         'items': [
+            ('total', "TOTAL ADJUSTMENTS", "=SUM([adjustments.traditional_ira]:[adjustments.educator_expenses])",
+             '"$"#,##0.00', {'label_style': 'total_label'}),
+            ('agi', "ADJUSTED GROSS INCOME (AGI)", "=[income.gross]-[adjustments.total]", '"$"#,##0.00',
+             {'label_style': 'total_value', 'value_style': {'font': Font(bold=True, size=12, color=HONEY)}}),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "DEDUCTIONS", 'merge_to': 'D'},
+        {'kind': 'fields', 'name': 'deduction',
+         'items': [
+            ('standard', "Standard Deduction", "=INDEX([filing.standard_deduction],[lookup.selected])",
+             '"$"#,##0.00'),
+            ('itemized', "Itemized Deductions", "=[itemized.total]", '"$"#,##0.00'),
+            ('used', "DEDUCTION USED (Higher of)", "=MAX([deduction.standard],[deduction.itemized])",
+             '"$"#,##0.00', {'label_style': 'total_label', 'value_style': 'subtotal'}),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'fields', 'name': 'tax',
+         'items': [
+            ('taxable_income', "TAXABLE INCOME", "=MAX(0,[adjustments.agi]-[deduction.used])", '"$"#,##0.00',
+             {'label_style': 'emphasis', 'value_style': 'highlight'}),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "TAX CALCULATION", 'merge_to': 'D'},
+        {'kind': 'fields', 'name': 'tax',
+         'items': [
+            ('qualified_dividends', "Qualified Dividends (in Dividends)", ('income', 'qualified_dividends'),
+             '"$"#,##0.00', {'label_style': 'label'}),
+            ('preferential_income', "Long-term Gains + Qualified Div.",
+             "=MIN([tax.taxable_income],[tax.qualified_dividends]+MAX(0,[income.long_term_gains]))",
+             '"$"#,##0.00'),
+            ('ordinary_income', "Ordinary Taxable Income", "=[tax.taxable_income]-[tax.preferential_income]",
+             '"$"#,##0.00'),
+            # Tax below the bracket plus the bracket's rate on the rest
+            ('ordinary_tax', "Tax on Ordinary Income",
+             "=INDEX([brackets.base],[lookup.ordinary_bracket])"
+             "+([tax.ordinary_income]-INDEX([brackets.start],[lookup.ordinary_bracket]))"
+             "*INDEX([brackets.rate],[lookup.ordinary_bracket])", '"$"#,##0.00'),
+            # Gains fill the 0%/15%/20% bands above ordinary income
+            ('gains_tax', "Tax on Gains + Qualified Div.",
+             f"={CAPITAL_GAIN_RATES[0]}*MAX(0,MIN([tax.taxable_income],INDEX([filing.gains_20],[lookup.selected]))"
+             f"-MAX([tax.ordinary_income],INDEX([filing.gains_15],[lookup.selected])))"
+             f"+{CAPITAL_GAIN_RATES[1]}*MAX(0,[tax.taxable_income]"
+             f"-MAX([tax.ordinary_income],INDEX([filing.gains_20],[lookup.selected])))", '"$"#,##0.00'),
+            # Never more than taxing everything at ordinary rates
+            ('federal_tax', "Federal Income Tax",
+             "=MIN([tax.ordinary_tax]+[tax.gains_tax],INDEX([brackets.base],[lookup.bracket])"
+             "+([tax.taxable_income]-INDEX([brackets.start],[lookup.bracket]))*INDEX([brackets.rate],[lookup.bracket]))",
+             '"$"#,##0.00'),
+            ('se_tax', "Self-Employment Tax", f"=[income.self_employment]*{SE_TAX_RATE}", '"$"#,##0.00'),
+            ('state_tax', "State Income Tax",
+             "=INDEX([state_brackets.base],[lookup.state_bracket])"
+             "+([tax.taxable_income]-INDEX([state_brackets.start],[lookup.state_bracket]))"
+             "*INDEX([state_brackets.rate],[lookup.state_bracket])", '"$"#,##0.00'),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'fields', 'name': 'tax',
+         'items': [
+            ('total', "TOTAL TAX LIABILITY", "=[tax.federal_tax]+[tax.se_tax]+[tax.state_tax]", '"$"#,##0.00',
+             {'label_style': 'emphasis', 'value_style': {'font': Font(bold=True, size=14, color=ACCENT_RED)}}),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'fields', 'name': 'tax',
+         'items': [
+            ('effective_rate', "Effective Tax Rate", "=IF([income.gross]>0,[tax.total]/[income.gross],0)", '0.00%',
+             {'value_style': {'font': Font(bold=True, size=12, color=DARK_TEXT)}}),
+            ('marginal_rate', "Marginal Tax Rate", "=INDEX([brackets.rate],[lookup.bracket])", '0%'),
+         ]},
+     ]},
+    {'sheet': "Deductions", 'title': "Deduction Tracker", 'subtitle': "Itemized Deductions",
+     'widths': {'A:G': 15, 'B': 30},
+     'blocks': [
+        {'kind': 'section', 'text': "MEDICAL EXPENSES", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'table', 'name': 'medical', 'records': (), 'blank_rows': 5,
+         'columns': [
+            {'key': 'description', 'header': "Description"},
+            {'key': 'date', 'header': "Date"},
+            {'key': 'amount', 'header': "Amount", 'format': '"$"#,##0.00', 'total': ('subtotal', '=SUM({range})')},
+            {'key': 'category', 'header': "Category"},
+         ],
+         'total_offset': 1, 'total_label': "Medical Subtotal", 'total_label_style': None, 'total_style': None},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': f"STATE & LOCAL TAXES (SALT - Max ${SALT_CAP:,})", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'salt', 'value_col': 'D',
+         'items': [
+            ('state_income_tax', "State Income Tax Paid", ('salt', 'state_income_tax'), '"$"#,##0.00'),
+            ('property_tax', "Property Tax", ('salt', 'property_tax'), '"$"#,##0.00'),
+            ('personal_property_tax', "Personal Property Tax", ('salt', 'personal_property_tax'), '"$"#,##0.00'),
+            ('subtotal', "SALT Subtotal (Capped)",
+             f"=MIN({SALT_CAP},SUM([salt.state_income_tax]:[salt.personal_property_tax]))", '"$"#,##0.00',
+             {'value_style': 'subtotal'}),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "MORTGAGE INTEREST", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'mortgage', 'value_col': 'D',
+         'items': [
+            ('interest', "Home Mortgage Interest (1098)", ('mortgage_interest',), '"$"#,##0.00'),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "CHARITABLE CONTRIBUTIONS", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'table', 'name': 'charity', 'records': (), 'blank_rows': 5,
+         'columns': [
+            {'key': 'description', 'header': "Description"},
+            {'key': 'date', 'header': "Date"},
+            {'key': 'amount', 'header': "Amount", 'format': '"$"#,##0.00', 'total': ('subtotal', '=SUM({range})')},
+            {'key': 'category', 'header': "Category"},
+         ],
+         'total_offset': 1, 'total_label': "Charity Subtotal", 'total_label_style': None, 'total_style': None},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'fields', 'name': 'itemized', 'value_col': 'D',
+         'items': [
+            ('total', "TOTAL ITEMIZED DEDUCTIONS",
+             "=[medical.subtotal]+[salt.subtotal]+[mortgage.interest]+[charity.subtotal]", '"$"#,##0.00',
+             {'label_style': {'font': Font(bold=True, size=14, color=HONEY)}, 'value_style': 'emphasis'}),
+         ]},
+     ]},
+    {'sheet': "Quarterly Payments", 'title': "Estimated Tax Payments", 'subtitle': "Quarterly Payment Calculator",
+     'widths': {'A:I': 16, 'B': 25},
+     'blocks': [
+        {'kind': 'section', 'text': "ESTIMATED TAX CALCULATION", 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'quarterly',
+         'items': [
+            ('expected', "Expected Total Tax", "=[tax.total]", '"$"#,##0.00'),
+            ('withholding', "W-2 Withholding", ('withholding',), '"$"#,##0.00'),
+            ('remaining', "Remaining Tax Due", "=MAX(0,[quarterly.expected]-[quarterly.withholding])",
+             '"$"#,##0.00', {'value_style': 'subtotal'}),
+            ('payment', "Quarterly Payment Amount", "=[quarterly.remaining]/4", '"$"#,##0.00',
+             {'value_style': 'highlight'}),
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "PAYMENT SCHEDULE", 'merge_to': 'F'},
+        {'kind': 'table', 'name': 'payments', 'total_offset': None,
+         'records': [('Q1', 'April 15', 0), ('Q2', 'June 15', 0), ('Q3', 'September 15', 0), ('Q4', 'January 15', 0)],
+         'columns': [
+            {'key': 'quarter', 'header': "Quarter", 'value': 0},
+            {'key': 'due_date', 'header': "Due Date", 'value': 1},
+            {'key': 'amount', 'header': "Amount Due", 'formula': '=[$quarterly.payment]', 'format': '"$"#,##0.00'},
+            {'key': 'paid', 'header': "Paid", 'value': 2, 'format': '"$"#,##0.00'},
+            {'key': 'status', 'header': "Status",
+             'formula': '=IF({paid}>={amount},"✓ Paid",IF({paid}>0,"Partial","Pending"))'},
+         ]},
+     ]},
+    {'sheet': "Optimization", 'title': "Tax Optimization Strategies", 'subtitle': "Maximize Your Tax Savings",
+     'widths': {'B': 35, 'C': 20, 'D': 20, 'E': 30, 'F': 20},
+     'blocks': [
+        {'kind': 'section', 'text': "RETIREMENT CONTRIBUTION OPPORTUNITIES", 'merge_to': 'F'},
+        # Tax saved compares the engine's total tax now and with each account filled to its limit
+        {'kind': 'table', 'name': 'retirement', 'data': 'retirement_rows', 'total_offset': None,
+         'columns': [
+            {'key': 'account', 'header': "Account Type", 'value': 0},
+            {'key': 'limit', 'header': "Annual Limit", 'value': 1, 'resolve': True, 'format': '"$"#,##0'},
+            {'key': 'contribution', 'header': "Your Contribution", 'value': 2, 'format': '"$"#,##0'},
+            {'key': 'room', 'header': "Remaining Room", 'formula': '={limit}-{contribution}', 'format': '"$"#,##0'},
+            {'key': 'tax_saved', 'header': "Tax Saved if Maxed", 'value': 3,
+             'style': {'font': Font(color=ACCENT_GREEN)}, 'format': '"$"#,##0'},
+         ],
+         'rules': [('formula', 'retirement.room', '{cell}>0', "C6EFCE")]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "TAX-SAVING STRATEGIES", 'merge_to': 'E'},
+        {'kind': 'text', 'style': {'font': Font(size=11, color=DARK_TEXT)},
+         'lines': [
+            "• Max out 401(k) contributions before year-end",
+            "• Consider Roth conversions in low-income years",
+            "• Bunch charitable donations for itemizing",
+            "• Harvest tax losses to offset capital gains",
+            "• Time self-employment income across tax years",
+            "• Use HSA as stealth retirement account",
+            "• Consider Qualified Business Income (QBI) deduction",
+            "• Review state tax planning (SALT workarounds)",
+         ]},
+     ]},
+    # Federal and state tax tables, and the lookups into them
+    {'sheet': "Tax Tables", 'hidden': True, 'start_row': 2,
+     'widths': {'A:G': 16, 'B': 32},
+     'blocks': [
+        {'kind': 'section', 'text': "LOOKUPS"},
+        {'kind': 'fields', 'name': 'lookup',
+         'items': [
+            ('selected', "Selected Table", '=MATCH([$tax.year]&" "&[$tax.filing_status],[$filing.name],0)', None),
+            ('bracket', "Bracket Row",
+             f'=MATCH([$lookup.selected]*{TAX_TABLE_STRIDE}+MIN([$tax.taxable_income],{TAX_TABLE_STRIDE - 1}),'
+             f'[$brackets.key],1)', None),
+            ('ordinary_bracket', "Ordinary Income Bracket Row",
+             f'=MATCH([$lookup.selected]*{TAX_TABLE_STRIDE}+MIN([$tax.ordinary_income],{TAX_TABLE_STRIDE - 1}),'
+             f'[$brackets.key],1)', None),
+            ('limits', "Contribution Limit Row", '=MATCH([$tax.year],[$limits.year],0)', None),
+            ('state', "State Table",
+             '=MATCH([$tax.state]&" "&IF([$tax.filing_status]="Married Filing Jointly",[$tax.filing_status],'
+             '"Single"),[$states.name],0)', None),
+            ('state_bracket', "State Bracket Row",
+             f'=MATCH([$lookup.state]*{TAX_TABLE_STRIDE}+MIN([$tax.taxable_income],{TAX_TABLE_STRIDE - 1}),'
+             f'[$state_brackets.key],1)', None),
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "FILING TABLES"},
+        {'kind': 'table', 'name': 'filing', 'data': 'filing_tables', 'total_offset': None,
+         'columns': [
+            {'key': 'name', 'header': "Table", 'value': 0},
+            {'key': 'standard_deduction', 'header': "Standard Deduction", 'value': 1},
+            {'key': 'gains_15', 'header': "15% Gains From", 'value': 2},
+            {'key': 'gains_20', 'header': "20% Gains From", 'value': 3},
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "TAX BRACKETS"},
+        {'kind': 'table', 'name': 'brackets', 'data': 'tax_brackets', 'total_offset': None,
+         'columns': [
+            {'key': 'table', 'header': "Table", 'value': 0},
+            {'key': 'key', 'header': "Lookup Key", 'value': 1},
+            {'key': 'start', 'header': "Bracket Start", 'value': 2},
+            {'key': 'rate', 'header': "Rate", 'value': 3},
+            {'key': 'base', 'header': "Tax Below Bracket", 'value': 4},
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "CONTRIBUTION LIMITS"},
+        {'kind': 'table', 'name': 'limits', 'data': 'contribution_limits', 'total_offset': None,
+         'columns': [
+            {'key': 'year', 'header': "Tax Year", 'value': 0},
+            {'key': '401k', 'header': "401(k)", 'value': 1},
+            {'key': 'ira', 'header': "Traditional IRA", 'value': 2},
+            {'key': 'hsa', 'header': "HSA (Self-only)", 'value': 3},
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "STATES"},
+        {'kind': 'table', 'name': 'states', 'data': 'state_tables', 'total_offset': None,
+         'columns': [
+            {'key': 'name', 'header': "Table", 'value': 0},
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "STATE BRACKETS"},
+        {'kind': 'table', 'name': 'state_brackets', 'data': 'state_brackets', 'total_offset': None,
+         'columns': [
+            {'key': 'state', 'header': "State", 'value': 0},
+            {'key': 'key', 'header': "Lookup Key", 'value': 1},
+            {'key': 'start', 'header': "Bracket Start", 'value': 2},
+            {'key': 'rate', 'header': "Rate", 'value': 3},
+            {'key': 'base', 'header': "Tax Below Bracket", 'value': 4},
+         ]},
+     ]},
+]
+
+def create_tax_planning_command_center(output_path, data=None):
     """Create comprehensive tax planning tool"""
+    data = merge_profile(TAX_PLANNING_SAMPLE_DATA, data)
     wb = Workbook()
-    styles = get_styles()
     
     instructions = {
         "🎯 Overview": [
@@ -572,1310 +2973,1403 @@ def create_tax_planning_command_center(output_path):
     }
     create_instructions_sheet(wb, "Tax Planning Command Center", instructions)
     
-    # Tax Estimator Sheet
-    ws = wb.create_sheet("Tax Estimator")
-    start_row = add_branding_header(ws, "Tax Planning Command Center", "Estimate Your Tax Liability")
-    
-    for col in range(1, 12):
-        ws.column_dimensions[get_column_letter(col)].width = 16
-    ws.column_dimensions['B'].width = 28
-    
-    row = start_row
-    
-    # Filing Status Section
-    ws[f'B{row}'] = "FILING INFORMATION"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    ws[f'B{row}'] = "Filing Status"
-    ws[f'C{row}'] = "Single"  # User can change to: Married Filing Jointly, etc.
-    apply_style(ws[f'B{row}'], styles['label'])
-    row += 1
-    
-    ws[f'B{row}'] = "Tax Year"
-    ws[f'C{row}'] = 2024
-    apply_style(ws[f'B{row}'], styles['label'])
-    row += 2
-    
-    # Income Section
-    ws[f'B{row}'] = "INCOME"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    income_items = [
-        ('W-2 Wages', 85000),
-        ('Self-Employment Income', 25000),
-        ('Interest Income', 500),
-        ('Dividend Income', 1200),
-        ('Capital Gains (Long-term)', 3000),
-        ('Capital Gains (Short-term)', 1500),
-        ('Other Income', 0),
-    ]
-    
-    income_start = row
-    for item, amount in income_items:
-        ws[f'B{row}'] = item
-        ws[f'C{row}'] = amount
-        ws[f'C{row}'].number_format = '"$"#,##0.00'
-        apply_style(ws[f'B{row}'], styles['label'])
-        row += 1
-    
-    row += 1
-    ws[f'B{row}'] = "GROSS INCOME"
-    ws[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws[f'C{row}'] = f'=SUM(C{income_start}:C{row-2})'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(bold=True, size=12)
-    gross_income_row = row
-    row += 2
-    
-    # Adjustments Section
-    ws[f'B{row}'] = "ADJUSTMENTS (Above-the-Line)"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    adjustments = [
-        ('Traditional IRA Contribution', 6500),
-        ('HSA Contribution', 3850),
-        ('Self-Employment Tax (50%)', '=C' + str(income_start+1) + '*0.0765'),
-        ('Student Loan Interest', 2500),
-        ('Educator Expenses', 300),
-    ]
-    
-    adj_start = row
-    for item, amount in adjustments:
-        ws[f'B{row}'] = item
-        ws[f'C{row}'] = amount
-        ws[f'C{row}'].number_format = '"$"#,##0.00'
-        apply_style(ws[f'B{row}'], styles['label'])
-        row += 1
-    
-    row += 1
-    ws[f'B{row}'] = "TOTAL ADJUSTMENTS"
-    ws[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws[f'C{row}'] = f'=SUM(C{adj_start}:C{row-2})'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    total_adj_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "ADJUSTED GROSS INCOME (AGI)"
-    ws[f'B{row}'].font = Font(bold=True, size=12)
-    ws[f'C{row}'] = f'=C{gross_income_row}-C{total_adj_row}'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(bold=True, size=12, color=HONEY)
-    agi_row = row
-    row += 2
-    
-    # Deductions Section
-    ws[f'B{row}'] = "DEDUCTIONS"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    ws[f'B{row}'] = "Standard Deduction (2024 Single)"
-    ws[f'C{row}'] = 14600
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    standard_ded_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "Itemized Deductions"
-    ws[f'C{row}'] = "=Deductions!E50"
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    itemized_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "DEDUCTION USED (Higher of)"
-    ws[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws[f'C{row}'] = f'=MAX(C{standard_ded_row},C{itemized_row})'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(bold=True)
-    deduction_row = row
-    row += 2
-    
-    # Taxable Income
-    ws[f'B{row}'] = "TAXABLE INCOME"
-    ws[f'B{row}'].font = Font(bold=True, size=14)
-    ws[f'C{row}'] = f'=MAX(0,C{agi_row}-C{deduction_row})'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(bold=True, size=14, color=HONEY)
-    ws[f'C{row}'].fill = PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
-    taxable_row = row
-    row += 2
-    
-    # Tax Calculation Section
-    ws[f'B{row}'] = "TAX CALCULATION"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    # 2024 Tax Brackets (Single)
-    ws[f'B{row}'] = "Federal Income Tax"
-    # Simplified tax calculation formula
-    ws[f'C{row}'] = f'=IF(C{taxable_row}<=11600,C{taxable_row}*0.10,IF(C{taxable_row}<=47150,1160+(C{taxable_row}-11600)*0.12,IF(C{taxable_row}<=100525,5426+(C{taxable_row}-47150)*0.22,IF(C{taxable_row}<=191950,17168.5+(C{taxable_row}-100525)*0.24,IF(C{taxable_row}<=243725,39110.5+(C{taxable_row}-191950)*0.32,IF(C{taxable_row}<=609350,55678.5+(C{taxable_row}-243725)*0.35,183647.25+(C{taxable_row}-609350)*0.37))))))'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    fed_tax_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "Self-Employment Tax"
-    ws[f'C{row}'] = f'=C{income_start+1}*0.153'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    se_tax_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "State Tax (Est. 5%)"
-    ws[f'C{row}'] = f'=C{taxable_row}*0.05'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    state_tax_row = row
-    row += 2
-    
-    ws[f'B{row}'] = "TOTAL TAX LIABILITY"
-    ws[f'B{row}'].font = Font(bold=True, size=14)
-    ws[f'C{row}'] = f'=C{fed_tax_row}+C{se_tax_row}+C{state_tax_row}'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(bold=True, size=14, color=ACCENT_RED)
-    total_tax_row = row
-    row += 2
-    
-    # Effective Tax Rate
-    ws[f'B{row}'] = "Effective Tax Rate"
-    ws[f'C{row}'] = f'=IF(C{gross_income_row}>0,C{total_tax_row}/C{gross_income_row},0)'
-    ws[f'C{row}'].number_format = '0.00%'
-    ws[f'C{row}'].font = Font(bold=True, size=12, color=DARK_TEXT)
-    row += 1
-    
-    ws[f'B{row}'] = "Marginal Tax Rate"
-    ws[f'C{row}'] = f'=IF(C{taxable_row}<=11600,0.10,IF(C{taxable_row}<=47150,0.12,IF(C{taxable_row}<=100525,0.22,IF(C{taxable_row}<=191950,0.24,IF(C{taxable_row}<=243725,0.32,IF(C{taxable_row}<=609350,0.35,0.37))))))'
-    ws[f'C{row}'].number_format = '0%'
-    
-    # Deductions Tracking Sheet
-    ws_ded = wb.create_sheet("Deductions")
-    start_row = add_branding_header(ws_ded, "Deduction Tracker", "Itemized Deductions")
-    
-    for col in range(1, 8):
-        ws_ded.column_dimensions[get_column_letter(col)].width = 15
-    ws_ded.column_dimensions['B'].width = 30
-    
-    row = start_row
-    
-    # Medical Expenses
-    ws_ded[f'B{row}'] = "MEDICAL EXPENSES"
-    apply_style(ws_ded[f'B{row}'], styles['section'])
-    ws_ded.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    headers = ['Description', 'Date', 'Amount', 'Category']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_ded[f'{col}{row}'] = h
-        apply_style(ws_ded[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    medical_start = row
-    for _ in range(5):
-        for i in range(4):
-            col = get_column_letter(2 + i)
-            apply_style(ws_ded[f'{col}{row}'], styles['data'])
-        row += 1
-    medical_end = row - 1
-    
-    ws_ded[f'B{row}'] = "Medical Subtotal"
-    ws_ded[f'D{row}'] = f'=SUM(D{medical_start}:D{medical_end})'
-    ws_ded[f'D{row}'].number_format = '"$"#,##0.00'
-    row += 2
-    
-    # State & Local Taxes (SALT)
-    ws_ded[f'B{row}'] = "STATE & LOCAL TAXES (SALT - Max $10,000)"
-    apply_style(ws_ded[f'B{row}'], styles['section'])
-    ws_ded.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    salt_items = [
-        ('State Income Tax Paid', 4500),
-        ('Property Tax', 5200),
-        ('Personal Property Tax', 300),
-    ]
-    
-    salt_start = row
-    for item, amount in salt_items:
-        ws_ded[f'B{row}'] = item
-        ws_ded[f'D{row}'] = amount
-        ws_ded[f'D{row}'].number_format = '"$"#,##0.00'
-        row += 1
-    salt_end = row - 1
-    
-    ws_ded[f'B{row}'] = "SALT Subtotal (Capped)"
-    ws_ded[f'D{row}'] = f'=MIN(10000,SUM(D{salt_start}:D{salt_end}))'
-    ws_ded[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_ded[f'D{row}'].font = Font(bold=True)
-    salt_total_row = row
-    row += 2
-    
-    # Mortgage Interest
-    ws_ded[f'B{row}'] = "MORTGAGE INTEREST"
-    apply_style(ws_ded[f'B{row}'], styles['section'])
-    ws_ded.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    ws_ded[f'B{row}'] = "Home Mortgage Interest (1098)"
-    ws_ded[f'D{row}'] = 8500
-    ws_ded[f'D{row}'].number_format = '"$"#,##0.00'
-    mortgage_row = row
-    row += 2
-    
-    # Charitable Contributions
-    ws_ded[f'B{row}'] = "CHARITABLE CONTRIBUTIONS"
-    apply_style(ws_ded[f'B{row}'], styles['section'])
-    ws_ded.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_ded[f'{col}{row}'] = h
-        apply_style(ws_ded[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    charity_start = row
-    for _ in range(5):
-        for i in range(4):
-            col = get_column_letter(2 + i)
-            apply_style(ws_ded[f'{col}{row}'], styles['data'])
-        row += 1
-    charity_end = row - 1
-    
-    ws_ded[f'B{row}'] = "Charity Subtotal"
-    ws_ded[f'D{row}'] = f'=SUM(D{charity_start}:D{charity_end})'
-    ws_ded[f'D{row}'].number_format = '"$"#,##0.00'
-    charity_total_row = row
-    row += 2
-    
-    # Total Itemized
-    ws_ded[f'B{row}'] = "TOTAL ITEMIZED DEDUCTIONS"
-    ws_ded[f'B{row}'].font = Font(bold=True, size=14, color=HONEY)
-    ws_ded[f'D{row}'] = f'=D{medical_end+1}+D{salt_total_row}+D{mortgage_row}+D{charity_total_row}'
-    ws_ded[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_ded[f'D{row}'].font = Font(bold=True, size=14)
-    ws_ded['E50'] = f'=D{row}'  # Reference for main sheet
-    
-    # Quarterly Payments Sheet
-    ws_qtr = wb.create_sheet("Quarterly Payments")
-    start_row = add_branding_header(ws_qtr, "Estimated Tax Payments", "Quarterly Payment Calculator")
-    
-    for col in range(1, 10):
-        ws_qtr.column_dimensions[get_column_letter(col)].width = 16
-    ws_qtr.column_dimensions['B'].width = 25
-    
-    row = start_row
-    
-    ws_qtr[f'B{row}'] = "ESTIMATED TAX CALCULATION"
-    apply_style(ws_qtr[f'B{row}'], styles['section'])
-    ws_qtr.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    ws_qtr[f'B{row}'] = "Expected Total Tax"
-    ws_qtr[f'C{row}'] = "='Tax Estimator'!C43"
-    ws_qtr[f'C{row}'].number_format = '"$"#,##0.00'
-    total_expected = row
-    row += 1
-    
-    ws_qtr[f'B{row}'] = "W-2 Withholding"
-    ws_qtr[f'C{row}'] = 12000
-    ws_qtr[f'C{row}'].number_format = '"$"#,##0.00'
-    withholding_row = row
-    row += 1
-    
-    ws_qtr[f'B{row}'] = "Remaining Tax Due"
-    ws_qtr[f'C{row}'] = f'=MAX(0,C{total_expected}-C{withholding_row})'
-    ws_qtr[f'C{row}'].number_format = '"$"#,##0.00'
-    ws_qtr[f'C{row}'].font = Font(bold=True)
-    remaining_row = row
-    row += 1
-    
-    ws_qtr[f'B{row}'] = "Quarterly Payment Amount"
-    ws_qtr[f'C{row}'] = f'=C{remaining_row}/4'
-    ws_qtr[f'C{row}'].number_format = '"$"#,##0.00'
-    ws_qtr[f'C{row}'].font = Font(bold=True, size=14, color=HONEY)
-    ws_qtr[f'C{row}'].fill = PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
-    row += 3
-    
-    # Payment Schedule
-    ws_qtr[f'B{row}'] = "PAYMENT SCHEDULE"
-    apply_style(ws_qtr[f'B{row}'], styles['section'])
-    ws_qtr.merge_cells(f'B{row}:F{row}')
-    row += 2
-    
-    headers = ['Quarter', 'Due Date', 'Amount Due', 'Paid', 'Status']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_qtr[f'{col}{row}'] = h
-        apply_style(ws_qtr[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    quarters = [
-        ('Q1', 'April 15', '=$C$13'),
-        ('Q2', 'June 15', '=$C$13'),
-        ('Q3', 'September 15', '=$C$13'),
-        ('Q4', 'January 15', '=$C$13'),
-    ]
-    
-    for qtr, due, amount in quarters:
-        ws_qtr[f'B{row}'] = qtr
-        ws_qtr[f'C{row}'] = due
-        ws_qtr[f'D{row}'] = amount
-        ws_qtr[f'D{row}'].number_format = '"$"#,##0.00'
-        ws_qtr[f'E{row}'] = 0
-        ws_qtr[f'E{row}'].number_format = '"$"#,##0.00'
-        ws_qtr[f'F{row}'] = f'=IF(E{row}>=D{row},"✓ Paid",IF(E{row}>0,"Partial","Pending"))'
-        row += 1
-    
-    # Tax Optimization Sheet
-    ws_opt = wb.create_sheet("Optimization")
-    start_row = add_branding_header(ws_opt, "Tax Optimization Strategies", "Maximize Your Tax Savings")
-    
-    ws_opt.column_dimensions['B'].width = 35
-    ws_opt.column_dimensions['C'].width = 20
-    ws_opt.column_dimensions['D'].width = 20
-    ws_opt.column_dimensions['E'].width = 30
-    
-    row = start_row
-    
-    ws_opt[f'B{row}'] = "RETIREMENT CONTRIBUTION OPPORTUNITIES"
-    apply_style(ws_opt[f'B{row}'], styles['section'])
-    ws_opt.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    headers = ['Account Type', '2024 Limit', 'Your Contribution', 'Remaining Room']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_opt[f'{col}{row}'] = h
-        apply_style(ws_opt[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    retirement_accounts = [
-        ('401(k)', 23000, 15000),
-        ('Traditional IRA', 7000, 6500),
-        ('HSA (Self-only)', 4150, 3850),
-        ('SEP-IRA (25% SE income)', '=0.25*\'Tax Estimator\'!C14', 5000),
-    ]
-    
-    for account, limit, contrib in retirement_accounts:
-        ws_opt[f'B{row}'] = account
-        ws_opt[f'C{row}'] = limit
-        ws_opt[f'C{row}'].number_format = '"$"#,##0'
-        ws_opt[f'D{row}'] = contrib
-        ws_opt[f'D{row}'].number_format = '"$"#,##0'
-        ws_opt[f'E{row}'] = f'=C{row}-D{row}'
-        ws_opt[f'E{row}'].number_format = '"$"#,##0'
-        row += 1
-    
-    # Conditional formatting for remaining room
-    ws_opt.conditional_formatting.add(f'E{row-4}:E{row-1}',
-        FormulaRule(formula=[f'E{row-4}>0'], fill=PatternFill(bgColor="C6EFCE")))
-    
-    row += 2
-    ws_opt[f'B{row}'] = "TAX-SAVING STRATEGIES"
-    apply_style(ws_opt[f'B{row}'], styles['section'])
-    ws_opt.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    strategies = [
-        "Max out 401(k) contributions before year-end",
-        "Consider Roth conversions in low-income years",
-        "Bunch charitable donations for itemizing",
-        "Harvest tax losses to offset capital gains",
-        "Time self-employment income across tax years",
-        "Use HSA as stealth retirement account",
-        "Consider Qualified Business Income (QBI) deduction",
-        "Review state tax planning (SALT workarounds)",
+    # Total tax now, then with the 401(k), IRA and HSA each filled to its limit
+    contributions = data['retirement_contributions']
+    limits = CONTRIBUTION_LIMITS.get(data['tax_year'])
+    scenarios = tax_profile_columns([data] * 4)
+    if limits:
+        scenarios['w2_wages'][1] -= max(0, float(limits['401k']) - float(contributions['401k']))
+        scenarios['traditional_ira'][2] += max(0, float(limits['traditional_ira']) - float(contributions['traditional_ira']))
+        scenarios['hsa'][3] += max(0, float(limits['hsa']) - float(contributions['hsa']))
+    scenario_tax = compute_taxes(scenarios)['total_tax']
+    tax_saved = [round(float(scenario_tax[0] - tax), 2) if limits and not np.isnan(tax) else None
+                 for tax in scenario_tax[1:]] + [None]
+    retirement_rows = [
+        ('401(k)', '=INDEX([limits.401k],[lookup.limits])', contributions['401k'], tax_saved[0]),
+        ('Traditional IRA', '=INDEX([limits.ira],[lookup.limits])', contributions['traditional_ira'], tax_saved[1]),
+        ('HSA (Self-only)', '=INDEX([limits.hsa],[lookup.limits])', contributions['hsa'], tax_saved[2]),
+        ('SEP-IRA (25% SE income)', '=0.25*[income.self_employment]', contributions['sep_ira'], tax_saved[3]),
     ]
     
-    for strategy in strategies:
-        ws_opt[f'B{row}'] = f"• {strategy}"
-        ws_opt[f'B{row}'].font = Font(size=11, color=DARK_TEXT)
-        row += 1
+    render_layout(wb, 'tax_planning', {
+        **data,
+        'retirement_rows': retirement_rows,
+        'filing_tables': [(f"{year} {status}", deduction) + gains
+                          for year, status, deduction, gains, _ in tax_tables()],
+        'tax_brackets': list(tax_bracket_rows()),
+        'contribution_limits': [(year, limits['401k'], limits['traditional_ira'], limits['hsa'])
+                                for year, limits in CONTRIBUTION_LIMITS.items()],
+        'state_tables': [(f"{state} {schedule}",) for state, schedule, _ in state_tax_tables()],
+        'state_brackets': list(state_bracket_rows()),
+    })
     
     if "Sheet" in wb.sheetnames:
         del wb["Sheet"]
     
-    wb.save(output_path)
+    save_workbook(wb, output_path)
     print(f"✅ Created: {output_path}")
 
 
 # ============================================================================
 # 3. NET WORTH DASHBOARD
 # ============================================================================
-def create_net_worth_dashboard(output_path):
-    """Create comprehensive net worth tracking dashboard"""
-    wb = Workbook()
-    styles = get_styles()
-    
-    instructions = {
-        "🎯 Overview": [
-            "Track your complete financial picture with assets, liabilities, and net worth over time.",
-            "Set goals and watch your progress with visual charts and trend analysis.",
-            "Update monthly for best results."
-        ],
-        "📝 Getting Started": [
-            "Enter all assets in the 'Assets' sheet (cash, investments, property, etc.)",
-            "Enter all liabilities in the 'Liabilities' sheet (mortgages, loans, credit cards)",
-            "The Dashboard calculates your net worth automatically",
-            "Use 'History' to track changes over time"
-        ],
-        "💡 Pro Tips": [
-            "Update account balances on the same day each month for consistency",
-            "Include ALL assets - even small savings accounts",
-            "Don't forget to include your car's current value (use KBB)",
-            "Review your asset allocation quarterly"
-        ],
-        "📊 Goal Setting": [
-            "Set a 1-year, 5-year, and 10-year net worth goal",
-            "The calculator shows if you're on track",
-            "Adjust savings rate to hit your targets"
-        ]
-    }
-    create_instructions_sheet(wb, "Net Worth Dashboard", instructions)
-    
-    # Dashboard Sheet
-    ws = wb.create_sheet("Dashboard")
-    start_row = add_branding_header(ws, "Net Worth Dashboard", "Your Complete Financial Picture")
-    
-    for col in range(1, 15):
-        ws.column_dimensions[get_column_letter(col)].width = 14
-    ws.column_dimensions['B'].width = 22
-    
-    row = start_row
-    
-    # Net Worth Summary
-    ws[f'B{row}'] = "NET WORTH SUMMARY"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    ws[f'B{row}'] = "Total Assets"
-    ws[f'C{row}'] = "=Assets!I40"
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(size=14, color=ACCENT_GREEN)
-    assets_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "Total Liabilities"
-    ws[f'C{row}'] = "=Liabilities!I35"
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(size=14, color=ACCENT_RED)
-    liabilities_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "NET WORTH"
-    ws[f'B{row}'].font = Font(bold=True, size=16)
-    ws[f'C{row}'] = f'=C{assets_row}-C{liabilities_row}'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(bold=True, size=18, color=HONEY)
-    ws[f'C{row}'].fill = PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
-    net_worth_row = row
-    row += 3
-    
-    # Asset Allocation
-    ws[f'B{row}'] = "ASSET ALLOCATION"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    allocations = [
-        ('Cash & Equivalents', "=Assets!I10", ACCENT_GREEN),
-        ('Investments', "=Assets!I20", HONEY),
-        ('Retirement Accounts', "=Assets!I28", "3498DB"),
-        ('Real Estate', "=Assets!I33", "9B59B6"),
-        ('Other Assets', "=Assets!I38", GRAY_HEADER),
-    ]
-    
-    alloc_start = row
-    for name, formula, color in allocations:
-        ws[f'B{row}'] = name
-        ws[f'C{row}'] = formula
-        ws[f'C{row}'].number_format = '"$"#,##0'
-        ws[f'D{row}'] = f'=IF($C${assets_row}>0,C{row}/$C${assets_row},0)'
-        ws[f'D{row}'].number_format = '0.0%'
-        row += 1
-    alloc_end = row - 1
-    
-    # Add pie chart for allocation
-    chart = PieChart()
-    chart.title = "Asset Allocation"
-    data = Reference(ws, min_col=3, min_row=alloc_start, max_row=alloc_end)
-    labels = Reference(ws, min_col=2, min_row=alloc_start, max_row=alloc_end)
-    chart.add_data(data)
-    chart.set_categories(labels)
-    chart.width = 12
-    chart.height = 10
-    ws.add_chart(chart, 'F8')
-    
-    row += 2
-    
-    # Goals Section
-    ws[f'B{row}'] = "NET WORTH GOALS"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    headers = ['Goal', 'Target', 'Current', 'Progress']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws[f'{col}{row}'] = h
-        apply_style(ws[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    goals = [
+NET_WORTH_SAMPLE_DATA = {
+    # (goal, target)
+    'goals': [
         ('1-Year Goal', 150000),
         ('5-Year Goal', 500000),
         ('10-Year Goal', 1500000),
         ('Financial Independence', 2000000),
-    ]
-    
-    for goal, target in goals:
-        ws[f'B{row}'] = goal
-        ws[f'C{row}'] = target
-        ws[f'C{row}'].number_format = '"$"#,##0'
-        ws[f'D{row}'] = f'=$C${net_worth_row}'
-        ws[f'D{row}'].number_format = '"$"#,##0'
-        ws[f'E{row}'] = f'=MIN(1,D{row}/C{row})'
-        ws[f'E{row}'].number_format = '0%'
-        row += 1
-    
-    # Data bars for progress
-    ws.conditional_formatting.add(f'E{row-4}:E{row-1}',
-        DataBarRule(start_type='num', start_value=0, end_type='num', end_value=1, color=HONEY))
-    
-    # Assets Sheet
-    ws_assets = wb.create_sheet("Assets")
-    start_row = add_branding_header(ws_assets, "Asset Tracker", "Everything You Own")
-    
-    for col in range(1, 8):
-        ws_assets.column_dimensions[get_column_letter(col)].width = 16
-    ws_assets.column_dimensions['B'].width = 28
-    
-    row = start_row
-    
-    # Cash & Equivalents
-    ws_assets[f'B{row}'] = "CASH & EQUIVALENTS"
-    apply_style(ws_assets[f'B{row}'], styles['section'])
-    ws_assets.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    headers = ['Account', 'Institution', 'Balance', 'Notes']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_assets[f'{col}{row}'] = h
-        apply_style(ws_assets[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    cash_accounts = [
+    ],
+    # (account, institution, balance)
+    'cash_accounts': [
         ('Checking Account', 'Chase', 8500),
         ('Savings Account', 'Marcus', 25000),
         ('Money Market', 'Fidelity', 15000),
         ('Emergency Fund', 'Ally', 30000),
-    ]
-    
-    cash_start = row
-    for account, inst, balance in cash_accounts:
-        ws_assets[f'B{row}'] = account
-        ws_assets[f'C{row}'] = inst
-        ws_assets[f'D{row}'] = balance
-        ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-        row += 1
-    
-    for _ in range(3):
-        for i in range(4):
-            col = get_column_letter(2 + i)
-            apply_style(ws_assets[f'{col}{row}'], styles['data'])
-        row += 1
-    cash_end = row - 1
-    
-    ws_assets[f'B{row}'] = "Cash Subtotal"
-    ws_assets[f'D{row}'] = f'=SUM(D{cash_start}:D{cash_end})'
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_assets[f'D{row}'].font = Font(bold=True)
-    ws_assets['I10'] = f'=D{row}'
-    row += 2
-    
-    # Investments
-    ws_assets[f'B{row}'] = "INVESTMENTS (Taxable)"
-    apply_style(ws_assets[f'B{row}'], styles['section'])
-    ws_assets.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_assets[f'{col}{row}'] = h
-        apply_style(ws_assets[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    investments = [
+    ],
+    'investments': [
         ('Brokerage Account', 'Fidelity', 85000),
         ('Stock Holdings', 'TD Ameritrade', 25000),
         ('Index Funds', 'Vanguard', 50000),
-    ]
-    
-    inv_start = row
-    for account, inst, balance in investments:
-        ws_assets[f'B{row}'] = account
-        ws_assets[f'C{row}'] = inst
-        ws_assets[f'D{row}'] = balance
-        ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-        row += 1
-    
-    for _ in range(3):
-        for i in range(4):
-            col = get_column_letter(2 + i)
-            apply_style(ws_assets[f'{col}{row}'], styles['data'])
-        row += 1
-    inv_end = row - 1
-    
-    ws_assets[f'B{row}'] = "Investment Subtotal"
-    ws_assets[f'D{row}'] = f'=SUM(D{inv_start}:D{inv_end})'
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_assets[f'D{row}'].font = Font(bold=True)
-    ws_assets['I20'] = f'=D{row}'
-    row += 2
-    
-    # Retirement Accounts
-    ws_assets[f'B{row}'] = "RETIREMENT ACCOUNTS"
-    apply_style(ws_assets[f'B{row}'], styles['section'])
-    ws_assets.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_assets[f'{col}{row}'] = h
-        apply_style(ws_assets[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    retirement = [
+    ],
+    'retirement_accounts': [
         ('401(k)', 'Employer Plan', 125000),
         ('Roth IRA', 'Vanguard', 45000),
         ('Traditional IRA', 'Fidelity', 30000),
         ('HSA', 'HealthEquity', 8000),
-    ]
-    
-    ret_start = row
-    for account, inst, balance in retirement:
-        ws_assets[f'B{row}'] = account
-        ws_assets[f'C{row}'] = inst
-        ws_assets[f'D{row}'] = balance
-        ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-        row += 1
-    ret_end = row - 1
-    
-    ws_assets[f'B{row}'] = "Retirement Subtotal"
-    ws_assets[f'D{row}'] = f'=SUM(D{ret_start}:D{ret_end})'
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_assets[f'D{row}'].font = Font(bold=True)
-    ws_assets['I28'] = f'=D{row}'
-    row += 2
-    
-    # Real Estate
-    ws_assets[f'B{row}'] = "REAL ESTATE"
-    apply_style(ws_assets[f'B{row}'], styles['section'])
-    ws_assets.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    ws_assets[f'B{row}'] = "Primary Residence"
-    ws_assets[f'D{row}'] = 450000
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    row += 1
-    ws_assets[f'B{row}'] = "Rental Property"
-    ws_assets[f'D{row}'] = 0
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    row += 1
-    
-    ws_assets[f'B{row}'] = "Real Estate Subtotal"
-    ws_assets[f'D{row}'] = f'=SUM(D{row-2}:D{row-1})'
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_assets[f'D{row}'].font = Font(bold=True)
-    ws_assets['I33'] = f'=D{row}'
-    row += 2
-    
-    # Other Assets
-    ws_assets[f'B{row}'] = "OTHER ASSETS"
-    apply_style(ws_assets[f'B{row}'], styles['section'])
-    ws_assets.merge_cells(f'B{row}:E{row}')
-    row += 1
-    
-    ws_assets[f'B{row}'] = "Vehicles"
-    ws_assets[f'D{row}'] = 28000
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    row += 1
-    ws_assets[f'B{row}'] = "Other (Jewelry, Collectibles)"
-    ws_assets[f'D{row}'] = 5000
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    row += 1
-    
-    ws_assets[f'B{row}'] = "Other Subtotal"
-    ws_assets[f'D{row}'] = f'=SUM(D{row-2}:D{row-1})'
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_assets[f'D{row}'].font = Font(bold=True)
-    ws_assets['I38'] = f'=D{row}'
-    row += 2
-    
-    # Total Assets
-    ws_assets[f'B{row}'] = "TOTAL ASSETS"
-    ws_assets[f'B{row}'].font = Font(bold=True, size=16, color=HONEY)
-    ws_assets[f'D{row}'] = '=I10+I20+I28+I33+I38'
-    ws_assets[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_assets[f'D{row}'].font = Font(bold=True, size=16)
-    ws_assets[f'D{row}'].fill = PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
-    # Store total in a separate reference cell
-    ws_assets['I40'] = f'=D{row}'
-    
-    # Liabilities Sheet
-    ws_liab = wb.create_sheet("Liabilities")
-    start_row = add_branding_header(ws_liab, "Liability Tracker", "Everything You Owe")
-    
-    for col in range(1, 8):
-        ws_liab.column_dimensions[get_column_letter(col)].width = 16
-    ws_liab.column_dimensions['B'].width = 28
-    
-    row = start_row
-    
-    # Mortgage
-    ws_liab[f'B{row}'] = "MORTGAGE"
-    apply_style(ws_liab[f'B{row}'], styles['section'])
-    ws_liab.merge_cells(f'B{row}:F{row}')
-    row += 1
-    
-    headers = ['Property', 'Lender', 'Balance', 'Rate', 'Payment']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_liab[f'{col}{row}'] = h
-        apply_style(ws_liab[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    ws_liab[f'B{row}'] = "Primary Residence"
-    ws_liab[f'C{row}'] = "Wells Fargo"
-    ws_liab[f'D{row}'] = 320000
-    ws_liab[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_liab[f'E{row}'] = 0.0625
-    ws_liab[f'E{row}'].number_format = '0.00%'
-    ws_liab[f'F{row}'] = 2100
-    ws_liab[f'F{row}'].number_format = '"$"#,##0.00'
-    mortgage_row = row
-    row += 2
-    
-    # Auto Loans
-    ws_liab[f'B{row}'] = "AUTO LOANS"
-    apply_style(ws_liab[f'B{row}'], styles['section'])
-    ws_liab.merge_cells(f'B{row}:F{row}')
-    row += 1
-    
-    headers = ['Vehicle', 'Lender', 'Balance', 'Rate', 'Payment']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_liab[f'{col}{row}'] = h
-        apply_style(ws_liab[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    auto_start = row
-    for _ in range(2):
-        for i in range(5):
-            col = get_column_letter(2 + i)
-            apply_style(ws_liab[f'{col}{row}'], styles['data'])
-        row += 1
-    auto_end = row - 1
-    
-    ws_liab[f'B{row}'] = "Auto Subtotal"
-    ws_liab[f'D{row}'] = f'=SUM(D{auto_start}:D{auto_end})'
-    ws_liab[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_liab[f'D{row}'].font = Font(bold=True)
-    auto_total_row = row
-    row += 2
-    
-    # Student Loans
-    ws_liab[f'B{row}'] = "STUDENT LOANS"
-    apply_style(ws_liab[f'B{row}'], styles['section'])
-    ws_liab.merge_cells(f'B{row}:F{row}')
-    row += 1
-    
-    headers = ['Loan', 'Servicer', 'Balance', 'Rate', 'Payment']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_liab[f'{col}{row}'] = h
-        apply_style(ws_liab[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    student_start = row
-    ws_liab[f'B{row}'] = "Federal Loans"
-    ws_liab[f'C{row}'] = "Nelnet"
-    ws_liab[f'D{row}'] = 25000
-    ws_liab[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_liab[f'E{row}'] = 0.055
-    ws_liab[f'E{row}'].number_format = '0.00%'
-    ws_liab[f'F{row}'] = 280
-    ws_liab[f'F{row}'].number_format = '"$"#,##0.00'
-    row += 1
-    
-    for _ in range(2):
-        for i in range(5):
-            col = get_column_letter(2 + i)
-            apply_style(ws_liab[f'{col}{row}'], styles['data'])
-        row += 1
-    student_end = row - 1
-    
-    ws_liab[f'B{row}'] = "Student Loan Subtotal"
-    ws_liab[f'D{row}'] = f'=SUM(D{student_start}:D{student_end})'
-    ws_liab[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_liab[f'D{row}'].font = Font(bold=True)
-    student_total_row = row
-    row += 2
-    
-    # Credit Cards
-    ws_liab[f'B{row}'] = "CREDIT CARDS"
-    apply_style(ws_liab[f'B{row}'], styles['section'])
-    ws_liab.merge_cells(f'B{row}:F{row}')
-    row += 1
-    
-    headers = ['Card', 'Issuer', 'Balance', 'Rate', 'Limit']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_liab[f'{col}{row}'] = h
-        apply_style(ws_liab[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    cc_start = row
-    for _ in range(3):
-        for i in range(5):
-            col = get_column_letter(2 + i)
-            apply_style(ws_liab[f'{col}{row}'], styles['data'])
-        row += 1
-    cc_end = row - 1
-    
-    ws_liab[f'B{row}'] = "Credit Card Subtotal"
-    ws_liab[f'D{row}'] = f'=SUM(D{cc_start}:D{cc_end})'
-    ws_liab[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_liab[f'D{row}'].font = Font(bold=True)
-    cc_total_row = row
-    row += 2
-    
-    # Total Liabilities
-    ws_liab[f'B{row}'] = "TOTAL LIABILITIES"
-    ws_liab[f'B{row}'].font = Font(bold=True, size=16, color=ACCENT_RED)
-    ws_liab[f'D{row}'] = f'=D{mortgage_row}+D{auto_total_row}+D{student_total_row}+D{cc_total_row}'
-    ws_liab[f'D{row}'].number_format = '"$"#,##0.00'
-    ws_liab[f'D{row}'].font = Font(bold=True, size=16)
-    ws_liab[f'D{row}'].fill = PatternFill(start_color="FFCCCB", end_color="FFCCCB", fill_type='solid')
-    ws_liab['I35'] = f'=D{row}'
-    
-    # History Sheet
-    ws_hist = wb.create_sheet("History")
-    start_row = add_branding_header(ws_hist, "Net Worth History", "Track Your Progress Over Time")
-    
-    for col in range(1, 10):
-        ws_hist.column_dimensions[get_column_letter(col)].width = 14
-    
-    row = start_row
-    
-    headers = ['Date', 'Assets', 'Liabilities', 'Net Worth', 'Change', '% Change']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_hist[f'{col}{row}'] = h
-        apply_style(ws_hist[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    # Sample historical data
-    history = [
+    ],
+    'real_estate': {'primary_residence': 450000, 'rental_property': 0},
+    'other_assets': {'vehicles': 28000, 'other': 5000},
+    # (name, lender, balance, rate, payment) -- credit cards use limit for payment
+    'mortgage': ('Primary Residence', 'Wells Fargo', 320000, 0.0625, 2100),
+    'auto_loans': [],
+    'student_loans': [
+        ('Federal Loans', 'Nelnet', 25000, 0.055, 280),
+    ],
+    'credit_cards': [],
+    # (month label, assets, liabilities)
+    'history': [
         ('Jan 2024', 420000, 365000),
         ('Feb 2024', 428000, 362000),
         ('Mar 2024', 435000, 359000),
         ('Apr 2024', 442000, 356000),
         ('May 2024', 450000, 352000),
         ('Jun 2024', 460000, 348000),
-    ]
-    
-    hist_start = row
-    for i, (date, assets, liab) in enumerate(history):
-        ws_hist[f'B{row}'] = date
-        ws_hist[f'C{row}'] = assets
-        ws_hist[f'C{row}'].number_format = '"$"#,##0'
-        ws_hist[f'D{row}'] = liab
-        ws_hist[f'D{row}'].number_format = '"$"#,##0'
-        ws_hist[f'E{row}'] = f'=C{row}-D{row}'
-        ws_hist[f'E{row}'].number_format = '"$"#,##0'
-        if i == 0:
-            ws_hist[f'F{row}'] = 0
-            ws_hist[f'G{row}'] = 0
+    ],
+    # CSV of (date, assets, liabilities) snapshots; replaces history when set
+    'history_csv': None,
+}
+
+def _parse_amount(text):
+    """Dollar amount from a CSV field such as '$1,234.50'"""
+    return float(text.replace('$', '').replace(',', '') or 0)
+
+def month_end_history(path):
+    """Stream a balance snapshot CSV into month-end (label, assets, liabilities) rows
+
+    Snapshots can be daily or monthly and in any order; only the latest one in
+    each month is kept, so memory grows with months rather than snapshots.
+    """
+    month_ends = {}
+    path = os.path.expanduser(path)
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        try:
+            columns = [header.index(name) for name in ('date', 'assets', 'liabilities')]
+        except ValueError:
+            raise ValueError(f"{path}: expected date, assets and liabilities columns") from None
+        date_col, assets_col, liab_col = columns
+        for line_no, fields in enumerate(reader, 2):
+            if not fields:
+                continue
+            try:
+                day = date.fromisoformat(fields[date_col].strip()[:10])
+                snapshot = (day, _parse_amount(fields[assets_col]), _parse_amount(fields[liab_col]))
+            except (IndexError, ValueError):
+                raise ValueError(f"{path}:{line_no}: bad snapshot {fields!r}") from None
+            month = (day.year, day.month)
+            current = month_ends.get(month)
+            if current is None or day >= current[0]:
+                month_ends[month] = snapshot
+
+    for month in sorted(month_ends):
+        day, assets, liab = month_ends[month]
+        yield day.strftime('%b %Y'), assets, liab
+
+NET_WORTH_SERIES_CAPACITY = 128  # months; doubles when full
+
+class NetWorthSeries:
+    """Monthly net worth snapshots in typed columns, with trend metrics kept
+    current as each month is appended
+
+    Columns live in one preallocated float64 array that doubles when full, so
+    append() is amortized O(1) and only looks at the rows it needs: the
+    previous month, the month a year back and the first month. goal_progress
+    holds the share of each (goal, target) reached by the latest month, as the
+    Dashboard's goals table shows it. The NET WORTH TREND block is written
+    from mom_*, yoy_* and cagr.
+    """
+
+    ASSETS, LIABILITIES, NET_WORTH, CHANGE, PCT_CHANGE = range(5)
+
+    def __init__(self, goals=(), capacity=NET_WORTH_SERIES_CAPACITY):
+        self.labels = []
+        self.size = 0
+        self._columns = np.empty((5, capacity))
+        self.mom_change = self.mom_pct = 0.0
+        self.yoy_change = self.yoy_pct = 0.0
+        self.cagr = 0.0
+        self.goal_targets = np.array([target for _, target in goals], dtype=float)
+        self.goal_progress = np.zeros(len(self.goal_targets))
+
+    def __len__(self):
+        return self.size
+
+    def column(self, index):
+        """View of one column (e.g. NetWorthSeries.NET_WORTH) over the stored months"""
+        return self._columns[index, :self.size]
+
+    def rows(self):
+        """(label, assets, liabilities, net worth, change, % change) per month"""
+        for label, values in zip(self.labels, self._columns[:, :self.size].T.tolist()):
+            yield (label, *values)
+
+    def append(self, label, assets, liabilities):
+        """Add the next month and update the rolling metrics"""
+        n = self.size
+        if n == self._columns.shape[1]:
+            grown = np.empty((5, 2 * n))
+            grown[:, :n] = self._columns
+            self._columns = grown
+        net_worth = assets - liabilities
+        net = self._columns[self.NET_WORTH]
+
+        if n:
+            previous = net[n - 1]
+            self.mom_change = net_worth - previous
+            self.mom_pct = self.mom_change / previous if previous else 0.0
+        if n >= 12:
+            year_ago = net[n - 12]
+            self.yoy_change = net_worth - year_ago
+            self.yoy_pct = self.yoy_change / year_ago if year_ago else 0.0
+        first = net[0] if n else net_worth
+        # Growth rates are undefined across a change of sign
+        if n and first > 0 and net_worth > 0:
+            self.cagr = (net_worth / first) ** (12 / n) - 1
         else:
-            ws_hist[f'F{row}'] = f'=E{row}-E{row-1}'
-            ws_hist[f'G{row}'] = f'=IF(E{row-1}<>0,F{row}/E{row-1},0)'
-        ws_hist[f'F{row}'].number_format = '"$"#,##0'
-        ws_hist[f'G{row}'].number_format = '0.0%'
-        row += 1
-    hist_end = row - 1
-    
-    # Add empty rows for future entries
-    for _ in range(12):
-        ws_hist[f'E{row}'] = f'=IF(C{row}="","",C{row}-D{row})'
-        ws_hist[f'F{row}'] = f'=IF(E{row}="","",E{row}-E{row-1})'
-        ws_hist[f'G{row}'] = f'=IF(OR(E{row}="",E{row-1}=0),"",F{row}/E{row-1})'
-        for i in range(6):
-            col = get_column_letter(2 + i)
-            apply_style(ws_hist[f'{col}{row}'], styles['data'])
-        row += 1
-    
-    # Add trend chart
-    chart = LineChart()
-    chart.title = "Net Worth Over Time"
-    chart.style = 10
-    chart.y_axis.title = "Amount ($)"
-    chart.x_axis.title = "Month"
-    chart.width = 18
-    chart.height = 10
-    
-    data = Reference(ws_hist, min_col=5, min_row=hist_start-1, max_row=hist_end)
-    cats = Reference(ws_hist, min_col=2, min_row=hist_start, max_row=hist_end)
-    chart.add_data(data, titles_from_data=True)
-    chart.set_categories(cats)
-    
-    ws_hist.add_chart(chart, f'B{row + 2}')
-    
-    if "Sheet" in wb.sheetnames:
-        del wb["Sheet"]
-    
-    wb.save(output_path)
-    print(f"✅ Created: {output_path}")
+            self.cagr = 0.0
+        # As the goals table's IF(target>0,MIN(1,current/target),0)
+        targets = self.goal_targets
+        self.goal_progress = np.minimum(1.0, np.divide(net_worth, targets, out=np.zeros_like(targets),
+                                                       where=targets > 0))
 
+        self._columns[:, n] = (assets, liabilities, net_worth, self.mom_change, self.mom_pct)
+        self.labels.append(label)
+        self.size = n + 1
 
-# ============================================================================
-# 4. DEBT DESTRUCTION PLANNER
-# ============================================================================
-def create_debt_destruction_planner(output_path):
-    """Create comprehensive debt payoff planner"""
+    @classmethod
+    def from_rows(cls, rows, goals=()):
+        """Series built by appending (label, assets, liabilities) rows in order"""
+        series = cls(goals)
+        for label, assets, liabilities in rows:
+            series.append(label, assets, liabilities)
+        return series
+
+NET_WORTH_LAYOUT = [
+    {'sheet': "Dashboard", 'title': "Net Worth Dashboard", 'subtitle': "Your Complete Financial Picture",
+     'widths': {'A:N': 14, 'B': 22},
+     'blocks': [
+        {'kind': 'section', 'text': "NET WORTH SUMMARY", 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'summary',
+         'items': [
+            ('total_assets', "Total Assets", "=[assets.total]", '"$"#,##0.00',
+             {'value_style': {'font': Font(size=14, color=ACCENT_GREEN)}}),
+            ('total_liabilities', "Total Liabilities", "=[liabilities.total]", '"$"#,##0.00',
+             {'value_style': {'font': Font(size=14, color=ACCENT_RED)}}),
+            ('net_worth', "NET WORTH", "=[summary.total_assets]-[summary.total_liabilities]", '"$"#,##0.00',
+             {'label_style': {'font': Font(bold=True, size=16)},
+              'value_style': {'font': Font(bold=True, size=18, color=HONEY),
+                              'fill': PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT,
+                                                  fill_type='solid')}}),
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "ASSET ALLOCATION", 'merge_to': 'E'},
+        {'kind': 'table', 'name': 'allocation', 'header': False, 'total_offset': None,
+         'records': [
+            ('Cash & Equivalents', "=[cash.subtotal]"),
+            ('Investments', "=[investments.subtotal]"),
+            ('Retirement Accounts', "=[retirement.subtotal]"),
+            ('Real Estate', "=[real_estate.subtotal]"),
+            ('Other Assets', "=[other_assets.subtotal]"),
+         ],
+         'columns': [
+            {'key': 'category', 'value': 0},
+            {'key': 'amount', 'value': 1, 'resolve': True, 'format': '"$"#,##0'},
+            {'key': 'share', 'formula': '=IF([$summary.total_assets]>0,{amount}/[$summary.total_assets],0)',
+             'format': '0.0%'},
+         ]},
+        {'kind': 'chart', 'type': 'pie', 'title': "Asset Allocation", 'table': 'allocation',
+         'columns': ['amount'], 'categories': 'category', 'width': 12, 'anchor': 'F8'},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "NET WORTH GOALS", 'merge_to': 'E'},
+        # Progress at the latest month of history; without any, the live NET WORTH above
+        {'kind': 'table', 'name': 'goals', 'data': 'goal_rows', 'total_offset': None,
+         'columns': [
+            {'key': 'goal', 'header': "Goal", 'value': 0},
+            {'key': 'target', 'header': "Target", 'value': 1, 'format': '"$"#,##0'},
+            {'key': 'current', 'header': "Current", 'value': 2, 'formula': '=[$summary.net_worth]',
+             'format': '"$"#,##0'},
+            {'key': 'progress', 'header': "Progress", 'value': 3,
+             'formula': '=IF({target}>0,MIN(1,{current}/{target}),0)', 'format': '0%'},
+         ],
+         'rules': [('databar', 'goals.progress', 0, 1, HONEY)]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "NET WORTH TREND", 'merge_to': 'E'},
+        {'kind': 'table', 'name': 'trend', 'header': False, 'rows': 'trend_rows', 'total_offset': None},
+     ]},
+    {'sheet': "Assets", 'title': "Asset Tracker", 'subtitle': "Everything You Own",
+     'widths': {'A:G': 16, 'B': 28},
+     'blocks': [
+        {'kind': 'section', 'text': "CASH & EQUIVALENTS", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'table', 'name': 'cash', 'data': 'cash_accounts', 'blank_rows': 3,
+         'columns': [
+            {'key': 'account', 'header': "Account", 'value': 0},
+            {'key': 'institution', 'header': "Institution", 'value': 1},
+            {'key': 'balance', 'header': "Balance", 'value': 2, 'format': '"$"#,##0.00',
+             'total': ('subtotal', '=SUM({range})')},
+            {'key': 'notes', 'header': "Notes"},
+         ],
+         'total_offset': 1, 'total_label': "Cash Subtotal", 'total_label_style': None, 'total_style': 'subtotal'},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "INVESTMENTS (Taxable)", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'table', 'name': 'investments', 'data': 'investments', 'blank_rows': 3,
+         'columns': [
+            {'key': 'account', 'header': "Account", 'value': 0},
+            {'key': 'institution', 'header': "Institution", 'value': 1},
+            {'key': 'balance', 'header': "Balance", 'value': 2, 'format': '"$"#,##0.00',
+             'total': ('subtotal', '=SUM({range})')},
+            {'key': 'notes', 'header': "Notes"},
+         ],
+         'total_offset': 1, 'total_label': "Investment Subtotal", 'total_label_style': None,
+         'total_style': 'subtotal'},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "RETIREMENT ACCOUNTS", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'table', 'name': 'retirement', 'data': 'retirement_accounts',
+         'columns': [
+            {'key': 'account', 'header': "Account", 'value': 0},
+            {'key': 'institution', 'header': "Institution", 'value': 1},
+            {'key': 'balance', 'header': "Balance", 'value': 2, 'format': '"$"#,##0.00',
+             'total': ('subtotal', '=SUM({range})')},
+            {'key': 'notes', 'header': "Notes"},
+         ],
+         'total_offset': 1, 'total_label': "Retirement Subtotal", 'total_label_style': None,
+         'total_style': 'subtotal'},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "REAL ESTATE", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'real_estate', 'value_col': 'D',
+         'items': [
+            ('primary_residence', "Primary Residence", ('real_estate', 'primary_residence'), '"$"#,##0.00'),
+            ('rental_property', "Rental Property", ('real_estate', 'rental_property'), '"$"#,##0.00'),
+            ('subtotal', "Real Estate Subtotal", "=SUM([real_estate.primary_residence]:[real_estate.rental_property])",
+             '"$"#,##0.00', {'value_style': 'subtotal'}),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "OTHER ASSETS", 'rows': 1, 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'other_assets', 'value_col': 'D',
+         'items': [
+            ('vehicles', "Vehicles", ('other_assets', 'vehicles'), '"$"#,##0.00'),
+            ('other', "Other (Jewelry, Collectibles)", ('other_assets', 'other'), '"$"#,##0.00'),
+            ('subtotal', "Other Subtotal", "=SUM([other_assets.vehicles]:[other_assets.other])", '"$"#,##0.00',
+             {'value_style': 'subtotal'}),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'fields', 'name': 'assets', 'value_col': 'D',
+         'items': [
+            ('total', "TOTAL ASSETS",
+             "=[cash.subtotal]+[investments.subtotal]+[retirement.subtotal]+[real_estate.subtotal]"
+             "+[other_assets.subtotal]", '"$"#,##0.00',
+             {'label_style': {'font': Font(bold=True, size=16, color=HONEY)},
+              'value_style': {'font': Font(bold=True, size=16),
+                              'fill': PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT,
+                                                  fill_type='solid')}}),
+         ]},
+     ]},
+    {'sheet': "Liabilities", 'title': "Liability Tracker", 'subtitle': "Everything You Owe",
+     'widths': {'A:G': 16, 'B': 28},
+     'blocks': [
+        # (name, lender, balance, rate, payment) rows; credit cards have their limit for payment
+        {'kind': 'section', 'text': "MORTGAGE", 'rows': 1, 'merge_to': 'F'},
+        {'kind': 'table', 'name': 'mortgage', 'data': 'mortgages', 'total_offset': None,
+         'columns': [
+            {'key': 'property', 'header': "Property", 'value': 0},
+            {'key': 'lender', 'header': "Lender", 'value': 1},
+            {'key': 'balance', 'header': "Balance", 'value': 2, 'format': '"$"#,##0.00'},
+            {'key': 'rate', 'header': "Rate", 'value': 3, 'format': '0.00%'},
+            {'key': 'payment', 'header': "Payment", 'value': 4, 'format': '"$"#,##0.00'},
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "AUTO LOANS", 'rows': 1, 'merge_to': 'F'},
+        {'kind': 'table', 'name': 'auto_loans', 'data': 'auto_loans', 'blank_rows': 2,
+         'columns': [
+            {'key': 'vehicle', 'header': "Vehicle", 'value': 0},
+            {'key': 'lender', 'header': "Lender", 'value': 1},
+            {'key': 'balance', 'header': "Balance", 'value': 2, 'format': '"$"#,##0.00',
+             'total': ('subtotal', '=SUM({range})')},
+            {'key': 'rate', 'header': "Rate", 'value': 3, 'format': '0.00%'},
+            {'key': 'payment', 'header': "Payment", 'value': 4, 'format': '"$"#,##0.00'},
+         ],
+         'total_offset': 1, 'total_label': "Auto Subtotal", 'total_label_style': None, 'total_style': 'subtotal'},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "STUDENT LOANS", 'rows': 1, 'merge_to': 'F'},
+        {'kind': 'table', 'name': 'student_loans', 'data': 'student_loans', 'blank_rows': 2,
+         'columns': [
+            {'key': 'loan', 'header': "Loan", 'value': 0},
+            {'key': 'servicer', 'header': "Servicer", 'value': 1},
+            {'key': 'balance', 'header': "Balance", 'value': 2, 'format': '"$"#,##0.00',
+             'total': ('subtotal', '=SUM({range})')},
+            {'key': 'rate', 'header': "Rate", 'value': 3, 'format': '0.00%'},
+            {'key': 'payment', 'header': "Payment", 'value': 4, 'format': '"$"#,##0.00'},
+         ],
+         'total_offset': 1, 'total_label': "Student Loan Subtotal", 'total_label_style': None,
+         'total_style': 'subtotal'},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'section', 'text': "CREDIT CARDS", 'rows': 1, 'merge_to': 'F'},
+        {'kind': 'table', 'name': 'credit_cards', 'data': 'credit_cards', 'blank_rows': 3,
+         'columns': [
+            {'key': 'card', 'header': "Card", 'value': 0},
+            {'key': 'issuer', 'header': "Issuer", 'value': 1},
+            {'key': 'balance', 'header': "Balance", 'value': 2, 'format': '"$"#,##0.00',
+             'total': ('subtotal', '=SUM({range})')},
+            {'key': 'rate', 'header': "Rate", 'value': 3, 'format': '0.00%'},
+            {'key': 'limit', 'header': "Limit", 'value': 4, 'format': '"$"#,##0.00'},
+         ],
+         'total_offset': 1, 'total_label': "Credit Card Subtotal", 'total_label_style': None,
+         'total_style': 'subtotal'},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'fields', 'name': 'liabilities', 'value_col': 'D',
+         'items': [
+            ('total', "TOTAL LIABILITIES",
+             "=[mortgage.balance]+[auto_loans.subtotal]+[student_loans.subtotal]+[credit_cards.subtotal]",
+             '"$"#,##0.00',
+             {'label_style': {'font': Font(bold=True, size=16, color=ACCENT_RED)},
+              'value_style': {'font': Font(bold=True, size=16),
+                              'fill': PatternFill(start_color="FFCCCB", end_color="FFCCCB", fill_type='solid')}}),
+         ]},
+     ]},
+    {'sheet': "History", 'title': "Net Worth History", 'subtitle': "Track Your Progress Over Time",
+     'widths': {'A:I': 14},
+     'blocks': [
+        # Imported months are values from NetWorthSeries; typed months keep their formulas
+        {'kind': 'table', 'name': 'history', 'data': 'history_rows', 'count': 'months', 'blank_rows': 12,
+         'total_offset': None,
+         'columns': [
+            {'key': 'date', 'header': "Date", 'value': 0},
+            {'key': 'assets', 'header': "Assets", 'value': 1, 'format': '"$"#,##0'},
+            {'key': 'liabilities', 'header': "Liabilities", 'value': 2, 'format': '"$"#,##0'},
+            {'key': 'net', 'header': "Net Worth", 'value': 3, 'formula': '={assets}-{liabilities}',
+             'blank_formula': '=IF({assets}="","",{assets}-{liabilities})', 'format': '"$"#,##0'},
+            {'key': 'change', 'header': "Change", 'value': 4, 'formula': '={net}-{prev[net]}',
+             'blank_formula': '=IF({net}="","",{net}-{prev[net]})', 'format': '"$"#,##0'},
+            {'key': 'pct_change', 'header': "% Change", 'value': 5,
+             'formula': '=IF({prev[net]}<>0,{change}/{prev[net]},0)',
+             'blank_formula': '=IF(OR({net}="",{prev[net]}=0),"",{change}/{prev[net]})', 'format': '0.0%'},
+         ]},
+        {'kind': 'chart', 'title': "Net Worth Over Time", 'y_title': "Amount ($)", 'x_title': "Month",
+         'table': 'history', 'columns': ['net'], 'categories': 'date'},
+     ]},
+]
+
+def create_net_worth_dashboard(output_path, data=None):
+    """Create comprehensive net worth tracking dashboard"""
+    data = merge_profile(NET_WORTH_SAMPLE_DATA, data)
     wb = Workbook()
-    styles = get_styles()
     
     instructions = {
         "🎯 Overview": [
-            "This Debt Destruction Planner helps you become debt-free faster.",
-            "Compare Avalanche (highest interest first) vs Snowball (smallest balance first) methods.",
-            "See exactly how much you'll save and when you'll be debt-free."
+            "Track your complete financial picture with assets, liabilities, and net worth over time.",
+            "Set goals and watch your progress with visual charts and trend analysis.",
+            "Update monthly for best results."
         ],
         "📝 Getting Started": [
-            "Enter all your debts in the 'Debt List' sheet",
-            "Set your total monthly payment budget",
-            "The 'Comparison' sheet shows both strategies side-by-side",
-            "Use 'Payoff Schedule' to track your progress"
+            "Enter all assets in the 'Assets' sheet (cash, investments, property, etc.)",
+            "Enter all liabilities in the 'Liabilities' sheet (mortgages, loans, credit cards)",
+            "The Dashboard calculates your net worth automatically",
+            "Use 'History' to track changes over time"
         ],
-        "💡 Strategy Guide": [
-            "AVALANCHE: Pay minimum on all, extra to highest rate. Saves the most money.",
-            "SNOWBALL: Pay minimum on all, extra to smallest balance. Psychological wins.",
-            "HYBRID: Start with snowball for momentum, switch to avalanche later."
+        "💡 Pro Tips": [
+            "Update account balances on the same day each month for consistency",
+            "Include ALL assets - even small savings accounts",
+            "Don't forget to include your car's current value (use KBB)",
+            "Review your asset allocation quarterly"
         ],
-        "🔥 Motivation Tips": [
-            "Post your debt-free date somewhere visible",
-            "Celebrate each debt payoff (but not with spending!)",
-            "Track your total interest saved - it adds up fast",
-            "Every extra dollar toward debt accelerates your timeline"
+        "📊 Goal Setting": [
+            "Set a 1-year, 5-year, and 10-year net worth goal",
+            "The calculator shows if you're on track",
+            "Adjust savings rate to hit your targets"
         ]
     }
-    create_instructions_sheet(wb, "Debt Destruction Planner", instructions)
-    
-    # Debt List Sheet
-    ws = wb.create_sheet("Debt List")
-    start_row = add_branding_header(ws, "Debt Destruction Planner", "List All Your Debts")
-    
-    for col in range(1, 12):
-        ws.column_dimensions[get_column_letter(col)].width = 14
-    ws.column_dimensions['B'].width = 24
-    
-    row = start_row
-    
-    # Settings
-    ws[f'B{row}'] = "PAYOFF SETTINGS"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    ws[f'B{row}'] = "Total Monthly Budget"
-    ws[f'C{row}'] = 1500
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].fill = PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
-    budget_cell = f'C{row}'
-    row += 1
-    
-    ws[f'B{row}'] = "Min Payments Total"
-    ws[f'C{row}'] = '=SUM(F14:F25)'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    min_payment_cell = f'C{row}'
-    row += 1
+    create_instructions_sheet(wb, "Net Worth Dashboard", instructions)
     
-    ws[f'B{row}'] = "Extra Payment Available"
-    ws[f'C{row}'] = f'={budget_cell}-{min_payment_cell}'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(bold=True, color=ACCENT_GREEN)
-    row += 3
+    # Imported balances are a record, not inputs: the series computes each
+    # month's change so the History sheet gets values rather than formulas.
+    # Hand-typed months keep their formulas, but both feed the trend block
+    # and the goals table.
+    imported = bool(data['history_csv'])
+    if imported:
+        history = NetWorthSeries.from_rows(month_end_history(data['history_csv']), data['goals'])
+        history_rows = history.rows
+    else:
+        history = NetWorthSeries.from_rows(data['history'], data['goals'])
+        history_rows = [(label, assets, liab, None, None if i else 0, None if i else 0)
+                        for i, (label, assets, liab) in enumerate(data['history'])]
+    months = len(history)
+    
+    # Goal progress is measured at the latest month of history, straight
+    # from the series; without any history the table's formulas follow the
+    # live NET WORTH
+    if months:
+        latest = history.column(history.NET_WORTH)[-1].item()
+        goal_rows = [(goal, target, latest, progress)
+                     for progress, (goal, target) in zip(history.goal_progress.tolist(), data['goals'])]
+    else:
+        goal_rows = [(goal, target, None, None) for goal, target in data['goals']]
+    
+    # Rolling metrics from the series
+    money = {'number_format': '"$"#,##0'}
+    percent = {'number_format': '0.0%'}
+    trend_rows = [["Latest Month", history.labels[-1] if months else None]]
+    for label, needed, change, pct_change in (("Month-over-Month", 2, history.mom_change, history.mom_pct),
+                                              ("Year-over-Year", 13, history.yoy_change, history.yoy_pct)):
+        if months >= needed:
+            trend_rows.append([label, (change, money), (pct_change, percent)])
+        else:
+            trend_rows.append([label, ("n/a", money), (None, percent)])
+    trend_rows.append(["Annual Growth (CAGR)", (history.cagr if months >= 2 else "n/a", percent)])
     
-    # Debt Entry
-    ws[f'B{row}'] = "YOUR DEBTS"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:H{row}')
-    row += 1
+    render_layout(wb, 'net_worth', {**data, 'mortgages': [data['mortgage']], 'goal_rows': goal_rows,
+                                    'trend_rows': trend_rows, 'history_rows': history_rows, 'months': months})
     
-    headers = ['Debt Name', 'Balance', 'Interest Rate', 'Min Payment', 'Avalanche Rank', 'Snowball Rank']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws[f'{col}{row}'] = h
-        apply_style(ws[f'{col}{row}'], styles['header'])
-    row += 1
+    if "Sheet" in wb.sheetnames:
+        del wb["Sheet"]
     
-    # Sample debts
-    debts = [
+    save_workbook(wb, output_path)
+    print(f"✅ Created: {output_path}")
+
+
+# ============================================================================
+# 4. DEBT DESTRUCTION PLANNER
+# ============================================================================
+DEBT_PLANNER_SAMPLE_DATA = {
+    'monthly_budget': 1500,
+    # (name, balance, annual rate, minimum payment)
+    'debts': [
         ('Credit Card 1 (Chase)', 8500, 0.2199, 170),
         ('Credit Card 2 (Citi)', 4200, 0.1899, 84),
         ('Car Loan', 15000, 0.0599, 350),
         ('Student Loan', 25000, 0.055, 280),
         ('Personal Loan', 3000, 0.1299, 150),
-    ]
-    
-    debt_start = row
-    for name, balance, rate, min_pmt in debts:
-        ws[f'B{row}'] = name
-        ws[f'C{row}'] = balance
-        ws[f'C{row}'].number_format = '"$"#,##0.00'
-        ws[f'D{row}'] = rate
-        ws[f'D{row}'].number_format = '0.00%'
-        ws[f'E{row}'] = min_pmt
-        ws[f'E{row}'].number_format = '"$"#,##0.00'
-        # Avalanche rank (by rate, highest first)
-        ws[f'F{row}'] = f'=RANK(D{row},D$14:D$25,0)'
-        # Snowball rank (by balance, lowest first)
-        ws[f'G{row}'] = f'=RANK(C{row},C$14:C$25,1)'
-        row += 1
-    
-    # Add empty rows for more debts
-    for _ in range(7):
-        for i in range(6):
-            col = get_column_letter(2 + i)
-            apply_style(ws[f'{col}{row}'], styles['data'])
-        ws[f'F{row}'] = f'=IF(D{row}="","",RANK(D{row},D$14:D$25,0))'
-        ws[f'G{row}'] = f'=IF(C{row}="","",RANK(C{row},C$14:C$25,1))'
-        row += 1
-    debt_end = row - 1
-    
-    row += 1
-    ws[f'B{row}'] = "TOTALS"
-    ws[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws[f'C{row}'] = f'=SUM(C{debt_start}:C{debt_end})'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    ws[f'C{row}'].font = Font(bold=True, size=12)
-    ws[f'E{row}'] = f'=SUM(E{debt_start}:E{debt_end})'
-    ws[f'E{row}'].number_format = '"$"#,##0.00'
-    ws[f'E{row}'].font = Font(bold=True, size=12)
-    
-    # Comparison Sheet
-    ws_comp = wb.create_sheet("Comparison")
-    start_row = add_branding_header(ws_comp, "Strategy Comparison", "Avalanche vs Snowball")
-    
-    for col in range(1, 10):
-        ws_comp.column_dimensions[get_column_letter(col)].width = 16
-    ws_comp.column_dimensions['B'].width = 25
-    
-    row = start_row
-    
-    ws_comp[f'B{row}'] = "METHOD COMPARISON"
-    apply_style(ws_comp[f'B{row}'], styles['section'])
-    ws_comp.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    headers = ['Metric', 'Avalanche', 'Snowball', 'Difference']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_comp[f'{col}{row}'] = h
-        apply_style(ws_comp[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    # These would ideally be calculated with complex formulas
-    # For now, we'll use placeholder references
-    metrics = [
-        ('Total Interest Paid', 4850, 5320, -470),
-        ('Months to Debt-Free', 36, 38, -2),
-        ('First Debt Paid Off', 'Month 8', 'Month 5', 'Snowball faster'),
-        ('Total Amount Paid', 60550, 61020, -470),
-    ]
-    
-    for metric, aval, snow, diff in metrics:
-        ws_comp[f'B{row}'] = metric
-        ws_comp[f'C{row}'] = aval
-        ws_comp[f'D{row}'] = snow
-        ws_comp[f'E{row}'] = diff
-        if isinstance(aval, int) or isinstance(aval, float):
-            if 'Interest' in metric or 'Amount' in metric:
-                ws_comp[f'C{row}'].number_format = '"$"#,##0'
-                ws_comp[f'D{row}'].number_format = '"$"#,##0'
-                ws_comp[f'E{row}'].number_format = '"$"#,##0'
-        row += 1
-    
-    row += 2
-    ws_comp[f'B{row}'] = "💡 RECOMMENDATION"
-    ws_comp[f'B{row}'].font = Font(bold=True, size=14, color=HONEY)
-    row += 1
-    ws_comp[f'B{row}'] = "Avalanche saves you $470 in interest!"
-    ws_comp[f'B{row}'].font = Font(size=12, color=ACCENT_GREEN)
-    row += 1
-    ws_comp[f'B{row}'] = "But Snowball gives you a win 3 months sooner."
-    ws_comp[f'B{row}'].font = Font(size=12, color=DARK_TEXT)
-    row += 1
-    ws_comp[f'B{row}'] = "Choose based on what motivates you!"
-    
-    row += 3
-    
-    # Interest savings calculator
-    ws_comp[f'B{row}'] = "EXTRA PAYMENT IMPACT"
-    apply_style(ws_comp[f'B{row}'], styles['section'])
-    ws_comp.merge_cells(f'B{row}:E{row}')
-    row += 2
-    
-    ws_comp[f'B{row}'] = "If you add extra each month:"
-    row += 1
-    
-    extras = [
-        ('$50 extra', 'Save $380', '2 months sooner'),
-        ('$100 extra', 'Save $720', '4 months sooner'),
-        ('$200 extra', 'Save $1,280', '7 months sooner'),
-        ('$500 extra', 'Save $2,450', '14 months sooner'),
-    ]
-    
-    for extra, savings, time in extras:
-        ws_comp[f'B{row}'] = extra
-        ws_comp[f'C{row}'] = savings
-        ws_comp[f'C{row}'].font = Font(color=ACCENT_GREEN)
-        ws_comp[f'D{row}'] = time
-        row += 1
-    
-    # Payoff Schedule Sheet
-    ws_sched = wb.create_sheet("Payoff Schedule")
-    start_row = add_branding_header(ws_sched, "Payoff Schedule", "Month-by-Month Plan")
-    
-    for col in range(1, 15):
-        ws_sched.column_dimensions[get_column_letter(col)].width = 12
-    ws_sched.column_dimensions['B'].width = 8
-    
-    row = start_row
-    
-    ws_sched[f'B{row}'] = "AVALANCHE METHOD SCHEDULE"
-    apply_style(ws_sched[f'B{row}'], styles['section'])
-    ws_sched.merge_cells(f'B{row}:N{row}')
-    row += 2
-    
-    # Debt column headers
-    ws_sched[f'B{row}'] = "Month"
-    apply_style(ws_sched[f'B{row}'], styles['header'])
-    
-    debt_names = ['CC1 (21.99%)', 'CC2 (18.99%)', 'Personal (12.99%)', 'Car (5.99%)', 'Student (5.5%)']
-    for i, name in enumerate(debt_names):
-        col = get_column_letter(3 + i * 2)
-        col2 = get_column_letter(4 + i * 2)
-        ws_sched[f'{col}{row}'] = name
-        ws_sched[f'{col}{row}'].font = Font(size=9, bold=True)
-        ws_sched.merge_cells(f'{col}{row}:{col2}{row}')
-    row += 1
-    
-    # Sub-headers
-    ws_sched[f'B{row}'] = ""
-    for i in range(5):
-        col = get_column_letter(3 + i * 2)
-        col2 = get_column_letter(4 + i * 2)
-        ws_sched[f'{col}{row}'] = "Pmt"
-        ws_sched[f'{col2}{row}'] = "Bal"
-        ws_sched[f'{col}{row}'].font = Font(size=9, color=GRAY_HEADER)
-        ws_sched[f'{col2}{row}'].font = Font(size=9, color=GRAY_HEADER)
-    row += 1
-    
-    # Sample schedule (first 12 months)
-    # This would ideally be formula-driven
-    schedule_start = row
-    for month in range(1, 13):
-        ws_sched[f'B{row}'] = month
-        for i in range(5):
-            col = get_column_letter(3 + i * 2)
-            col2 = get_column_letter(4 + i * 2)
-            apply_style(ws_sched[f'{col}{row}'], styles['data'])
-            apply_style(ws_sched[f'{col2}{row}'], styles['data'])
-            ws_sched[f'{col}{row}'].number_format = '"$"#,##0'
-            ws_sched[f'{col2}{row}'].number_format = '"$"#,##0'
-        row += 1
-    
-    # Motivational Tracker
-    ws_motiv = wb.create_sheet("Motivation")
-    start_row = add_branding_header(ws_motiv, "Debt Freedom Tracker", "Celebrate Your Progress!")
-    
-    ws_motiv.column_dimensions['B'].width = 30
-    ws_motiv.column_dimensions['C'].width = 20
-    ws_motiv.column_dimensions['D'].width = 20
-    
-    row = start_row
-    
-    ws_motiv[f'B{row}'] = "YOUR DEBT-FREE COUNTDOWN"
-    apply_style(ws_motiv[f'B{row}'], styles['section'])
-    ws_motiv.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    ws_motiv[f'B{row}'] = "Starting Total Debt"
-    ws_motiv[f'C{row}'] = "='Debt List'!C26"
-    ws_motiv[f'C{row}'].number_format = '"$"#,##0'
-    row += 1
-    
-    ws_motiv[f'B{row}'] = "Current Total Debt"
-    ws_motiv[f'C{row}'] = 0  # User updates
-    ws_motiv[f'C{row}'].number_format = '"$"#,##0'
-    current_row = row
-    row += 1
+    ],
+}
+
+PAYOFF_STRATEGIES = ('Avalanche', 'Snowball')
+PAYOFF_MAX_MONTHS = 600  # give up after 50 years: the budget doesn't cover the interest
+# Extra monthly payments compared on the Comparison sheet: EXTRA_PAYMENT_STEPS
+# steps of the smallest round size that reaches the member's monthly budget
+EXTRA_PAYMENT_STEPS = 40
+EXTRA_PAYMENT_STEP_SIZES = (10, 25, 50, 100, 250, 500, 1000)
+
+def payoff_orders(balances, rates):
+    """Debt indices in payoff order, one row per strategy in PAYOFF_STRATEGIES"""
+    avalanche = np.lexsort((balances, -rates))  # highest rate first
+    snowball = np.lexsort((-rates, balances))   # smallest balance first
+    return np.stack([avalanche, snowball])
+
+def _payoff_inputs(debts):
+    """Balances, annual rates and minimum payments of (name, balance, rate, minimum) rows"""
+    balances, rates, minimums = (np.asarray([debt[i] for debt in debts], dtype=float) for i in (1, 2, 3))
+    return balances, rates, minimums
+
+def _payoff_months(balances, rates, minimums, budgets, orders, max_months):
+    """Yield (payments, balances, interest) each month, one row per scenario, until all are paid off.
+
+    Each month every balance accrues interest and gets its minimum payment;
+    the rest of the scenario's budget goes to the unpaid debts in its payoff
+    order, so the minimum of a paid-off debt rolls over to the next one. A
+    budget short of the minimums is shared out in proportion to them, so no
+    month pays more than the budget.
+    """
+    scenarios = np.arange(len(orders))[:, None]
+    balance = np.tile(balances, (len(orders), 1))
+    for _ in range(max_months):
+        if not (balance > 0).any():
+            return
+        interest = balance * (rates / 12)
+        owed = balance + interest
+        paid = np.minimum(minimums, owed)
+        due = paid.sum(axis=1)
+        paid *= np.minimum(1, np.divide(budgets, due, out=np.ones_like(due), where=due > 0))[:, None]
+        extra = np.maximum(budgets - paid.sum(axis=1), 0)
+        room = (owed - paid)[scenarios, orders]
+        paid[scenarios, orders] += np.clip(extra[:, None] - (np.cumsum(room, axis=1) - room), 0, room)
+        balance = owed - paid
+        balance[balance < 0.005] = 0
+        yield paid, balance, interest
+
+def simulate_payoff(debts, monthly_budget, max_months=PAYOFF_MAX_MONTHS):
+    """Simulate every payoff strategy month by month, across all debts at once.
+
+    Arrays are indexed [strategy, month, debt] with debts in input order.
+    """
+    balances, rates, minimums = _payoff_inputs(debts)
+    orders = payoff_orders(balances, rates)
+    budgets = np.full(len(orders), float(monthly_budget))
+    payments, history, interest_paid = [], [], []
+    for paid, balance, interest in _payoff_months(balances, rates, minimums, budgets, orders, max_months):
+        payments.append(paid)
+        history.append(balance)
+        interest_paid.append(interest)
+
+    shape = (len(orders), 0, len(debts))
+    payments = np.stack(payments, axis=1) if payments else np.zeros(shape)
+    history = np.stack(history, axis=1) if history else np.zeros(shape)
+    interest_paid = np.stack(interest_paid, axis=1) if interest_paid else np.zeros(shape)
+
+    # Month each debt (and the whole plan) reaches zero; 0 if it never does
+    debt_months = np.zeros((len(orders), len(debts)), dtype=int)
+    months = np.zeros(len(orders), dtype=int)
+    if history.shape[1]:
+        cleared = history == 0
+        debt_months = np.where(cleared.any(axis=1), cleared.argmax(axis=1) + 1, 0)
+        all_cleared = cleared.all(axis=2)
+        months = np.where(all_cleared.any(axis=1), all_cleared.argmax(axis=1) + 1, 0)
+    return {
+        'orders': orders,
+        'payments': payments,
+        'balances': history,
+        'interest': interest_paid.sum(axis=(1, 2)),
+        'total_paid': payments.sum(axis=(1, 2)),
+        'months': months,
+        'debt_months': debt_months,
+    }
+
+def payoff_sensitivity(debts, monthly_budget, extra_payments, max_months=PAYOFF_MAX_MONTHS):
+    """Months to debt-free and total interest for every strategy at every extra payment.
+
+    All strategy/extra-payment scenarios run as rows of one simulation, and
+    only running totals are kept. Arrays are indexed [strategy, extra
+    payment]; months is 0 where the debts are never paid off.
+    """
+    balances, rates, minimums = _payoff_inputs(debts)
+    orders = payoff_orders(balances, rates)
+    extras = np.asarray(extra_payments, dtype=float)
+    budgets = np.tile(float(monthly_budget) + extras, len(orders))
+    scenario_orders = np.repeat(orders, len(extras), axis=0)
+
+    interest = np.zeros(len(budgets))
+    months = np.zeros(len(budgets), dtype=int)
+    for month, (_, balance, paid_interest) in enumerate(
+            _payoff_months(balances, rates, minimums, budgets, scenario_orders, max_months), 1):
+        interest += paid_interest.sum(axis=1)
+        months[(months == 0) & ~(balance > 0).any(axis=1)] = month
+    shape = (len(orders), len(extras))
+    return {'extra': extras, 'interest': interest.reshape(shape), 'months': months.reshape(shape)}
+
+def extra_payment_grid(monthly_budget, steps=EXTRA_PAYMENT_STEPS):
+    """0, step, 2*step, ... with a round step that lets the grid reach the monthly budget"""
+    budget = float(monthly_budget)
+    step = next((step for step in EXTRA_PAYMENT_STEP_SIZES if step * steps >= budget),
+                EXTRA_PAYMENT_STEP_SIZES[-1])
+    return [step * i for i in range(steps + 1)]
+
+def schedule_table(result, strategy, months, style):
+    """Payoff schedule rows for one strategy: month, then payment and balance per debt in payoff order"""
+    order = result['orders'][strategy]
+    payments = result['payments'][strategy][:months, order]
+    balances = result['balances'][strategy][:months, order]
+    cells = np.round(np.stack([payments, balances], axis=2).reshape(len(payments), 2 * len(order)), 2)
+    for month, values in enumerate(cells.tolist(), 1):
+        yield [month] + [(value, style) for value in values]
+
+DEBT_PLANNER_LAYOUT = [
+    {'sheet': "Debt List", 'title': "Debt Destruction Planner", 'subtitle': "List All Your Debts",
+     'widths': {'A:K': 14, 'B': 24},
+     'blocks': [
+        {'kind': 'section', 'text': "PAYOFF SETTINGS", 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'settings',
+         'items': [
+            ('budget', "Total Monthly Budget", ('monthly_budget',), '"$"#,##0.00', {'value_style': 'input'}),
+            ('min_payments', "Min Payments Total", "=SUM([debts.min_payment])", '"$"#,##0.00'),
+            ('extra', "Extra Payment Available", "=[settings.budget]-[settings.min_payments]", '"$"#,##0.00',
+             {'value_style': {'font': Font(bold=True, color=ACCENT_GREEN)}}),
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "YOUR DEBTS", 'rows': 1, 'merge_to': 'H'},
+        {'kind': 'table', 'name': 'debts', 'data': 'debts', 'blank_rows': 7, 'total_label': "TOTALS",
+         'columns': [
+            {'key': 'name', 'header': "Debt Name", 'value': 0},
+            {'key': 'balance', 'header': "Balance", 'value': 1, 'format': '"$"#,##0.00',
+             'total': ('total_balance', '=SUM({range})')},
+            {'key': 'rate', 'header': "Interest Rate", 'value': 2, 'format': '0.00%'},
+            {'key': 'min_payment', 'header': "Min Payment", 'value': 3, 'format': '"$"#,##0.00',
+             'total': ('total_min_payment', '=SUM({range})')},
+            # Avalanche by rate, highest first; Snowball by balance, lowest first
+            {'key': 'avalanche_rank', 'header': "Avalanche Rank", 'formula': '=RANK({rate},[$debts.rate],0)',
+             'blank_formula': '=IF({rate}="","",RANK({rate},[$debts.rate],0))'},
+            {'key': 'snowball_rank', 'header': "Snowball Rank", 'formula': '=RANK({balance},[$debts.balance],1)',
+             'blank_formula': '=IF({balance}="","",RANK({balance},[$debts.balance],1))'},
+         ]},
+     ]},
+    {'sheet': "Comparison", 'title': "Strategy Comparison", 'subtitle': "Avalanche vs Snowball",
+     'widths': {'A:I': 16, 'B': 25},
+     'blocks': [
+        {'kind': 'section', 'text': "METHOD COMPARISON", 'merge_to': 'E'},
+        {'kind': 'table', 'name': 'methods', 'rows': 'method_rows', 'total_offset': None,
+         'columns': [
+            {'key': 'metric', 'header': "Metric"},
+            {'key': 'avalanche', 'header': "Avalanche"},
+            {'key': 'snowball', 'header': "Snowball"},
+            {'key': 'difference', 'header': "Difference"},
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'text',
+         'lines': [
+            ("💡 RECOMMENDATION", {'font': Font(bold=True, size=14, color=HONEY)}),
+            ("{headline}", {'font': Font(size=12, color=ACCENT_GREEN)}),
+            ("{follow_up}", {'font': Font(size=12, color=DARK_TEXT)}),
+            "Choose based on what motivates you!",
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "EXTRA PAYMENT IMPACT", 'merge_to': 'E'},
+        {'kind': 'text', 'lines': ["{extra_payment_note}"]},
+        {'kind': 'gap', 'rows': 1},
+        # Interest saved at each extra payment, beside the grid
+        {'kind': 'chart', 'title': "Interest Saved by Extra Payment", 'y_title': "Interest Saved ($)",
+         'x_title': "Extra per Month ($)", 'table': 'extra', 'columns': ['avalanche_saved', 'snowball_saved'],
+         'categories': 'extra', 'anchor_col': 'J', 'offset': 0, 'when': 'grid_paid_off'},
+        {'kind': 'table', 'name': 'extra', 'rows': 'extra_payment_rows', 'count': 'extra_payments',
+         'total_offset': None,
+         'columns': [
+            {'key': 'extra', 'header': "Extra / Month"},
+            {'key': 'avalanche_months', 'header': "Avalanche Months"},
+            {'key': 'avalanche_interest', 'header': "Avalanche Interest"},
+            {'key': 'avalanche_saved', 'header': "Avalanche Saved"},
+            {'key': 'snowball_months', 'header': "Snowball Months"},
+            {'key': 'snowball_interest', 'header': "Snowball Interest"},
+            {'key': 'snowball_saved', 'header': "Snowball Saved"},
+         ]},
+     ]},
+    {'sheet': "Payoff Schedule", 'title': "Payoff Schedule", 'subtitle': "Month-by-Month Plan",
+     'widths': {'A:N': 12, 'B': 8},
+     'blocks': [
+        # Each method's debts in its payoff order: a payment and a balance column per debt
+        block
+        for strategy, method in enumerate(PAYOFF_STRATEGIES)
+        for block in (
+            {'kind': 'section', 'text': f"{method.upper()} METHOD SCHEDULE", 'merge_to': ('schedule_last_col',)},
+            {'kind': 'table', 'head': ('schedule_heads', strategy), 'head_rows': 2,
+             'merges': ('schedule_merges', strategy), 'rows': ('schedules', strategy),
+             'count': ('schedule_months', strategy), 'total_offset': None},
+            {'kind': 'gap', 'rows': 2},
+        )
+     ]},
+    {'sheet': "Motivation", 'title': "Debt Freedom Tracker", 'subtitle': "Celebrate Your Progress!",
+     'widths': {'B': 30, 'C': 20, 'D': 20},
+     'blocks': [
+        {'kind': 'section', 'text': "YOUR DEBT-FREE COUNTDOWN", 'merge_to': 'D'},
+        {'kind': 'fields', 'name': 'countdown',
+         'items': [
+            ('starting_debt', "Starting Total Debt", "=[debts.total_balance]", '"$"#,##0'),
+            ('current_debt', "Current Total Debt", 0, '"$"#,##0'),  # member updates
+            ('paid_off', "Total Paid Off!", "=[countdown.starting_debt]-[countdown.current_debt]", '"$"#,##0',
+             {'value_style': {'font': Font(bold=True, size=16, color=ACCENT_GREEN)}}),
+            ('progress', "Progress",
+             "=IF([countdown.starting_debt]>0,[countdown.paid_off]/[countdown.starting_debt],0)", '0%',
+             {'value_style': 'emphasis'}),
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "🏆 MILESTONES", 'merge_to': 'D'},
+        {'kind': 'fields', 'name': 'milestones', 'value_style': 'input',
+         'items': [
+            ('first_1000', "First $1,000 paid off", '', None),
+            ('quarter', "25% debt-free", '', None),
+            ('first_debt', "First debt eliminated", '', None),
+            ('half', "50% debt-free", '', None),
+            ('three_quarters', "75% debt-free", '', None),
+            ('debt_free', "100% DEBT FREE! 🎉", '', None),
+         ]},
+     ]},
+]
+
+def create_debt_destruction_planner(output_path, data=None):
+    """Create comprehensive debt payoff planner"""
+    data = merge_profile(DEBT_PLANNER_SAMPLE_DATA, data)
+    wb = Workbook()
+    styles = get_styles()
     
-    ws_motiv[f'B{row}'] = "Total Paid Off!"
-    ws_motiv[f'C{row}'] = f'=C{row-2}-C{row-1}'
-    ws_motiv[f'C{row}'].number_format = '"$"#,##0'
-    ws_motiv[f'C{row}'].font = Font(bold=True, size=16, color=ACCENT_GREEN)
-    row += 1
+    instructions = {
+        "🎯 Overview": [
+            "This Debt Destruction Planner helps you become debt-free faster.",
+            "Compare Avalanche (highest interest first) vs Snowball (smallest balance first) methods.",
+            "See exactly how much you'll save and when you'll be debt-free."
+        ],
+        "📝 Getting Started": [
+            "Enter all your debts in the 'Debt List' sheet",
+            "Set your total monthly payment budget",
+            "The 'Comparison' sheet shows both strategies side-by-side",
+            "Use 'Payoff Schedule' to track your progress"
+        ],
+        "💡 Strategy Guide": [
+            "AVALANCHE: Pay minimum on all, extra to highest rate. Saves the most money.",
+            "SNOWBALL: Pay minimum on all, extra to smallest balance. Psychological wins.",
+            "HYBRID: Start with snowball for momentum, switch to avalanche later."
+        ],
+        "🔥 Motivation Tips": [
+            "Post your debt-free date somewhere visible",
+            "Celebrate each debt payoff (but not with spending!)",
+            "Track your total interest saved - it adds up fast",
+            "Every extra dollar toward debt accelerates your timeline"
+        ]
+    }
+    create_instructions_sheet(wb, "Debt Destruction Planner", instructions)
     
-    ws_motiv[f'B{row}'] = "Progress"
-    ws_motiv[f'C{row}'] = f'=IF(C{row-3}>0,C{row-1}/C{row-3},0)'
-    ws_motiv[f'C{row}'].number_format = '0%'
-    ws_motiv[f'C{row}'].font = Font(bold=True, size=14)
-    row += 3
+    debts = data['debts']
+    payoff = simulate_payoff(debts, data['monthly_budget'])
+    interest = [round(float(value), 2) for value in payoff['interest']]
+    total_paid = [round(float(value), 2) for value in payoff['total_paid']]
+    months = [int(value) for value in payoff['months']]
+    # A strategy that never clears a debt is never the faster one
+    first_payoff = [int(value[value > 0].min()) if (value > 0).any() else math.inf
+                    for value in payoff['debt_months']]
+    paid_off = bool(debts) and all(months)
+    if first_payoff[0] == first_payoff[1]:
+        first_faster = 'Same month' if first_payoff[0] < math.inf else ''
+    else:
+        first_faster = f"{PAYOFF_STRATEGIES[first_payoff[1] < first_payoff[0]]} faster"
+    if paid_off or not debts:
+        months_row = ['Months to Debt-Free', months[0], months[1], months[0] - months[1]]
+    else:
+        months_row = ['Months to Debt-Free', months[0] or 'Never', months[1] or 'Never', '']
+    money = {'number_format': '"$"#,##0'}
+    method_rows = [
+        ['Total Interest Paid', *((value, money) for value in
+                                  (interest[0], interest[1], round(interest[0] - interest[1], 2)))],
+        months_row,
+        ['First Debt Paid Off', *(f'Month {month}' if month < math.inf else 'Never' for month in first_payoff),
+         first_faster],
+        ['Total Amount Paid', *((value, money) for value in
+                                (total_paid[0], total_paid[1], round(total_paid[0] - total_paid[1], 2)))],
+    ]
     
-    # Milestones
-    ws_motiv[f'B{row}'] = "🏆 MILESTONES"
-    apply_style(ws_motiv[f'B{row}'], styles['section'])
-    ws_motiv.merge_cells(f'B{row}:D{row}')
-    row += 2
+    interest_saved = interest[1] - interest[0]
+    first_win = first_payoff[0] - first_payoff[1]
+    shortfall = sum(float(minimum) for _, _, _, minimum in debts) - float(data['monthly_budget'])
+    if not debts:
+        headline, follow_up = "Add your debts on the 'Debt List' sheet to compare methods.", ""
+    elif shortfall > 0:
+        headline = f"Your budget is ${shortfall:,.2f} short of your minimum payments."
+        follow_up = "Until it covers them, each debt gets the same share of its minimum."
+    elif not paid_off:
+        headline = "At this budget your debts are never paid off."
+        follow_up = "Raise the monthly budget above the interest your debts charge each month."
+    else:
+        if interest_saved >= 1:
+            headline = f"Avalanche saves you ${interest_saved:,.0f} in interest!"
+        else:
+            headline = "Both methods cost about the same in interest."
+        if first_win > 0:
+            follow_up = f"But Snowball gives you a win {first_win} month{'s' if first_win > 1 else ''} sooner."
+        else:
+            follow_up = "Avalanche also pays off your first debt at least as soon."
     
-    milestones = [
-        ('First $1,000 paid off', ''),
-        ('25% debt-free', ''),
-        ('First debt eliminated', ''),
-        ('50% debt-free', ''),
-        ('75% debt-free', ''),
-        ('100% DEBT FREE! 🎉', ''),
-    ]
+    # Interest savings calculator
+    extras = extra_payment_grid(data['monthly_budget'])
+    sensitivity = payoff_sensitivity(debts, data['monthly_budget'], extras)
+    grid_interest = np.round(sensitivity['interest'], 2)
+    grid_months = sensitivity['months']
+    grid_paid_off = bool(debts) and bool(grid_months.all())
+    saved = grid_interest[:, :1] - grid_interest
+    
+    # Where each further step of extra saves less than half what the first step did
+    step_savings = np.diff(saved[0])
+    fading = np.flatnonzero(step_savings < step_savings[0] / 2) if grid_paid_off and step_savings[0] > 0 else []
+    if len(fading):
+        extra_payment_note = (f"Each ${extras[1]:,} step past ${extras[fading[0]]:,} extra saves less than half "
+                              f"as much interest as the first ${extras[1]:,}.")
+    else:
+        extra_payment_note = "If you add extra each month:"
+    
+    saved_cell = {'number_format': '"$"#,##0', 'font': Font(color=ACCENT_GREEN)}
+    def extra_payment_rows():
+        for i, extra in enumerate(extras):
+            cells = [(extra, money)]
+            for strategy in range(len(PAYOFF_STRATEGIES)):
+                if grid_months[strategy, i]:
+                    cells += [int(grid_months[strategy, i]), (float(grid_interest[strategy, i]), money)]
+                    cells.append((round(float(saved[strategy, i]), 2), saved_cell) if grid_months[strategy, 0] else None)
+                else:
+                    cells += ['Never', None, None]
+            yield cells
     
-    for milestone, date in milestones:
-        ws_motiv[f'B{row}'] = milestone
-        ws_motiv[f'C{row}'] = date
-        ws_motiv[f'C{row}'].fill = PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
-        row += 1
+    # Payoff schedules: debt column headers in each method's payoff order,
+    # then every month through the debt-free one (or every simulated month
+    # if it never comes)
+    styles = get_styles()
+    schedule_cell = {**styles['data'], 'number_format': '"$"#,##0'}
+    debt_header = {'font': Font(size=9, bold=True)}
+    sub_header = {'font': Font(size=9, color=GRAY_HEADER)}
+    schedule_heads, schedule_merges, schedules, schedule_months = [], [], [], []
+    for strategy in range(len(PAYOFF_STRATEGIES)):
+        names = [("Month", styles['header'])]
+        for debt in payoff['orders'][strategy]:
+            name, _, rate, _ = debts[debt]
+            names += [(f'{name} ({rate:.2%})', debt_header), None]
+        schedule_heads.append([names, [None] + [("Pmt", sub_header), ("Bal", sub_header)] * len(debts)])
+        schedule_merges.append([(0, 3 + i * 2, 4 + i * 2) for i in range(len(debts))])
+        count = int(payoff['months'][strategy]) or len(payoff['payments'][strategy])
+        schedules.append(partial(schedule_table, payoff, strategy, count, schedule_cell))
+        schedule_months.append(count)
+    
+    render_layout(wb, 'debt_planner', {
+        **data,
+        'method_rows': method_rows, 'headline': headline, 'follow_up': follow_up,
+        'extra_payment_note': extra_payment_note, 'extra_payment_rows': extra_payment_rows,
+        'extra_payments': len(extras), 'grid_paid_off': grid_paid_off,
+        'schedule_last_col': get_column_letter(max(14, 2 + len(debts) * 2)),
+        'schedule_heads': schedule_heads, 'schedule_merges': schedule_merges,
+        'schedules': schedules, 'schedule_months': schedule_months,
+    })
     
     if "Sheet" in wb.sheetnames:
         del wb["Sheet"]
     
-    wb.save(output_path)
+    save_workbook(wb, output_path)
     print(f"✅ Created: {output_path}")
 
 
 # ============================================================================
 # 5. INVESTMENT FEE ANALYZER
 # ============================================================================
-def create_investment_fee_analyzer(output_path):
+FEE_ANALYZER_SAMPLE_DATA = {
+    # (fund name, ticker, value, expense ratio)
+    'investments': [
+        ('Vanguard Total Stock Market', 'VTI', 150000, 0.0003),
+        ('Fidelity 500 Index', 'FXAIX', 75000, 0.015),
+        ('Company 401k Stock Fund', 'N/A', 50000, 0.0085),
+        ('Target Date 2050', 'TRRMX', 45000, 0.0065),
+        ('Bond Index Fund', 'BND', 30000, 0.0003),
+        ('Actively Managed Growth', 'FCNTX', 25000, 0.0086),
+    ],
+    'annual_contribution': 24000,
+    'expected_return': 0.08,
+    'low_cost_er': 0.0003,  # VTI level
+    'projection_years': 30,
+    # Monte Carlo projection of the cost of fees
+    'return_volatility': 0.15,  # standard deviation of annual returns
+    'simulation_paths': 100000,
+    'simulation_seed': 2024,
+    'simulation_workers': 1,  # processes to spread paths across; results don't depend on it
+    # Monthly projection: when in the month contributions land, and how fees accrue
+    'contribution_timing': 'mid',  # 'start', 'mid' or 'end'
+    'fee_accrual': 'daily',  # 'daily' or 'monthly'
+    'fee_scenarios': 101,  # expense ratios swept from 0% to FEE_SCENARIO_MAX_ER
+    'fund_catalog': None,  # CSV or compiled catalog path; defaults to FUND_CATALOG_FILE
+    # CSV of name, ticker, value, expense_ratio columns; replaces investments when set
+    'holdings_csv': None,
+}
+
+FEE_PERCENTILES = (10, 50, 90)
+FEE_SIMULATION_CHUNK = 25000  # paths per random stream, so chunks are the same for any worker count
+
+def _fee_cost_paths(seed, paths, start_value, contribution, mu, sigma, current_er, low_er, years, out=None):
+    """Cost of fees at the end of every year along one chunk of simulated return paths, as [year, path]"""
+    growth = np.random.default_rng(seed).standard_normal((years, paths))
+    growth *= sigma
+    growth += mu
+    np.exp(growth, out=growth)
+    current = low = np.full(paths, start_value)
+    cost = np.empty((years, paths)) if out is None else out
+    for year in range(years):
+        current = (current + contribution) * (growth[year] - current_er)
+        low = (low + contribution) * (growth[year] - low_er)
+        np.subtract(low, current, out=cost[year])
+    return cost
+
+def simulate_fee_impact(start_value, contribution, expected_return, volatility, current_er, low_er,
+                        years, paths, seed, workers=1):
+    """FEE_PERCENTILES of the cost of fees in every year, indexed [percentile, year].
+
+    Annual returns are lognormal with the expected return as their mean, and
+    both portfolios see the same return paths: contributions go in at the
+    start of each year and fees come out of growth.
+    Paths are split into fixed-size chunks with their own seeds spawned from
+    seed, so spreading them across worker processes gives identical results.
+    """
+    mean = 1 + float(expected_return)
+    sigma = math.sqrt(math.log(1 + (float(volatility) / mean) ** 2))
+    mu = math.log(mean) - sigma ** 2 / 2
+    paths, years = int(paths), int(years)
+    chunks = [FEE_SIMULATION_CHUNK] * (paths // FEE_SIMULATION_CHUNK)
+    if paths % FEE_SIMULATION_CHUNK:
+        chunks.append(paths % FEE_SIMULATION_CHUNK)
+    seeds = np.random.SeedSequence(int(seed)).spawn(len(chunks))
+    args = (float(start_value), float(contribution), mu, sigma, float(current_er), float(low_er), years)
+
+    if not paths:
+        return np.zeros((len(FEE_PERCENTILES), years))
+    cost = np.empty((years, paths))
+    bounds = np.cumsum([0] + chunks)
+    if int(workers) > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(int(workers), len(chunks))) as pool:
+            results = pool.map(_fee_cost_paths, seeds, chunks, *([arg] * len(chunks) for arg in args))
+            for start, stop, chunk_cost in zip(bounds, bounds[1:], results):
+                cost[:, start:stop] = chunk_cost
+    else:
+        for start, stop, chunk_seed, chunk in zip(bounds, bounds[1:], seeds, chunks):
+            _fee_cost_paths(chunk_seed, chunk, *args, out=cost[:, start:stop])
+    return np.percentile(cost, FEE_PERCENTILES, axis=1, overwrite_input=True)
+
+# Share of its month a contribution spends invested
+CONTRIBUTION_TIMING = {'start': 1.0, 'mid': 0.5, 'end': 0.0}
+FEE_ACCRUALS = ('daily', 'monthly')
+FEE_SCENARIO_MAX_ER = 0.02
+
+def fee_accrual(accrual):
+    """The accrual option itself, once checked against FEE_ACCRUALS"""
+    if accrual not in FEE_ACCRUALS:
+        raise ValueError(f"fee_accrual must be one of {', '.join(FEE_ACCRUALS)}, not {accrual!r}")
+    return accrual
+
+def monthly_fee_factor(expense_ratio, accrual):
+    """Share of a balance left after one month of fees charged daily or monthly"""
+    if fee_accrual(accrual) == 'daily':
+        return (1 - expense_ratio / 365) ** (365 / 12)
+    return 1 - expense_ratio / 12
+
+def contribution_timing(timing):
+    """Months a contribution is invested for in the month it lands"""
+    if timing not in CONTRIBUTION_TIMING:
+        raise ValueError(f"contribution_timing must be one of {', '.join(CONTRIBUTION_TIMING)}, "
+                         f"not {timing!r}")
+    return CONTRIBUTION_TIMING[timing]
+
+def fee_drag_balances(start_value, contribution, expected_return, expense_ratios, months,
+                      timing='mid', accrual='daily'):
+    """Month-end balances for every expense ratio at once, indexed [scenario, month].
+
+    Returns compound monthly, a twelfth of the annual contribution lands each
+    month (grown for the part of the month given by timing), and fees come
+    off the month-end balance. Each month multiplies the balance by the same
+    factor F and adds the same amount c, so month t is start*F^t plus c times
+    the geometric sum of F, one array operation for all scenarios.
+    """
+    growth = (1 + float(expected_return)) ** (1 / 12)
+    factor = growth * monthly_fee_factor(np.asarray(expense_ratios, dtype=float), accrual)[:, None]
+    deposit = float(contribution) / 12 * growth ** (contribution_timing(timing) - 1) * factor
+    compounded = factor ** np.arange(1, int(months) + 1)
+    # sum of F^k for k < t, which is just t when F == 1
+    flat = factor == 1
+    annuity = np.where(flat, np.arange(1, int(months) + 1),
+                       (compounded - 1) / np.where(flat, 1, factor - 1))
+    return float(start_value) * compounded + deposit * annuity
+
+FUND_CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fund_catalog.csv")
+FUND_CATALOG_COLUMNS = ('ticker', 'name', 'asset_class', 'type', 'expense_ratio', 'ten_year_return', 'rating')
+FUND_ALTERNATIVES = 3  # cheaper funds suggested per holding
+# Portfolios this large get values instead of per-row formulas, no blank entry
+# rows, and a Fee Comparison limited to the holdings with the most to save
+LARGE_PORTFOLIO_HOLDINGS = 500
+LARGE_PORTFOLIO_COMPARISONS = 100
+# Star rating by expense ratio: at or below each cutoff, 5 stars down to 2; 1 above
+FEE_RATING_CUTOFFS = (0.001, 0.005, 0.01, 0.015)
+
+def fee_rating(expense_ratio):
+    """Star string for an expense ratio, matching the Portfolio Analysis IF formula"""
+    return '⭐' * (5 - bisect_left(FEE_RATING_CUTOFFS, expense_ratio))
+
+def _parse_expense_ratio(text):
+    """Expense ratio from a CSV field, as a fraction ('0.0004') or a percentage ('0.04%')"""
+    text = text.strip()
+    return float(text[:-1]) / 100 if text.endswith('%') else float(text)
+
+def portfolio_holdings(path):
+    """Stream a holdings CSV (name, ticker, value, expense_ratio) as investment rows"""
+    path = os.path.expanduser(path)
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        try:
+            columns = [header.index(name) for name in ('name', 'ticker', 'value', 'expense_ratio')]
+        except ValueError:
+            raise ValueError(f"{path}: expected name, ticker, value and expense_ratio columns") from None
+        name_col, ticker_col, value_col, er_col = columns
+        for line_no, fields in enumerate(reader, 2):
+            if not fields:
+                continue
+            try:
+                yield (fields[name_col].strip(), fields[ticker_col].strip(),
+                       _parse_amount(fields[value_col]), _parse_expense_ratio(fields[er_col]))
+            except (IndexError, ValueError):
+                raise ValueError(f"{path}:{line_no}: bad holding {fields!r}") from None
+
+# Compiled catalogs: a header, a table of (offset, bytes) per section, then the
+# sections themselves, each 8-byte aligned so NumPy can view them in place.
+FUND_CATALOG_MAGIC = b'CWFUNDS1'
+_FUND_CATALOG_HEADER = struct.Struct('<8sIII')  # magic, funds, asset classes, ticker width
+_FUND_CATALOG_SECTIONS = (
+    ('tickers', None),           # fixed-width bytes, sorted; the row order of every column
+    ('expense_ratio', '<f8'),
+    ('ten_year_return', '<f8'),
+    ('rating', 'u1'),
+    ('asset_class', '<u2'),      # index into labels
+    ('type', '<u2'),             # index into labels
+    ('name_offsets', '<u4'),     # funds + 1 offsets into names
+    ('names', 'u1'),             # UTF-8 fund names, back to back
+    ('class_order', '<u4'),      # rows grouped by asset class, cheapest first
+    ('class_offsets', '<u4'),    # asset classes + 1 offsets into class_order
+    ('labels', 'u1'),            # asset class then type names, newline separated
+)
+_FUND_CATALOG_TABLE = struct.Struct('<' + 'QQ' * len(_FUND_CATALOG_SECTIONS))
+
+def fund_catalog_bytes(funds):
+    """Compile (ticker, name, asset class, type, expense ratio, 10y return, rating) tuples"""
+    funds = sorted(funds, key=lambda fund: fund[0].encode())
+    tickers = [fund[0].encode() for fund in funds]
+    duplicates = [a for a, b in zip(tickers, tickers[1:]) if a == b]
+    if duplicates:
+        raise ValueError(f"duplicate ticker {duplicates[0].decode()!r} in fund catalog")
+    classes = sorted({fund[2] for fund in funds})
+    types = sorted({fund[3] for fund in funds})
+    class_ids = {name: i for i, name in enumerate(classes)}
+    type_ids = {name: len(classes) + i for i, name in enumerate(types)}
+
+    names = [fund[1].encode() for fund in funds]
+    class_order = sorted(range(len(funds)), key=lambda i: (class_ids[funds[i][2]], funds[i][4], tickers[i]))
+    class_counts = np.bincount([class_ids[fund[2]] for fund in funds], minlength=len(classes))
+    width = max(map(len, tickers), default=1)
+    sections = (
+        np.array(tickers, dtype=f'S{width}'),
+        np.array([fund[4] for fund in funds], dtype='<f8'),
+        np.array([fund[5] for fund in funds], dtype='<f8'),
+        np.array([fund[6] for fund in funds], dtype='u1'),
+        np.array([class_ids[fund[2]] for fund in funds], dtype='<u2'),
+        np.array([type_ids[fund[3]] for fund in funds], dtype='<u2'),
+        np.concatenate(([0], np.cumsum([len(name) for name in names]))).astype('<u4'),
+        b''.join(names),
+        np.array(class_order, dtype='<u4'),
+        np.concatenate(([0], np.cumsum(class_counts))).astype('<u4'),
+        '\n'.join(classes + types).encode(),
+    )
+
+    table = []
+    offset = _FUND_CATALOG_HEADER.size + _FUND_CATALOG_TABLE.size
+    blobs = []
+    for section in sections:
+        blob = section if isinstance(section, bytes) else section.tobytes()
+        offset += -offset % 8
+        table += [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+    out = BytesIO()
+    out.write(_FUND_CATALOG_HEADER.pack(FUND_CATALOG_MAGIC, len(funds), len(classes), width))
+    out.write(_FUND_CATALOG_TABLE.pack(*table))
+    for start, blob in zip(table[::2], blobs):
+        out.write(b'\0' * (start - out.tell()))
+        out.write(blob)
+    return out.getvalue()
+
+def compile_fund_catalog(csv_path, output_path):
+    """Compile a fund catalog CSV into the memory-mappable binary format; returns the fund count"""
+    funds = read_fund_catalog_csv(csv_path)
+    blob = fund_catalog_bytes(funds)
+    # Replace atomically so processes mapping the old file keep a consistent view
+    scratch = f"{output_path}.tmp"
+    with open(scratch, 'wb') as f:
+        f.write(blob)
+    os.replace(scratch, output_path)
+    return len(funds)
+
+class FundCatalog:
+    """Columnar fund catalog over a compiled buffer, indexed by ticker and by asset class
+
+    The columns are NumPy views into the buffer, so a memory-mapped catalog is
+    shared read-only by every process that opens it and nothing is copied.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        magic, self.size, class_count, width = _FUND_CATALOG_HEADER.unpack_from(buffer)
+        if magic != FUND_CATALOG_MAGIC:
+            raise ValueError("not a compiled fund catalog")
+        table = _FUND_CATALOG_TABLE.unpack_from(buffer, _FUND_CATALOG_HEADER.size)
+        for (name, dtype), offset, length in zip(_FUND_CATALOG_SECTIONS, table[::2], table[1::2]):
+            dtype = np.dtype(dtype or f'S{width}')
+            setattr(self, name, np.frombuffer(buffer, dtype, length // dtype.itemsize, offset))
+        labels = self.labels.tobytes().decode().split('\n') if self.labels.size else []
+        self.label_names = labels
+        self.class_ids = {name: i for i, name in enumerate(labels[:class_count])}
+
+    def __len__(self):
+        return self.size
+
+    def fund(self, i):
+        """Row i as a (ticker, name, asset class, type, expense ratio, 10y return, rating) tuple"""
+        start, stop = self.name_offsets[i:i + 2]
+        return (self.tickers[i].decode(), self.names[start:stop].tobytes().decode(),
+                self.label_names[self.asset_class[i]], self.label_names[self.type[i]],
+                float(self.expense_ratio[i]), float(self.ten_year_return[i]), int(self.rating[i]))
+
+    def lookup(self, ticker):
+        """The catalog fund with this ticker (any case), or None"""
+        key = ticker.strip().upper().encode()
+        i = int(np.searchsorted(self.tickers, key))
+        if i < self.size and self.tickers[i] == key:
+            return self.fund(i)
+        return None
+
+    def cheapest(self, asset_class, k, exclude=None):
+        """Up to k funds of an asset class with the lowest expense ratios, skipping one ticker"""
+        class_id = self.class_ids.get(asset_class)
+        if class_id is None:
+            return []
+        start, stop = self.class_offsets[class_id:class_id + 2]
+        picks = []
+        for i in self.class_order[start:stop]:
+            if len(picks) == k:
+                break
+            fund = self.fund(i)
+            if fund[0] != exclude:
+                picks.append(fund)
+        return picks
+
+def read_fund_catalog_csv(path):
+    """Read a fund catalog CSV (FUND_CATALOG_COLUMNS, header row first) into fund tuples"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        try:
+            columns = [header.index(name) for name in FUND_CATALOG_COLUMNS]
+        except ValueError:
+            raise ValueError(f"{path}: expected columns {', '.join(FUND_CATALOG_COLUMNS)}") from None
+        funds = []
+        for line_no, fields in enumerate(reader, 2):
+            if not fields:
+                continue
+            try:
+                ticker, name, asset_class, type_, er, ret, rating = (fields[i].strip() for i in columns)
+                funds.append((ticker.upper(), name, asset_class, type_, float(er), float(ret), int(rating)))
+            except (IndexError, ValueError):
+                raise ValueError(f"{path}:{line_no}: bad fund {fields!r}") from None
+    return funds
+
+@lru_cache(maxsize=4)
+def load_fund_catalog(path):
+    """Map a compiled fund catalog read-only, or compile a CSV catalog in memory"""
+    with open(path, 'rb') as f:
+        if f.read(len(FUND_CATALOG_MAGIC)) == FUND_CATALOG_MAGIC:
+            return FundCatalog(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    return FundCatalog(fund_catalog_bytes(read_fund_catalog_csv(path)))
+
+def _fee_year_end(prior, growth):
+    """Year-end balance template: twelve months of growth F on the prior balance,
+    plus twelve monthly contributions each grown by F for the rest of the year"""
+    factor = f'[$impact.{growth}]'
+    return (f'={prior}*{factor}^12+[$impact.contribution]/12*[$impact.timing_factor]*{factor}'
+            f'*IF({factor}=1,12,({factor}^12-1)/({factor}-1))')
+
+FEE_RATING_FORMULA = ('IF({expense_ratio}<=0.001,"⭐⭐⭐⭐⭐",IF({expense_ratio}<=0.005,"⭐⭐⭐⭐",'
+                      'IF({expense_ratio}<=0.01,"⭐⭐⭐",IF({expense_ratio}<=0.015,"⭐⭐","⭐"))))')
+
+FEE_ANALYZER_LAYOUT = [
+    {'sheet': "Portfolio Analysis", 'title': "Investment Fee Analyzer", 'subtitle': "See What You're Really Paying",
+     'widths': {'A:K': 14, 'B': 30},
+     'blocks': [
+        {'kind': 'section', 'text': "PORTFOLIO FEE SUMMARY", 'merge_to': 'F'},
+        {'kind': 'fields', 'name': 'portfolio',
+         'items': [
+            ('total_value', "Total Portfolio Value", "=SUM([holdings.value])", '"$"#,##0',
+             {'value_style': 'emphasis'}),
+            # An empty or all-zero portfolio has no weighted average; show 0, not #DIV/0!
+            ('weighted_er', "Weighted Average Expense Ratio",
+             "=IF(SUM([holdings.value])>0,SUMPRODUCT([holdings.value],[holdings.expense_ratio])"
+             "/SUM([holdings.value]),0)", '0.00%',
+             {'value_style': {'font': Font(bold=True, size=14, color=HONEY)}}),
+            ('annual_cost', "Annual Fee Cost", "=[portfolio.total_value]*[portfolio.weighted_er]", '"$"#,##0',
+             {'value_style': {'font': Font(bold=True, size=14, color=ACCENT_RED)}}),
+            ('monthly_cost', "Monthly Fee Cost", "=[portfolio.annual_cost]/12", '"$"#,##0'),
+            ('daily_cost', "Daily Fee Cost", "=[portfolio.annual_cost]/365", '"$"#,##0.00'),
+            ('savings', "Savings with Cheapest Alternatives", "=SUM([holdings.savings])", '"$"#,##0',
+             {'value_style': {'font': Font(bold=True, size=14, color=ACCENT_GREEN)}}),
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "YOUR INVESTMENTS", 'rows': 1, 'merge_to': 'I'},
+        # Small portfolios get cost, rating and savings formulas and blank rows
+        # for more holdings; large ones get values (see holding_records)
+        {'kind': 'table', 'name': 'holdings', 'data': 'holding_records', 'count': 'holding_count',
+         'blank_rows': 'holding_blank_rows', 'total_offset': None,
+         'columns': [
+            {'key': 'name', 'header': "Fund Name", 'value': 0},
+            {'key': 'ticker', 'header': "Ticker", 'value': 1},
+            {'key': 'value', 'header': "Value", 'value': 2, 'format': '"$"#,##0'},
+            {'key': 'expense_ratio', 'header': "Expense Ratio", 'value': 3, 'format': '0.00%'},
+            {'key': 'annual_cost', 'header': "Annual Cost", 'value': 4, 'format': '"$"#,##0.00',
+             'formula': '={value}*{expense_ratio}', 'blank_formula': '=IF({value}="","",{value}*{expense_ratio})'},
+            {'key': 'rating', 'header': "Rating", 'value': 5, 'formula': '=' + FEE_RATING_FORMULA,
+             'blank_formula': '=IF({expense_ratio}="","",' + FEE_RATING_FORMULA + ')'},
+            {'key': 'alternative', 'header': "Cheapest Alternative", 'value': 6},
+            {'key': 'savings', 'header': "Savings / Year", 'value': 7, 'format': '"$"#,##0.00',
+             'formula': '=MAX(0,{value}*({expense_ratio}-{record[8]!r}))'},
+         ],
+         'rules': [('color_scale', 'holdings.expense_ratio', (0, '63BE7B'), (0.005, 'FFEB84'), (0.02, 'F8696B'))]},
+     ]},
+    {'sheet': "Long-term Impact", 'title': "{projection_years}-Year Fee Impact", 'subtitle': "The True Cost of Fees",
+     'widths': {'A:I': 16, 'B': 25},
+     'blocks': [
+        {'kind': 'section', 'text': "ASSUMPTIONS", 'merge_to': 'D'},
+        # Monthly compounding: one month of growth net of fees, and the part of
+        # that month a contribution is invested for
+        {'kind': 'fields', 'name': 'impact',
+         'items': [
+            ('starting', "Starting Portfolio", "=[portfolio.total_value]", '"$"#,##0'),
+            ('contribution', "Annual Contribution", ('annual_contribution',), '"$"#,##0'),
+            ('expected_return', "Expected Return (before fees)", ('expected_return',), '0.0%'),
+            ('current_er', "Current Expense Ratio", "=[portfolio.weighted_er]", '0.00%'),
+            ('low_cost_er', "Low-Cost Alternative", ('low_cost_er',), '0.00%'),
+            ('timing', "Contribution Timing", ('contribution_timing',), None),
+            ('accrual', "Fee Accrual", ('fee_accrual',), None),
+            ('growth_current', "Monthly Growth, Current Fees",
+             "=(1+[impact.expected_return])^(1/12)*{current_fee_factor}", '0.000000'),
+            ('growth_low_cost', "Monthly Growth, Low-Cost",
+             "=(1+[impact.expected_return])^(1/12)*{low_cost_fee_factor}", '0.000000'),
+            ('timing_factor', "Contribution Timing Factor",
+             "=(1+[impact.expected_return])^({timing_exponent}/12)", '0.000000'),
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "{projection_years}-YEAR PROJECTION", 'merge_to': 'F'},
+        {'kind': 'table', 'name': 'projection', 'data': 'projection_records', 'total_offset': None,
+         'columns': [
+            {'key': 'year', 'header': "Year", 'value': 0},
+            {'key': 'current', 'header': "Current Fees", 'format': '"$"#,##0',
+             'first_formula': _fee_year_end('[$impact.starting]', 'growth_current'),
+             'formula': _fee_year_end('{prev[current]}', 'growth_current')},
+            {'key': 'low_cost', 'header': "Low-Cost", 'format': '"$"#,##0',
+             'first_formula': _fee_year_end('[$impact.starting]', 'growth_low_cost'),
+             'formula': _fee_year_end('{prev[low_cost]}', 'growth_low_cost')},
+            {'key': 'difference', 'header': "Fee Difference", 'format': '"$"#,##0',
+             'formula': '={low_cost}-{current}'},
+            {'key': 'cumulative', 'header': "Cumulative Lost", 'format': '"$"#,##0', 'formula': '={difference}'},
+         ]},
+        {'kind': 'chart', 'title': "{projection_years}-Year Portfolio Growth Comparison",
+         'y_title': "Portfolio Value ($)", 'x_title': "Year", 'table': 'projection',
+         'columns': ['current', 'low_cost'], 'categories': 'year', 'height': 12, 'anchor': 'H8'},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'section', 'text': "{projection_years}-YEAR SUMMARY", 'merge_to': 'D'},
+        {'kind': 'fields', 'name': 'summary',
+         'items': [
+            ('current', "With Current Fees", "=[projection.current#{projection_years}]", '"$"#,##0',
+             {'value_style': {'font': Font(size=14)}}),
+            ('low_cost', "With Low-Cost Funds", "=[projection.low_cost#{projection_years}]", '"$"#,##0',
+             {'value_style': {'font': Font(size=14, color=ACCENT_GREEN)}}),
+            ('fee_cost', "TOTAL COST OF FEES", "=[summary.low_cost]-[summary.current]", '"$"#,##0',
+             {'label_style': 'emphasis',
+              'value_style': {'font': Font(bold=True, size=18, color=ACCENT_RED),
+                              'fill': PatternFill(start_color="FFCCCB", end_color="FFCCCB", fill_type='solid')}}),
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        # Monte Carlo: the same projection over simulated market returns
+        {'kind': 'chart', 'title': "Cost of Fees: Range of Outcomes", 'y_title': "Cost of Fees ($)",
+         'x_title': "Year", 'table': 'bands', 'columns': [f'p{p}' for p in FEE_PERCENTILES],
+         'categories': 'year', 'height': 12, 'anchor_col': 'H', 'offset': 0, 'when': 'has_bands',
+         'dashed': (0, 2)},  # dashed outer bands around a solid median
+        {'kind': 'section', 'text': "MONTE CARLO: COST OF FEES", 'merge_to': 'E'},
+        {'kind': 'fields', 'name': 'simulation',
+         'items': [
+            ('volatility', "Return Volatility", ('return_volatility',), '0.0%'),
+            ('paths', "Simulated Paths", ('simulation_paths',), '#,##0'),
+         ]},
+        {'kind': 'text', 'style': 'note', 'lines': ["Simulated from your holdings when this workbook was created."]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'table', 'name': 'bands', 'data': 'band_records', 'total_offset': None,
+         'columns': [
+            {'key': 'year', 'header': "Year", 'value': 0},
+            *({'key': f'p{p}', 'header': f"P{p}", 'value': i, 'format': '"$"#,##0'}
+              for i, p in enumerate(FEE_PERCENTILES, 1)),
+         ]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'text', 'style': {'font': Font(size=12, color=ACCENT_RED)}, 'lines': ["{bands_note}"],
+         'when': 'has_bands'},
+        {'kind': 'gap', 'rows': 2},
+        # Expense ratio sweep: the monthly projection of your holdings at every scenario
+        {'kind': 'chart', 'title': "Cost of Fees by Expense Ratio", 'y_title': "Cost of Fees ($)",
+         'x_title': "Expense Ratio", 'table': 'scenarios', 'columns': ['cost'], 'categories': 'expense_ratio',
+         'height': 12, 'anchor_col': 'H', 'offset': 0},
+        {'kind': 'section', 'text': "EXPENSE RATIO SCENARIOS", 'merge_to': 'E'},
+        {'kind': 'text', 'style': 'note',
+         'lines': ["Your holdings after {projection_years} years at {scenario_count} expense ratios, "
+                   "compounded monthly."]},
+        {'kind': 'gap', 'rows': 1},
+        {'kind': 'table', 'name': 'scenarios', 'data': 'scenario_records', 'total_offset': None,
+         'columns': [
+            {'key': 'expense_ratio', 'header': "Expense Ratio", 'value': 0, 'format': '0.00%'},
+            {'key': 'balance', 'header': "Ending Balance", 'value': 1, 'format': '"$"#,##0'},
+            {'key': 'cost', 'header': "Cost of Fees", 'value': 2, 'format': '"$"#,##0'},
+            {'key': 'share_lost', 'header': "Share Lost", 'value': 3, 'format': '0.0%'},
+         ]},
+     ]},
+    {'sheet': "Fee Comparison", 'title': "Fund Comparison", 'subtitle': "Find Lower-Cost Alternatives",
+     'widths': {'A:I': 14, 'B': 30},
+     'blocks': [
+        {'kind': 'section', 'text': "LOWER-COST ALTERNATIVES", 'rows': 1, 'merge_to': 'I'},
+        {'kind': 'text', 'style': 'note', 'lines': ["{comparison_note}"]},
+        {'kind': 'gap', 'rows': 1},
+        # Each compared holding, then its alternatives and a blank row (see comparison_rows)
+        {'kind': 'table', 'name': 'comparison', 'rows': 'comparison_rows', 'count': 'comparison_count',
+         'total_offset': None,
+         'columns': [
+            {'key': 'name', 'header': "Fund Name"},
+            {'key': 'ticker', 'header': "Ticker"},
+            {'key': 'type', 'header': "Type"},
+            {'key': 'expense_ratio', 'header': "Expense Ratio"},
+            {'key': 'ten_year_return', 'header': "10Y Return"},
+            {'key': 'rating', 'header': "Morningstar"},
+            {'key': 'savings', 'header': "Savings / Year"},
+            {'key': 'long_term_savings', 'header': "{projection_years}-Year Savings"},
+         ]},
+     ]},
+    {'sheet': "Hidden Fees", 'title': "Hidden Fee Checklist", 'subtitle': "Fees You Might Be Missing",
+     'widths': {'B': 40, 'C': 20, 'D': 30},
+     'blocks': [
+        {'kind': 'section', 'text': "HIDDEN FEE CHECKLIST", 'merge_to': 'D'},
+        {'kind': 'table', 'name': 'hidden_fees', 'total_offset': None,
+         'records': [
+            ('401(k) Plan Admin Fees', '', 'Ask HR for fee disclosure'),
+            ('Mutual Fund Load Fees', '', 'Buy no-load funds only'),
+            ('12b-1 Marketing Fees', '', 'Check in fund prospectus'),
+            ('Account Maintenance Fees', '', 'Meet minimum balance or switch'),
+            ('Trading Commissions', '', 'Use commission-free brokers'),
+            ('Bid-Ask Spreads (ETFs)', '', 'Use limit orders'),
+            ('Advisory/Management Fees', '', 'Consider DIY or robo-advisors'),
+            ('Wire Transfer Fees', '', 'Use ACH instead'),
+            ('Paper Statement Fees', '', 'Go paperless'),
+            ('Account Closure Fees', '', 'Check before opening'),
+         ],
+         'columns': [
+            {'key': 'fee', 'header': "Fee Type", 'value': 0},
+            {'key': 'cost', 'header': "Your Cost", 'value': 1, 'style': 'input'},
+            {'key': 'reduce', 'header': "How to Reduce", 'value': 2,
+             'style': {'font': Font(size=10, color=DARK_TEXT)}},
+         ]},
+        {'kind': 'gap', 'rows': 2},
+        {'kind': 'text', 'style': {'font': Font(italic=True, color=HONEY)}, 'merge_to': 'D',
+         'lines': ["💡 PRO TIP: Request a 'fee disclosure statement' from all your accounts annually."]},
+     ]},
+]
+
+def create_investment_fee_analyzer(output_path, data=None):
     """Create investment fee comparison and impact analyzer"""
+    data = merge_profile(FEE_ANALYZER_SAMPLE_DATA, data)
     wb = Workbook()
-    styles = get_styles()
     
     instructions = {
         "🎯 Overview": [
@@ -1885,7 +4379,7 @@ def create_investment_fee_analyzer(output_path):
         ],
         "📝 Getting Started": [
             "Enter your investments in the 'Portfolio Analysis' sheet",
-            "Use 'Fee Comparison' to compare similar funds",
+            "Use 'Fee Comparison' to see the cheapest funds in each holding's asset class",
             "The 'Long-term Impact' sheet shows true cost over 30 years",
             "Check 'Hidden Fees' for fees you might have missed"
         ],
@@ -1904,371 +4398,795 @@ def create_investment_fee_analyzer(output_path):
     }
     create_instructions_sheet(wb, "Investment Fee Analyzer", instructions)
     
-    # Portfolio Analysis Sheet
-    ws = wb.create_sheet("Portfolio Analysis")
-    start_row = add_branding_header(ws, "Investment Fee Analyzer", "See What You're Really Paying")
-    
-    for col in range(1, 12):
-        ws.column_dimensions[get_column_letter(col)].width = 14
-    ws.column_dimensions['B'].width = 30
-    
-    row = start_row
-    
-    # Summary Stats
-    ws[f'B{row}'] = "PORTFOLIO FEE SUMMARY"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:F{row}')
-    row += 2
-    
-    ws[f'B{row}'] = "Total Portfolio Value"
-    ws[f'C{row}'] = '=SUM(D15:D30)'
-    ws[f'C{row}'].number_format = '"$"#,##0'
-    ws[f'C{row}'].font = Font(bold=True, size=14)
-    portfolio_total_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "Weighted Average Expense Ratio"
-    ws[f'C{row}'] = '=SUMPRODUCT(D15:D30,E15:E30)/SUM(D15:D30)'
-    ws[f'C{row}'].number_format = '0.00%'
-    ws[f'C{row}'].font = Font(bold=True, size=14, color=HONEY)
-    avg_er_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "Annual Fee Cost"
-    ws[f'C{row}'] = f'=C{portfolio_total_row}*C{avg_er_row}'
-    ws[f'C{row}'].number_format = '"$"#,##0'
-    ws[f'C{row}'].font = Font(bold=True, size=14, color=ACCENT_RED)
-    annual_cost_row = row
-    row += 1
-    
-    ws[f'B{row}'] = "Monthly Fee Cost"
-    ws[f'C{row}'] = f'=C{annual_cost_row}/12'
-    ws[f'C{row}'].number_format = '"$"#,##0'
-    row += 1
-    
-    ws[f'B{row}'] = "Daily Fee Cost"
-    ws[f'C{row}'] = f'=C{annual_cost_row}/365'
-    ws[f'C{row}'].number_format = '"$"#,##0.00'
-    row += 3
-    
-    # Investment List
-    ws[f'B{row}'] = "YOUR INVESTMENTS"
-    apply_style(ws[f'B{row}'], styles['section'])
-    ws.merge_cells(f'B{row}:H{row}')
-    row += 1
-    
-    headers = ['Fund Name', 'Ticker', 'Value', 'Expense Ratio', 'Annual Cost', 'Rating']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws[f'{col}{row}'] = h
-        apply_style(ws[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    # Sample investments
-    investments = [
-        ('Vanguard Total Stock Market', 'VTI', 150000, 0.0003),
-        ('Fidelity 500 Index', 'FXAIX', 75000, 0.015),
-        ('Company 401k Stock Fund', 'N/A', 50000, 0.0085),
-        ('Target Date 2050', 'TRRMX', 45000, 0.0065),
-        ('Bond Index Fund', 'BND', 30000, 0.0003),
-        ('Actively Managed Growth', 'FCNTX', 25000, 0.0086),
-    ]
-    
-    inv_start = row
-    for name, ticker, value, er in investments:
-        ws[f'B{row}'] = name
-        ws[f'C{row}'] = ticker
-        ws[f'D{row}'] = value
-        ws[f'D{row}'].number_format = '"$"#,##0'
-        ws[f'E{row}'] = er
-        ws[f'E{row}'].number_format = '0.00%'
-        ws[f'F{row}'] = f'=D{row}*E{row}'
-        ws[f'F{row}'].number_format = '"$"#,##0.00'
-        # Rating based on expense ratio
-        ws[f'G{row}'] = f'=IF(E{row}<=0.001,"⭐⭐⭐⭐⭐",IF(E{row}<=0.005,"⭐⭐⭐⭐",IF(E{row}<=0.01,"⭐⭐⭐",IF(E{row}<=0.015,"⭐⭐","⭐"))))'
-        row += 1
-    
-    # Add empty rows
-    for _ in range(10):
-        for i in range(6):
-            col = get_column_letter(2 + i)
-            apply_style(ws[f'{col}{row}'], styles['data'])
-        ws[f'F{row}'] = f'=IF(D{row}="","",D{row}*E{row})'
-        ws[f'G{row}'] = f'=IF(E{row}="","",IF(E{row}<=0.001,"⭐⭐⭐⭐⭐",IF(E{row}<=0.005,"⭐⭐⭐⭐",IF(E{row}<=0.01,"⭐⭐⭐",IF(E{row}<=0.015,"⭐⭐","⭐")))))'
-        row += 1
-    inv_end = row - 1
-    
-    # Conditional formatting for expense ratios
-    ws.conditional_formatting.add(f'E{inv_start}:E{inv_end}',
-        ColorScaleRule(start_type='num', start_value=0, start_color='63BE7B',
-                      mid_type='num', mid_value=0.005, mid_color='FFEB84',
-                      end_type='num', end_value=0.02, end_color='F8696B'))
-    
-    # Long-term Impact Sheet
-    ws_impact = wb.create_sheet("Long-term Impact")
-    start_row = add_branding_header(ws_impact, "30-Year Fee Impact", "The True Cost of Fees")
-    
-    for col in range(1, 10):
-        ws_impact.column_dimensions[get_column_letter(col)].width = 16
-    ws_impact.column_dimensions['B'].width = 25
-    
-    row = start_row
-    
-    # Assumptions
-    ws_impact[f'B{row}'] = "ASSUMPTIONS"
-    apply_style(ws_impact[f'B{row}'], styles['section'])
-    ws_impact.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    ws_impact[f'B{row}'] = "Starting Portfolio"
-    ws_impact[f'C{row}'] = "='Portfolio Analysis'!C8"
-    ws_impact[f'C{row}'].number_format = '"$"#,##0'
-    start_portfolio_row = row
-    row += 1
-    
-    ws_impact[f'B{row}'] = "Annual Contribution"
-    ws_impact[f'C{row}'] = 24000
-    ws_impact[f'C{row}'].number_format = '"$"#,##0'
-    annual_contrib_row = row
-    row += 1
-    
-    ws_impact[f'B{row}'] = "Expected Return (before fees)"
-    ws_impact[f'C{row}'] = 0.08
-    ws_impact[f'C{row}'].number_format = '0.0%'
-    return_row = row
-    row += 1
-    
-    ws_impact[f'B{row}'] = "Current Expense Ratio"
-    ws_impact[f'C{row}'] = "='Portfolio Analysis'!C9"
-    ws_impact[f'C{row}'].number_format = '0.00%'
-    current_er_row = row
-    row += 1
-    
-    ws_impact[f'B{row}'] = "Low-Cost Alternative"
-    ws_impact[f'C{row}'] = 0.0003  # VTI level
-    ws_impact[f'C{row}'].number_format = '0.00%'
-    low_er_row = row
-    row += 3
-    
-    # 30-year projection
-    ws_impact[f'B{row}'] = "30-YEAR PROJECTION"
-    apply_style(ws_impact[f'B{row}'], styles['section'])
-    ws_impact.merge_cells(f'B{row}:F{row}')
-    row += 2
-    
-    headers = ['Year', 'Current Fees', 'Low-Cost', 'Fee Difference', 'Cumulative Lost']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_impact[f'{col}{row}'] = h
-        apply_style(ws_impact[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    proj_start = row
-    for year in range(1, 31):
-        ws_impact[f'B{row}'] = year
-        # Current fees portfolio value
-        if year == 1:
-            ws_impact[f'C{row}'] = f'=($C${start_portfolio_row}+$C${annual_contrib_row})*(1+$C${return_row}-$C${current_er_row})'
-            ws_impact[f'D{row}'] = f'=($C${start_portfolio_row}+$C${annual_contrib_row})*(1+$C${return_row}-$C${low_er_row})'
+    def holdings():
+        """A fresh pass over the holdings; an imported CSV is re-read, never held in memory"""
+        if data['holdings_csv']:
+            return portfolio_holdings(data['holdings_csv'])
+        return iter(data['investments'])
+    
+    # Cheapest comparable funds for each holding, from the fund catalog
+    catalog = load_fund_catalog(os.path.expanduser(data['fund_catalog'] or FUND_CATALOG_FILE))
+    by_ticker = {}  # large portfolios hold the same fund in many accounts
+    
+    def match(ticker):
+        """(catalog fund or None, cheapest alternatives) for a holding's ticker"""
+        key = ticker.strip().upper()
+        if key not in by_ticker:
+            fund = catalog.lookup(key)
+            alternatives = catalog.cheapest(fund[2], FUND_ALTERNATIVES, exclude=fund[0]) if fund else []
+            by_ticker[key] = (fund, alternatives)
+        return by_ticker[key]
+    
+    def savings(value, er, alternatives):
+        """Yearly saving from switching a holding to its cheapest alternative"""
+        return max(0.0, value * (er - alternatives[0][4])) if alternatives else 0.0
+    
+    # One pass for the count, the totals, the comparison table's size and the
+    # holdings with the most to save; the holdings table streams the holdings
+    # again as it is written
+    holding_count = 0
+    holdings_value = holdings_fees = 0.0
+    comparison_count = 0  # each holding, its alternatives and a blank row
+    most_savings = []  # min-heap of (savings, -index, comparison rows), LARGE_PORTFOLIO_COMPARISONS long
+    for index, (_, ticker, value, er) in enumerate(holdings()):
+        value, er = float(value), float(er)
+        holding_count += 1
+        holdings_value += value
+        holdings_fees += value * er
+        alternatives = match(ticker)[1]
+        comparison_count += len(alternatives) + 2
+        entry = (savings(value, er, alternatives), -index, len(alternatives) + 2)
+        if len(most_savings) < LARGE_PORTFOLIO_COMPARISONS:
+            heapq.heappush(most_savings, entry)
         else:
-            ws_impact[f'C{row}'] = f'=(C{row-1}+$C${annual_contrib_row})*(1+$C${return_row}-$C${current_er_row})'
-            ws_impact[f'D{row}'] = f'=(D{row-1}+$C${annual_contrib_row})*(1+$C${return_row}-$C${low_er_row})'
-        ws_impact[f'E{row}'] = f'=D{row}-C{row}'
-        ws_impact[f'F{row}'] = f'=E{row}'
-        
-        ws_impact[f'C{row}'].number_format = '"$"#,##0'
-        ws_impact[f'D{row}'].number_format = '"$"#,##0'
-        ws_impact[f'E{row}'].number_format = '"$"#,##0'
-        ws_impact[f'F{row}'].number_format = '"$"#,##0'
-        row += 1
-    proj_end = row - 1
-    
-    # Summary
-    row += 2
-    ws_impact[f'B{row}'] = "30-YEAR SUMMARY"
-    apply_style(ws_impact[f'B{row}'], styles['section'])
-    ws_impact.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    ws_impact[f'B{row}'] = "With Current Fees"
-    ws_impact[f'C{row}'] = f'=C{proj_end}'
-    ws_impact[f'C{row}'].number_format = '"$"#,##0'
-    ws_impact[f'C{row}'].font = Font(size=14)
-    row += 1
-    
-    ws_impact[f'B{row}'] = "With Low-Cost Funds"
-    ws_impact[f'C{row}'] = f'=D{proj_end}'
-    ws_impact[f'C{row}'].number_format = '"$"#,##0'
-    ws_impact[f'C{row}'].font = Font(size=14, color=ACCENT_GREEN)
-    row += 1
-    
-    ws_impact[f'B{row}'] = "TOTAL COST OF FEES"
-    ws_impact[f'B{row}'].font = Font(bold=True, size=14)
-    ws_impact[f'C{row}'] = f'=C{row-1}-C{row-2}'
-    ws_impact[f'C{row}'].number_format = '"$"#,##0'
-    ws_impact[f'C{row}'].font = Font(bold=True, size=18, color=ACCENT_RED)
-    ws_impact[f'C{row}'].fill = PatternFill(start_color="FFCCCB", end_color="FFCCCB", fill_type='solid')
-    
-    # Add chart
-    chart = LineChart()
-    chart.title = "30-Year Portfolio Growth Comparison"
-    chart.style = 10
-    chart.y_axis.title = "Portfolio Value ($)"
-    chart.x_axis.title = "Year"
-    chart.width = 18
-    chart.height = 12
-    
-    data = Reference(ws_impact, min_col=3, min_row=proj_start-1, max_col=4, max_row=proj_end)
-    cats = Reference(ws_impact, min_col=2, min_row=proj_start, max_row=proj_end)
-    chart.add_data(data, titles_from_data=True)
-    chart.set_categories(cats)
-    
-    ws_impact.add_chart(chart, 'H8')
-    
-    # Fee Comparison Sheet
-    ws_compare = wb.create_sheet("Fee Comparison")
-    start_row = add_branding_header(ws_compare, "Fund Comparison", "Find Lower-Cost Alternatives")
-    
-    for col in range(1, 10):
-        ws_compare.column_dimensions[get_column_letter(col)].width = 14
-    ws_compare.column_dimensions['B'].width = 30
-    
-    row = start_row
-    
-    ws_compare[f'B{row}'] = "COMPARE SIMILAR FUNDS"
-    apply_style(ws_compare[f'B{row}'], styles['section'])
-    ws_compare.merge_cells(f'B{row}:G{row}')
-    row += 2
-    
-    headers = ['Fund Name', 'Ticker', 'Type', 'Expense Ratio', '10Y Return', 'Morningstar']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_compare[f'{col}{row}'] = h
-        apply_style(ws_compare[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    # S&P 500 Comparison
-    ws_compare[f'B{row}'] = "S&P 500 Index Funds"
-    ws_compare[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws_compare.merge_cells(f'B{row}:G{row}')
-    row += 1
-    
-    sp500_funds = [
-        ('Fidelity 500 Index', 'FXAIX', 'Index', 0.00015, 0.1215, '⭐⭐⭐⭐⭐'),
-        ('Vanguard 500 Index', 'VFIAX', 'Index', 0.0004, 0.1214, '⭐⭐⭐⭐⭐'),
-        ('Schwab S&P 500 Index', 'SWPPX', 'Index', 0.0002, 0.1213, '⭐⭐⭐⭐⭐'),
-        ('iShares S&P 500 ETF', 'IVV', 'ETF', 0.0003, 0.1214, '⭐⭐⭐⭐⭐'),
-        ('American Funds Gr Fund', 'AGTHX', 'Active', 0.0062, 0.1185, '⭐⭐⭐⭐'),
-    ]
-    
-    for name, ticker, type_, er, ret, rating in sp500_funds:
-        ws_compare[f'B{row}'] = name
-        ws_compare[f'C{row}'] = ticker
-        ws_compare[f'D{row}'] = type_
-        ws_compare[f'E{row}'] = er
-        ws_compare[f'E{row}'].number_format = '0.00%'
-        ws_compare[f'F{row}'] = ret
-        ws_compare[f'F{row}'].number_format = '0.0%'
-        ws_compare[f'G{row}'] = rating
-        row += 1
-    
-    row += 2
-    ws_compare[f'B{row}'] = "Total Bond Market Funds"
-    ws_compare[f'B{row}'].font = Font(bold=True, color=HONEY)
-    ws_compare.merge_cells(f'B{row}:G{row}')
-    row += 1
-    
-    bond_funds = [
-        ('Vanguard Total Bond', 'BND', 'Index', 0.0003, 0.0145, '⭐⭐⭐⭐'),
-        ('Fidelity US Bond Index', 'FXNAX', 'Index', 0.00025, 0.0148, '⭐⭐⭐⭐'),
-        ('iShares Core US Agg Bond', 'AGG', 'ETF', 0.0003, 0.0142, '⭐⭐⭐⭐'),
-        ('PIMCO Total Return', 'PTTRX', 'Active', 0.0071, 0.0185, '⭐⭐⭐'),
-    ]
-    
-    for name, ticker, type_, er, ret, rating in bond_funds:
-        ws_compare[f'B{row}'] = name
-        ws_compare[f'C{row}'] = ticker
-        ws_compare[f'D{row}'] = type_
-        ws_compare[f'E{row}'] = er
-        ws_compare[f'E{row}'].number_format = '0.00%'
-        ws_compare[f'F{row}'] = ret
-        ws_compare[f'F{row}'].number_format = '0.0%'
-        ws_compare[f'G{row}'] = rating
-        row += 1
-    
-    # Hidden Fees Sheet
-    ws_hidden = wb.create_sheet("Hidden Fees")
-    start_row = add_branding_header(ws_hidden, "Hidden Fee Checklist", "Fees You Might Be Missing")
-    
-    ws_hidden.column_dimensions['B'].width = 40
-    ws_hidden.column_dimensions['C'].width = 20
-    ws_hidden.column_dimensions['D'].width = 30
-    
-    row = start_row
-    
-    ws_hidden[f'B{row}'] = "HIDDEN FEE CHECKLIST"
-    apply_style(ws_hidden[f'B{row}'], styles['section'])
-    ws_hidden.merge_cells(f'B{row}:D{row}')
-    row += 2
-    
-    headers = ['Fee Type', 'Your Cost', 'How to Reduce']
-    for i, h in enumerate(headers):
-        col = get_column_letter(2 + i)
-        ws_hidden[f'{col}{row}'] = h
-        apply_style(ws_hidden[f'{col}{row}'], styles['header'])
-    row += 1
-    
-    hidden_fees = [
-        ('401(k) Plan Admin Fees', '', 'Ask HR for fee disclosure'),
-        ('Mutual Fund Load Fees', '', 'Buy no-load funds only'),
-        ('12b-1 Marketing Fees', '', 'Check in fund prospectus'),
-        ('Account Maintenance Fees', '', 'Meet minimum balance or switch'),
-        ('Trading Commissions', '', 'Use commission-free brokers'),
-        ('Bid-Ask Spreads (ETFs)', '', 'Use limit orders'),
-        ('Advisory/Management Fees', '', 'Consider DIY or robo-advisors'),
-        ('Wire Transfer Fees', '', 'Use ACH instead'),
-        ('Paper Statement Fees', '', 'Go paperless'),
-        ('Account Closure Fees', '', 'Check before opening'),
-    ]
-    
-    for fee, cost, reduce in hidden_fees:
-        ws_hidden[f'B{row}'] = fee
-        ws_hidden[f'C{row}'] = cost
-        ws_hidden[f'C{row}'].fill = PatternFill(start_color=HONEY_LIGHT, end_color=HONEY_LIGHT, fill_type='solid')
-        ws_hidden[f'D{row}'] = reduce
-        ws_hidden[f'D{row}'].font = Font(size=10, color=DARK_TEXT)
-        row += 1
-    
-    row += 2
-    ws_hidden[f'B{row}'] = "💡 PRO TIP: Request a 'fee disclosure statement' from all your accounts annually."
-    ws_hidden[f'B{row}'].font = Font(italic=True, color=HONEY)
-    ws_hidden.merge_cells(f'B{row}:D{row}')
+            heapq.heappushpop(most_savings, entry)
+    large = holding_count >= LARGE_PORTFOLIO_HOLDINGS
+    
+    def holding_records():
+        """(name, ticker, value, expense ratio, annual cost, rating, cheapest alternative,
+        savings, its expense ratio); small portfolios leave cost, rating and savings to
+        formulas, large ones get values: thousands of rows of IFs make the workbook
+        slow to open and recalculate"""
+        for name, ticker, value, er in holdings():
+            _, alternatives = match(ticker)
+            best = alternatives[0][0] if alternatives else "—"
+            if large:
+                value, er = float(value), float(er)
+                yield (name, ticker, value, er, value * er, fee_rating(er), best,
+                       savings(value, er, alternatives), None)
+            else:
+                yield (name, ticker, value, er, None, None, best,
+                       None if alternatives else 0, alternatives[0][4] if alternatives else None)
+    
+    # Long-term Impact
+    years = data['projection_years']
+    accrual = fee_accrual(data['fee_accrual'])
+    invested = contribution_timing(data['contribution_timing'])
+    fee_factors = {er: f'(1-[impact.{er}]/365)^(365/12)' if accrual == 'daily' else f'(1-[impact.{er}]/12)'
+                   for er in ('current_er', 'low_cost_er')}
+    
+    holdings_er = holdings_fees / holdings_value if holdings_value else 0.0
+    bands = simulate_fee_impact(holdings_value, data['annual_contribution'], data['expected_return'],
+                                data['return_volatility'], holdings_er, data['low_cost_er'], years,
+                                data['simulation_paths'], data['simulation_seed'], data['simulation_workers'])
+    band_cells = np.round(bands.T, 2).tolist()
+    bands_note = ""
+    if band_cells:
+        low, median, high = band_cells[-1]
+        bands_note = (f"In {years} years fees most likely cost you ${median:,.0f}, "
+                      f"and 8 times in 10 between ${low:,.0f} and ${high:,.0f}.")
+    
+    scenario_ers = np.round(np.linspace(0, FEE_SCENARIO_MAX_ER, max(int(data['fee_scenarios']), 2)), 6)
+    ending = fee_drag_balances(holdings_value, data['annual_contribution'], data['expected_return'],
+                               scenario_ers, years * 12, data['contribution_timing'], accrual)[:, -1]
+    scenario_cost = ending[0] - ending
+    share_lost = np.divide(scenario_cost, ending[0], out=np.zeros_like(ending), where=ending[0] != 0)
+    
+    # Fee Comparison: large portfolios compare only the holdings with the most
+    # to save, keeping their portfolio order
+    compared = None
+    if large:
+        compared = {-index for _, index, _ in most_savings}
+        comparison_count = sum(rows for _, _, rows in most_savings)
+        comparison_note = (f"The {FUND_ALTERNATIVES} cheapest funds in the asset class of the "
+                           f"{len(compared)} holdings with the largest savings, "
+                           f"from a catalog of {len(catalog):,} funds.")
+    else:
+        comparison_note = (f"The {FUND_ALTERNATIVES} cheapest funds in each holding's asset class, "
+                           f"from a catalog of {len(catalog):,} funds.")
+    
+    holding_name = {'font': Font(bold=True, color=HONEY)}
+    money = {'number_format': '"$"#,##0'}
+    percent = {'number_format': '0.00%'}
+    fund_return = {'number_format': '0.0%'}
+    
+    def comparison_rows():
+        """The member's holding, then its alternatives, then a blank row"""
+        for index, (name, ticker, _, _) in enumerate(holdings()):
+            if compared is not None and index not in compared:
+                continue
+            fund, alternatives = match(ticker)
+            k = index + 1
+            cells = [(name, holding_name), ticker, fund[2] if fund else "Not in catalog",
+                     (f"=[$holdings.expense_ratio#{k}]", percent)]
+            if fund:
+                cells += [(fund[5], fund_return), '⭐' * fund[6]]
+            yield cells
+            for alt_ticker, alt_name, _, alt_type, alt_er, alt_return, alt_rating in alternatives:
+                # Growth of the holding alone, no contributions
+                yield [f"   {alt_name}", alt_ticker, alt_type, (alt_er, percent), (alt_return, fund_return),
+                       '⭐' * alt_rating,
+                       (f"=[$holdings.value#{k}]*([$holdings.expense_ratio#{k}]-E{{row}})", money),
+                       (f"=[$holdings.value#{k}]*((1+[$impact.expected_return]-E{{row}})^{years}"
+                        f"-(1+[$impact.expected_return]-[$holdings.expense_ratio#{k}])^{years})", money)]
+            yield []
+    
+    render_layout(wb, 'fee_analyzer', {
+        **data,
+        'fee_accrual': accrual,
+        'holding_records': holding_records, 'holding_count': holding_count,
+        'holding_blank_rows': 0 if large else 10,
+        'current_fee_factor': fee_factors['current_er'], 'low_cost_fee_factor': fee_factors['low_cost_er'],
+        'timing_exponent': repr(invested - 1),
+        'projection_records': [(year,) for year in range(1, years + 1)],
+        'band_records': [(year, *values) for year, values in enumerate(band_cells, 1)],
+        'has_bands': bool(band_cells), 'bands_note': bands_note,
+        'scenario_count': len(scenario_ers),
+        'scenario_records': list(zip(scenario_ers.tolist(), np.round(ending, 2).tolist(),
+                                     np.round(scenario_cost, 2).tolist(), share_lost.tolist())),
+        'comparison_note': comparison_note,
+        'comparison_rows': comparison_rows, 'comparison_count': comparison_count,
+    })
     
     if "Sheet" in wb.sheetnames:
         del wb["Sheet"]
     
-    wb.save(output_path)
+    save_workbook(wb, output_path)
     print(f"✅ Created: {output_path}")
 
 
+# ============================================================================
+# MEMBER TEMPLATES
+# ============================================================================
+# Many members share a profile apart from a few numbers (balances, amounts,
+# rates) that each fill one input cell and that no Python code computes with.
+# Their workbooks differ only in those cells and in the formula results that
+# read them. With --templates, the second member seen with a profile shape
+# turns their build into a template: its zip entries, with the sheet XML split
+# around those cells and every formula cell. Later members of that shape get
+# the template with their numbers written in and the formulas re-evaluated,
+# instead of a full build.
+#
+# A template is only kept if it provably patches the way a build would: one
+# more build with a sentinel number in every field locates the cells, and the
+# template patched with the sentinels has to match that build byte for byte.
+# Tools whose numbers feed the Python engines (the tax engine, the payoff
+# simulation, the fee projections) declare no fields and are always built.
+
+# Profile fields that are plain input cells, by builder; '*' is every list item
+TEMPLATE_FIELDS = {
+    create_cash_flow_command_center: [
+        ('income_sources', '*', 3), ('fixed_expenses', '*', 3),
+        ('variable_expenses', '*', 1), ('variable_expenses', '*', 2),
+        ('category_growth', '*', 1), ('planned_expenses', '*', 2),
+        ('settings', 'emergency_fund'), ('settings', 'target_savings_rate'),
+        ('settings', 'income_growth'), ('settings', 'expense_growth'),
+    ],
+    create_net_worth_dashboard: [
+        ('cash_accounts', '*', 2), ('investments', '*', 2), ('retirement_accounts', '*', 2),
+        ('real_estate', 'primary_residence'), ('real_estate', 'rental_property'),
+        ('other_assets', 'vehicles'), ('other_assets', 'other'),
+        ('mortgage', 2), ('mortgage', 3), ('mortgage', 4),
+        *((liabilities, '*', column) for liabilities in ('auto_loans', 'student_loans', 'credit_cards')
+          for column in (2, 3, 4)),
+    ],
+}
+
+TEMPLATE_CACHE_SIZE = 256       # templates kept per process
+TEMPLATE_SHAPES_SIZE = 65536    # profile shapes remembered until their second member
+TEMPLATE_SENTINEL = 7777777.0   # field i is probed with TEMPLATE_SENTINEL + i / 8
+
+# Every <c> element in a sheet: coordinate, style attribute
+_CELL_XML_RE = re.compile(rb'<c r="([A-Z]+[0-9]+)"( s="[0-9]+")?[^>]*?(?:/>|>.*?</c>)', re.S)
+
+_templates = {}          # (builder, profile shape) -> _WorkbookTemplate, or None if it can't be templated
+_template_shapes = set()  # shapes built once so far
+
+def _field_paths(data, pattern, path=()):
+    """Yield (path, value) for every value in data that pattern matches"""
+    if not pattern:
+        yield path, data
+        return
+    step, rest = pattern[0], pattern[1:]
+    if step == '*':
+        if isinstance(data, (list, tuple)):
+            for index, item in enumerate(data):
+                yield from _field_paths(item, rest, path + (index,))
+        return
+    try:
+        item = data[step]
+    except (KeyError, IndexError, TypeError):
+        return
+    yield from _field_paths(item, rest, path + (step,))
+
+def _replace_fields(data, values):
+    """Copy of data with the value at each path of values swapped for the new one"""
+    def replace(node, path):
+        if path in values:
+            return values[path]
+        if isinstance(node, dict):
+            return {key: replace(item, path + (key,)) for key, item in node.items()}
+        if isinstance(node, (list, tuple)):
+            return type(node)(replace(item, path + (index,)) for index, item in enumerate(node))
+        return node
+    return replace(data, ())
+
+def _same_result(left, right):
+    if isinstance(left, FormulaError) and isinstance(right, FormulaError):
+        return left.code == right.code
+    return type(left) is type(right) and left == right
+
+def _cell_xml(coordinate, style_attr, value, result=None):
+    """Serialize one cell exactly as the worksheet writer would"""
+    row, column = coordinate_to_tuple(coordinate)
+    cell = Cell(None, row=row, column=column, value=value)
+    out = BytesIO()
+    with xmlfile(out) as xf:
+        if result is None:
+            write_cell(xf, None, cell, False)
+        else:
+            write_formula_cell(xf, cell, False, result)
+    xml = out.getvalue()
+    prefix = len(f'<c r="{coordinate}"')
+    return xml[:prefix] + style_attr + xml[prefix:]
+
+def _sentinel_cells(content, sentinels):
+    """{field index: (sheet title, coordinate)} of the cell holding each sentinel in a
+    saved workbook, or None unless every sentinel sits in exactly one input cell"""
+    wanted = {sentinel: index for index, sentinel in enumerate(sentinels)}
+    cells = {}
+    wb = openpyxl.load_workbook(BytesIO(content))
+    for ws in wb.worksheets:
+        for row in ws.iter_rows():
+            for cell in row:
+                if type(cell.value) not in (int, float) or cell.value not in wanted:
+                    continue
+                index = wanted[cell.value]
+                if index in cells:
+                    return None
+                cells[index] = (ws.title, cell.coordinate)
+    return cells if len(cells) == len(sentinels) else None
+
+class _TemplateSheet:
+    """Sheet XML split around its input and formula cells, ready to be re-joined with new values"""
+
+    def __init__(self, xml, inputs, formulas):
+        self.pieces = []
+        self.cells = []
+        pos = 0
+        for match in _CELL_XML_RE.finditer(xml):
+            coordinate = match[1].decode()
+            field = inputs.get(coordinate)
+            formula = formulas.get(coordinate)
+            if field is None and formula is None:
+                continue
+            self.pieces.append(xml[pos:match.start()])
+            self.cells.append((coordinate, match[2] or b'', field, formula, match[0]))
+            pos = match.end()
+        self.pieces.append(xml[pos:])
+
+    def patch(self, values, results, template_results):
+        out = [self.pieces[0]]
+        for (coordinate, style_attr, field, formula, xml), piece in zip(self.cells, self.pieces[1:]):
+            if field is not None:
+                out.append(_cell_xml(coordinate, style_attr, values[field]))
+            else:
+                # Only re-serialize formulas whose result differs from the template's
+                key, text = formula
+                result = results.get(key)
+                if _same_result(result, template_results.get(key)):
+                    out.append(xml)
+                else:
+                    out.append(_cell_xml(coordinate, style_attr, text, result))
+            out.append(piece)
+        return b''.join(out)
+
+class _WorkbookTemplate:
+    """A saved workbook held as zip entries, with its field and formula cells located"""
+
+    def __init__(self, content, cells):
+        wb = openpyxl.load_workbook(BytesIO(content))
+        self.formulas = WorkbookFormulas(wb)
+        self.results = self.formulas.evaluate()
+        self.inputs = {index: (title, *coordinate_to_tuple(coordinate))
+                       for index, (title, coordinate) in cells.items()}
+        # The writer names worksheets by their position in the workbook
+        paths = {ws.title: f'xl/worksheets/sheet{index}.xml' for index, ws in enumerate(wb.worksheets, 1)}
+        inputs = {path: {} for path in paths.values()}
+        formulas = {path: {} for path in paths.values()}
+        for index, (title, coordinate) in cells.items():
+            inputs[paths[title]][coordinate] = index
+        for key, text in self.formulas.formulas.items():
+            title, row, col = key
+            formulas[paths[title]][f'{get_column_letter(col)}{row}'] = (key, text)
+
+        self.entries = []
+        self.sheets = {}
+        with ZipFile(BytesIO(content)) as archive:
+            self.date_time = archive.infolist()[0].date_time
+            for name in archive.namelist():
+                xml = archive.read(name)
+                self.entries.append((name, xml))
+                if inputs.get(name) or formulas.get(name):
+                    self.sheets[name] = _TemplateSheet(xml, inputs[name], formulas[name])
+
+    def render(self, output_path, values):
+        """Write the template with values in its field cells and every formula result to match"""
+        results = self.formulas.evaluate({self.inputs[index]: value for index, value in enumerate(values)})
+        with _ReproducibleZipFile(output_path, 'w', ZIP_DEFLATED, allowZip64=True,
+                                  date_time=self.date_time) as archive:
+            for name, xml in self.entries:
+                sheet = self.sheets.get(name)
+                archive.writestr(name, xml if sheet is None else sheet.patch(values, results, self.results))
+
+def _make_template(builder, output_path, data, paths):
+    """Template from a member's finished build, or None if patching it can't reproduce a build"""
+    sentinels = [TEMPLATE_SENTINEL + index / 8 for index in range(len(paths))]
+    probe = BytesIO()
+    try:
+        with redirect_stdout(StringIO()):
+            builder(probe, data=_replace_fields(data, dict(zip(paths, sentinels))))
+    except Exception:
+        return None
+    cells = _sentinel_cells(probe.getvalue(), sentinels)
+    if cells is None:
+        return None
+    with open(output_path, 'rb') as f:
+        template = _WorkbookTemplate(f.read(), cells)
+    check = BytesIO()
+    template.render(check, sentinels)
+    return template if check.getvalue() == probe.getvalue() else None
+
+def build_from_template(builder, output_path, data=None):
+    """Build a member workbook by patching a cached template when one fits, else in full.
+
+    Templates need the pinned SOURCE_DATE_EPOCH main() sets, so that every
+    build of a shape stamps the same dates, and the openpyxl internals that
+    cache formula results.
+    """
+    patterns = TEMPLATE_FIELDS.get(builder)
+    if not patterns or not OPENPYXL_INTERNALS or 'SOURCE_DATE_EPOCH' not in os.environ:
+        return builder(output_path, data=data)
+    data = data or {}
+    fields = [(path, value) for pattern in patterns for path, value in _field_paths(data, pattern)
+              if type(value) in (int, float) and math.isfinite(value)]
+    paths = [path for path, _ in fields]
+    try:
+        shape = (builder.__name__, json.dumps(_replace_fields(data, dict.fromkeys(paths)), sort_keys=True))
+    except (TypeError, ValueError):
+        return builder(output_path, data=data)
+
+    template = _templates.get(shape)
+    if template is not None:
+        template.render(output_path, [value for _, value in fields])
+        return
+    builder(output_path, data=data)
+    if not fields or shape in _templates:
+        return
+    if shape not in _template_shapes:
+        if len(_template_shapes) >= TEMPLATE_SHAPES_SIZE:
+            _template_shapes.clear()
+        _template_shapes.add(shape)
+        return
+    if len(_templates) >= TEMPLATE_CACHE_SIZE:
+        del _templates[next(iter(_templates))]
+    _templates[shape] = _make_template(builder, output_path, data, paths)
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
-def main():
-    output_dir = "/root/clawd/Charge-Wealth-Platform/public/downloads"
+DEFAULT_OUTPUT_DIR = "/root/clawd/Charge-Wealth-Platform/public/downloads"
+
+# Every tool the generator knows how to build, in publishing order:
+# (member profile key, builder, output filename)
+BUILDERS = [
+    ('cash_flow', create_cash_flow_command_center, "Cash-Flow-Command-Center.xlsx"),
+    ('tax_planning', create_tax_planning_command_center, "Tax-Planning-Command-Center.xlsx"),
+    ('net_worth', create_net_worth_dashboard, "Net-Worth-Dashboard.xlsx"),
+    ('debt_planner', create_debt_destruction_planner, "Debt-Destruction-Planner.xlsx"),
+    ('fee_analyzer', create_investment_fee_analyzer, "Investment-Fee-Analyzer.xlsx"),
+]
+
+# Declarative layout specs by BUILDERS key, for compile_layout() / render_layout()
+LAYOUTS = {
+    'cash_flow': CASH_FLOW_LAYOUT,
+    'tax_planning': TAX_PLANNING_LAYOUT,
+    'net_worth': NET_WORTH_LAYOUT,
+    'debt_planner': DEBT_PLANNER_LAYOUT,
+    'fee_analyzer': FEE_ANALYZER_LAYOUT,
+}
+
+MEMBER_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+# Records, per output file, the cache key it was built from and its digest
+BUILD_CACHE_FILE = ".build-cache.json"
+
+def _code_dependencies(obj, found=None):
+    """Source of every function/class in this module that obj reaches, plus the constants it reads"""
+    if found is None:
+        found = {}
+    code = obj if isinstance(obj, CodeType) else None
+    if code is None:
+        obj = inspect.unwrap(obj)
+        if obj.__qualname__ in found:
+            return found
+        if isinstance(obj, type):
+            # inspect.getsource() on a class re-parses the whole module, so
+            # hash the class as its bases plus each method's source
+            found[obj.__qualname__] = repr([base.__qualname__ for base in obj.__bases__])
+            for member in vars(obj).values():
+                if inspect.isfunction(member):
+                    _code_dependencies(member, found)
+            return found
+        found[obj.__qualname__] = inspect.getsource(obj)
+        code = obj.__code__
+
+    module_globals = globals()
+    for name in code.co_names:
+        if name not in module_globals or name in found:
+            continue
+        value = module_globals[name]
+        if isinstance(value, ModuleType):
+            continue
+        if callable(value):
+            if getattr(value, '__module__', None) == __name__:
+                _code_dependencies(value, found)
+        else:
+            found[name] = repr(value)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _code_dependencies(const, found)
+    return found
+
+def builder_cache_key(builder, data=None):
+    """Hash of everything a builder's output depends on.
+
+    Covers the builder's source, the helpers and constants it reaches (brand
+    colors, *_SAMPLE_DATA, ...), the contents of any *_FILE data file among
+    them, the member data and the openpyxl version. The build timestamp is
+    deliberately left out.
+    """
+    digest = hashlib.sha256(openpyxl.__version__.encode())
+    for name, source in sorted(_code_dependencies(builder).items()):
+        digest.update(f"\0{name}\0{source}".encode())
+        if name.endswith('_FILE') and os.path.isfile(globals()[name]):
+            digest.update(_file_digest(globals()[name]).encode())
+    digest.update(json.dumps(data, sort_keys=True, default=repr).encode())
+    return digest.hexdigest()
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_build_cache(output_dir):
+    try:
+        with open(os.path.join(output_dir, BUILD_CACHE_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_build_cache(output_dir, cache):
+    path = os.path.join(output_dir, BUILD_CACHE_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def is_up_to_date(entry, key, output_path):
+    """Whether output_path was built from key and hasn't been touched since"""
+    if not entry or entry.get('key') != key or not os.path.exists(output_path):
+        return False
+    return _file_digest(output_path) == entry.get('sha256')
+
+def write_profile(profile_dir, name, profiler, spans):
+    """Write a builder's cProfile stats and its spans as collapsed stacks"""
+    os.makedirs(profile_dir, exist_ok=True)
+    profiler.dump_stats(os.path.join(profile_dir, f"{name}.pstats"))
+    write_collapsed_stacks(os.path.join(profile_dir, f"{name}.collapsed"), spans)
+
+def run_builder(builder, output_path, data=None, templates=False, timings=False, profile_dir=None):
+    """Run one builder and report its timing and any error instead of raising"""
+    started = time.perf_counter()
+    error = None
+    spans = []
+    profiler = cProfile.Profile() if profile_dir else None
+    try:
+        with record_spans(builder.__name__) if timings else nullcontext(spans) as spans:
+            if profiler:
+                profiler.enable()
+            try:
+                if templates:
+                    build_from_template(builder, output_path, data)
+                else:
+                    builder(output_path, data=data)
+            finally:
+                if profiler:
+                    profiler.disable()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    if profiler:
+        write_profile(profile_dir, builder.__name__, profiler, spans)
+    return {
+        'builder': builder.__name__,
+        'output_path': output_path,
+        'seconds': time.perf_counter() - started,
+        'error': error,
+        'cached': False,
+        'spans': spans,
+    }
+
+def run_builders(output_dir, jobs=1, force=False, timings=False, profile_dir=None):
+    """Run every registered builder whose inputs changed, serially or across a process pool"""
+    cache = load_build_cache(output_dir)
+    results = {}
+    tasks = []
+    keys = {}
+    for _, builder, filename in BUILDERS:
+        path = os.path.join(output_dir, filename)
+        keys[filename] = builder_cache_key(builder)
+        if not force and is_up_to_date(cache.get(filename), keys[filename], path):
+            results[filename] = {'builder': builder.__name__, 'output_path': path,
+                                 'seconds': 0.0, 'error': None, 'cached': True, 'spans': []}
+        else:
+            tasks.append((filename, builder, path))
+
+    if jobs <= 1 or len(tasks) <= 1:
+        for filename, builder, path in tasks:
+            results[filename] = run_builder(builder, path, timings=timings,
+                                            profile_dir=profile_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            futures = {filename: pool.submit(run_builder, builder, path, timings=timings,
+                                             profile_dir=profile_dir)
+                       for filename, builder, path in tasks}
+            for filename, future in futures.items():
+                results[filename] = future.result()
+
+    for filename, builder, path in tasks:
+        if results[filename]['error']:
+            cache.pop(filename, None)
+        else:
+            cache[filename] = {'key': keys[filename], 'sha256': _file_digest(path)}
+    save_build_cache(output_dir, cache)
+    return [results[filename] for _, _, filename in BUILDERS]
+
+def print_summary(results, elapsed):
+    """Print one line per builder plus the overall totals"""
+    print("\n📋 Build Summary")
+    for result in results:
+        if result['cached']:
+            print(f"  ⏭️  {result['builder']:<40} unchanged")
+            continue
+        status = "❌" if result['error'] else "✅"
+        print(f"  {status} {result['builder']:<40} {result['seconds']:6.2f}s")
+        if result['error']:
+            print(f"       {result['error']}")
+        for path, seconds in span_totals(result['spans']).items():
+            if len(path) > 1:
+                label = "  " * (len(path) - 2) + path[-1]
+                print(f"       {label:<38} {seconds:6.3f}s")
+    failed = sum(1 for result in results if result['error'])
+    cached = sum(1 for result in results if result['cached'])
+    print(f"\n  {len(results) - failed - cached}/{len(results)} built, {cached} unchanged "
+          f"in {elapsed:.2f}s wall time")
+
+def iter_profiles(stream):
+    """Yield (member_id, profile) for each usable JSON line of a profiles stream, warning about the rest"""
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            profile = json.loads(line)
+        except json.JSONDecodeError as exc:
+            print(f"⚠️  Line {line_no}: invalid JSON ({exc})", file=sys.stderr)
+            continue
+        member_id = str(profile.get('member_id', ''))
+        if not MEMBER_ID_PATTERN.match(member_id):
+            print(f"⚠️  Line {line_no}: missing or unsafe member_id {member_id!r}", file=sys.stderr)
+            continue
+        yield member_id, profile
+
+def iter_member_tasks(stream, output_dir):
+    """Yield a (builder, output_path, data) task for each tool in each member profile.
+
+    Profiles are read one JSON line at a time, e.g.
+    {"member_id": "m_1042", "debt_planner": {"debts": [["Visa", 5200, 0.24, 120]]}}
+    Each tool key holds overrides for that builder's *_SAMPLE_DATA.
+    """
+    for member_id, profile in iter_profiles(stream):
+        member_dir = os.path.join(output_dir, member_id)
+        os.makedirs(member_dir, exist_ok=True)
+        for key, builder, filename in BUILDERS:
+            if key in profile:
+                yield builder, os.path.join(member_dir, filename), profile[key]
+
+def iter_state_tasks(output_dir):
+    """Yield a Tax Planning Command Center task for every state, into OUTPUT_DIR/states/"""
+    state_dir = os.path.join(output_dir, "states")
+    os.makedirs(state_dir, exist_ok=True)
+    for state in STATE_TAX_BRACKETS:
+        yield (create_tax_planning_command_center,
+               os.path.join(state_dir, f"Tax-Planning-Command-Center-{state}.xlsx"), {'state': state})
+
+PROJECTION_BATCH_SIZE = 10000  # members projected per NumPy call
+
+def _projection_columns(members, profiles):
+    """cash_flow_profile_columns() for a batch, dropping (and reporting) members it can't read"""
+    try:
+        return members, cash_flow_profile_columns(profiles)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        pass
+    usable = []
+    for member_id, profile in zip(members, profiles):
+        try:
+            cash_flow_profile_columns([profile])
+        except (ValueError, TypeError, KeyError, AttributeError) as exc:
+            print(f"❌ {member_id}: {exc!r}", file=sys.stderr)
+        else:
+            usable.append((member_id, profile))
+    members, profiles = [member for member, _ in usable], [profile for _, profile in usable]
+    return members, cash_flow_profile_columns(profiles)
+
+def write_projections(stream, path):
+    """Write the cash flow projection of every member with a cash_flow profile to a CSV.
+
+    Members are projected PROJECTION_BATCH_SIZE at a time without building
+    any workbooks. Returns (members written, members skipped).
+    """
+    members_with_cash_flow = ((member_id, profile['cash_flow']) for member_id, profile in iter_profiles(stream)
+                              if 'cash_flow' in profile)
+    written = skipped = 0
+    # MEMBER_ID_PATTERN rules out anything CSV would need to quote, so rows are
+    # formatted directly (much faster than csv.writer for millions of floats)
+    row_format = '%s,%d,%.2f,%.2f,%.2f,%.2f\n'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write('member_id,month,income,expenses,net_cash_flow,balance\n')
+        while True:
+            batch = list(islice(members_with_cash_flow, PROJECTION_BATCH_SIZE))
+            if not batch:
+                break
+            members, columns = _projection_columns([member for member, _ in batch],
+                                                   [profile for _, profile in batch])
+            skipped += len(batch) - len(members)
+            written += len(members)
+            projection = project_cash_flows(columns)
+            values = np.stack([projection[key] for key in ('income', 'expenses', 'net', 'balance')], axis=2)
+            for member_id, months, rows in zip(members, columns['months'].tolist(), values.tolist()):
+                f.writelines(row_format % (member_id, month, *row) for month, row in enumerate(rows[:months], 1))
+    return written, skipped
+
+def run_batch(tasks, jobs=1, templates=False):
+    """Build a stream of member tasks, keeping only a bounded number in flight"""
+    totals = {'built': 0, 'failed': 0}
+
+    def record(result):
+        if result['error']:
+            totals['failed'] += 1
+            print(f"❌ {result['output_path']}: {result['error']}", file=sys.stderr)
+        else:
+            totals['built'] += 1
+
+    if jobs <= 1:
+        for task in tasks:
+            record(run_builder(*task, templates=templates))
+        return totals
+
+    # Never pull more than 2 tasks per worker off the stream, so memory stays
+    # flat no matter how many members the file holds.
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        for task in tasks:
+            if len(pending) >= jobs * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+            pending.add(pool.submit(run_builder, *task, templates=templates))
+        for future in pending:
+            record(future.result())
+    return totals
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the Charge Wealth premium Excel tools")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="directory the workbooks are written to")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of builder processes to run in parallel (default: 1)")
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild every tool even if its inputs are unchanged since the last build")
+    parser.add_argument("--timings", action="store_true",
+                        help="print how long each sheet, chart and save step of every builder took")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="write cProfile stats (<builder>.pstats) and collapsed span stacks "
+                             "(<builder>.collapsed) for each builder into DIR; implies --timings "
+                             "and --force")
+    parser.add_argument("--profiles", metavar="PATH",
+                        help="JSON-lines file of member profiles ('-' for stdin); writes one "
+                             "personalized workbook per tool into OUTPUT_DIR/<member_id>/")
+    parser.add_argument("--all-states", action="store_true",
+                        help="write a Tax Planning Command Center for every state into "
+                             "OUTPUT_DIR/states/ instead of the standard tools")
+    parser.add_argument("--projections", metavar="CSV",
+                        help="with --profiles: write every member's month-by-month cash flow "
+                             "projection to CSV instead of building workbooks")
+    parser.add_argument("--templates", action="store_true",
+                        help="with --profiles: reuse one workbook per profile shape, patching in "
+                             "each member's balances and amounts (cash flow and net worth)")
+    parser.add_argument("--compile-fund-catalog", nargs=2, metavar=("CSV", "OUT"),
+                        help="compile a fund catalog CSV into the memory-mapped format the "
+                             "fee analyzer reads without parsing, then exit")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compile_fund_catalog:
+        csv_path, output_path = args.compile_fund_catalog
+        started = time.perf_counter()
+        count = compile_fund_catalog(csv_path, output_path)
+        print(f"\n📚 Compiled {count:,} funds in {time.perf_counter() - started:.2f}s")
+        print(f"📁 Location: {output_path}\n")
+        return 0
+
+    if args.projections:
+        if not args.profiles:
+            print("❌ --projections needs --profiles", file=sys.stderr)
+            return 2
+        started = time.perf_counter()
+        print("\n🏦 Projecting member cash flows...\n")
+        stream = sys.stdin if args.profiles == '-' else open(args.profiles, encoding='utf-8')
+        with stream:
+            written, skipped = write_projections(stream, args.projections)
+        print(f"📋 {written} projections written, {skipped} skipped "
+              f"in {time.perf_counter() - started:.2f}s")
+        print(f"📁 Location: {args.projections}\n")
+        return 1 if skipped else 0
+
+    output_dir = args.output_dir
     os.makedirs(output_dir, exist_ok=True)
-    
+
+    # Pin the build timestamp before forking so every worker stamps the same
+    # date and the output is byte-identical to a serial run.
+    os.environ.setdefault("SOURCE_DATE_EPOCH", str(int(time.time())))
+
+    if args.profiles or args.all_states:
+        started = time.perf_counter()
+        if args.profiles:
+            print("\n🏦 Generating personalized Charge Wealth workbooks...\n")
+            stream = sys.stdin if args.profiles == '-' else open(args.profiles, encoding='utf-8')
+            with stream:
+                totals = run_batch(iter_member_tasks(stream, output_dir), jobs=args.jobs,
+                                   templates=args.templates)
+        else:
+            print("\n🏦 Generating state Tax Planning Command Centers...\n")
+            totals = run_batch(iter_state_tasks(output_dir), jobs=args.jobs)
+        print(f"\n📋 {totals['built']} workbooks built, {totals['failed']} failed "
+              f"in {time.perf_counter() - started:.2f}s")
+        print(f"📁 Location: {output_dir}\n")
+        return 1 if totals['failed'] else 0
+
     print("\n🏦 Generating Charge Wealth Premium Financial Tools...\n")
-    
-    # Generate all 5 tools
-    create_cash_flow_command_center(os.path.join(output_dir, "Cash-Flow-Command-Center.xlsx"))
-    create_tax_planning_command_center(os.path.join(output_dir, "Tax-Planning-Command-Center.xlsx"))
-    create_net_worth_dashboard(os.path.join(output_dir, "Net-Worth-Dashboard.xlsx"))
-    create_debt_destruction_planner(os.path.join(output_dir, "Debt-Destruction-Planner.xlsx"))
-    create_investment_fee_analyzer(os.path.join(output_dir, "Investment-Fee-Analyzer.xlsx"))
-    
+
+    started = time.perf_counter()
+    results = run_builders(output_dir, jobs=args.jobs, force=args.force or bool(args.profile),
+                           timings=args.timings or bool(args.profile), profile_dir=args.profile)
+    print_summary(results, time.perf_counter() - started)
+
+    if any(result['error'] for result in results):
+        print("\n⚠️  Some tools failed to generate.\n")
+        return 1
+
     print("\n✨ All premium tools generated successfully!")
     print(f"📁 Location: {output_dir}\n")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The generator is a script, not a package: import it from scripts/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
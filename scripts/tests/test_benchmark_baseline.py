@@ -0,0 +1,80 @@
+"""Benchmark baseline: shared counts, per-machine timings relative to calibration"""
+
+import benchmark_premium_tools as bench
+
+
+def result(seconds, cells, case="1x", relative=None):
+    return {'builder': 'create_cash_flow_command_center', 'case': case, 'seconds': seconds,
+            'relative': seconds * 10 if relative is None else relative,
+            'peak_mib': 1.0, 'cells': cells, 'styles': 20, 'bytes': 1000}
+
+
+def update(monkeypatch, path, machine, results):
+    monkeypatch.setattr(bench, 'machine_fingerprint', lambda: machine)
+    bench.update_baseline(path, results)
+
+
+def test_update_keeps_other_machines(tmp_path, monkeypatch):
+    path = str(tmp_path / "baseline.json")
+    update(monkeypatch, path, "fast", [result(1.0, 500)])
+    update(monkeypatch, path, "slow", [result(3.0, 500)])
+    baseline = bench.load_baseline(path)
+    assert sorted(baseline['machines']) == ['fast', 'slow']
+    assert 'seconds' not in baseline['results'][0]
+    assert bench.baseline_results(baseline, "fast")['create_cash_flow_command_center', '1x']['seconds'] == 1.0
+
+
+def test_update_replaces_only_the_cases_measured(tmp_path, monkeypatch):
+    path = str(tmp_path / "baseline.json")
+    update(monkeypatch, path, "fast", [result(1.0, 500), result(2.0, 900, "10x")])
+    update(monkeypatch, path, "fast", [result(1.5, 510)])
+    merged = bench.baseline_results(bench.load_baseline(path), "fast")
+    assert merged['create_cash_flow_command_center', '1x']['seconds'] == 1.5
+    assert merged['create_cash_flow_command_center', '10x']['cells'] == 900
+
+
+def test_timings_are_only_compared_on_the_same_machine(tmp_path, monkeypatch):
+    path = str(tmp_path / "baseline.json")
+    update(monkeypatch, path, "fast", [result(1.0, 500)])
+    baseline = bench.load_baseline(path)
+    slower = [result(3.0, 500)]
+    assert bench.compare_to_baseline(slower, bench.baseline_results(baseline, "other")) == []
+    assert bench.compare_to_baseline(slower, bench.baseline_results(baseline, "fast")) == [
+        "create_cash_flow_command_center 1x relative: 10.0 -> 30.0 (+200%)"]
+    # Cell counts are deterministic, so they are checked everywhere
+    assert bench.compare_to_baseline([result(1.0, 501)], bench.baseline_results(baseline, "other")) == [
+        "create_cash_flow_command_center 1x cells: 500 -> 501 (+0%)"]
+
+
+def test_a_slower_host_is_not_a_regression(tmp_path, monkeypatch):
+    path = str(tmp_path / "baseline.json")
+    update(monkeypatch, path, "fast", [result(1.0, 500)])
+    baseline = bench.baseline_results(bench.load_baseline(path), "fast")
+    # Twice the wall time, but the calibration workload also took twice as long
+    assert bench.compare_to_baseline([result(2.0, 500, relative=10.0)], baseline) == []
+
+
+def test_short_builds_are_not_timed(tmp_path, monkeypatch):
+    path = str(tmp_path / "baseline.json")
+    update(monkeypatch, path, "fast", [result(0.05, 500)])
+    baseline = bench.baseline_results(bench.load_baseline(path), "fast")
+    assert bench.compare_to_baseline([result(0.1, 500)], baseline) == []
+
+
+def test_too_few_repeats_only_inform(tmp_path, monkeypatch):
+    path = str(tmp_path / "baseline.json")
+    update(monkeypatch, path, "fast", [result(1.0, 500)])
+    baseline = bench.baseline_results(bench.load_baseline(path), "fast")
+    # One noisy run doubling the build time fails a timed comparison...
+    assert bench.compare_to_baseline([result(2.0, 500)], baseline) == [
+        "create_cash_flow_command_center 1x relative: 10.0 -> 20.0 (+100%)"]
+    # ...but below MIN_COMPARED_REPEATS only the deterministic counts count
+    assert bench.compare_to_baseline([result(2.0, 500)], baseline, timed=False) == []
+    assert bench.compare_to_baseline([result(2.0, 501)], baseline, timed=False) == [
+        "create_cash_flow_command_center 1x cells: 500 -> 501 (+0%)"]
+
+
+def test_baseline_updates_need_enough_repeats(tmp_path):
+    path = tmp_path / "baseline.json"
+    assert bench.main(["--repeats", "1", "--update-baseline", "--baseline", str(path)]) == 2
+    assert not path.exists()
@@ -0,0 +1,71 @@
+"""Cash flow projection against hand-computed months and the Dashboard grid"""
+
+import numpy as np
+import pytest
+from openpyxl import load_workbook
+
+import generate_premium_tools as tools
+
+PROFILE = {
+    'income_sources': [('Job', 'W-2', 'Monthly', 5000), ('Bonus', 'W-2', 'Quarterly', 1500)],
+    'fixed_expenses': [('Rent', 'Housing', 1, 2000)],
+    'variable_expenses': [('Groceries', 600, 500)],
+    # Matched to 'Housing' ignoring case, as SUMIF does
+    'category_growth': [('housing', 0.12)],
+    # Month 2.5 is not a whole month and month 30 is past the horizon
+    'planned_expenses': [('Trip', 3, 1000), ('Half', 2.5, 50), ('Late', 30, 999)],
+    'settings': {'emergency_fund': 1000, 'income_growth': 0.0, 'expense_growth': 0.0,
+                 'projection_months': 12},
+}
+
+
+def test_profile_columns():
+    columns = tools.cash_flow_profile_columns([PROFILE])
+    assert columns['income'].tolist() == [5500]
+    assert columns['expenses'].tolist() == [2500]
+    assert columns['category_amount'].tolist() == [[2000]]
+    assert columns['category_rate'].tolist() == [[0.12]]
+    assert columns['months'].tolist() == [12]
+    assert columns['planned_month'].tolist() == [3, 2.5, 30]
+
+
+def test_projection_by_hand():
+    projection = tools.project_cash_flows(tools.cash_flow_profile_columns([PROFILE]))
+    months = np.arange(12)
+    expenses = 500 + 2000 * 1.12 ** (months / 12)
+    expenses[2] += 1000
+    assert projection['income'][0] == pytest.approx(np.full(12, 5500))
+    assert projection['expenses'][0] == pytest.approx(expenses)
+    assert projection['net'][0, 0] == pytest.approx(3000)
+    assert projection['balance'][0] == pytest.approx(1000 + np.cumsum(5500 - expenses))
+
+
+def test_shorter_horizons_are_padded_with_nan():
+    longer = dict(PROFILE, settings=dict(PROFILE['settings'], projection_months=24))
+    projection = tools.project_cash_flows(tools.cash_flow_profile_columns([PROFILE, longer]))
+    assert projection['balance'].shape == (2, 24)
+    assert np.isnan(projection['balance'][0, 12:]).all()
+    assert not np.isnan(projection['balance'][1]).any()
+    assert projection['balance'][1, :12] == pytest.approx(projection['balance'][0, :12])
+
+
+def test_income_and_expenses_grow_once_a_year_compounded_monthly():
+    profile = dict(PROFILE, category_growth=[], planned_expenses=[],
+                   settings=dict(PROFILE['settings'], income_growth=0.10, expense_growth=0.05,
+                                 projection_months=13))
+    projection = tools.project_cash_flows(tools.cash_flow_profile_columns([profile]))
+    assert projection['income'][0, 12] == pytest.approx(5500 * 1.10)
+    assert projection['expenses'][0, 12] == pytest.approx(2500 * 1.05)
+
+
+def test_projection_matches_the_dashboard_grid(tmp_path):
+    path = str(tmp_path / "cash_flow.xlsx")
+    tools.create_cash_flow_command_center(path)
+    ws = load_workbook(path, data_only=True)["Dashboard"]
+    rows = {ws.cell(row=row, column=2).value: row for row in range(1, ws.max_row + 1)}
+    projection = tools.project_cash_flows(tools.cash_flow_profile_columns([{}]))
+    months = tools.CASH_FLOW_SAMPLE_DATA['settings']['projection_months']
+    for label, key in [("Projected Income", 'income'), ("Projected Expenses", 'expenses'),
+                       ("Net Cash Flow", 'net'), ("Cumulative Balance", 'balance')]:
+        grid = [ws.cell(row=rows[label], column=3 + month).value for month in range(months)]
+        assert grid == pytest.approx(projection[key][0].tolist()), label
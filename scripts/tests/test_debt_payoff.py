@@ -0,0 +1,141 @@
+"""Debt payoff simulation against a month-by-month reference and hand-checked cases"""
+
+import pytest
+from openpyxl import load_workbook
+
+import generate_premium_tools as tools
+
+SAMPLE_DEBTS = tools.DEBT_PLANNER_SAMPLE_DATA['debts']
+
+
+def reference_payoff(debts, budget, order, max_months=tools.PAYOFF_MAX_MONTHS):
+    """(months to debt-free or 0, total interest) paying one debt at a time in plain Python"""
+    balances = [float(balance) for _, balance, _, _ in debts]
+    interest_total = 0.0
+    for month in range(1, max_months + 1):
+        if not any(balance > 0 for balance in balances):
+            return month - 1, interest_total
+        owed = []
+        for balance, (_, _, rate, _) in zip(balances, debts):
+            interest_total += balance * rate / 12
+            owed.append(balance * (1 + rate / 12))
+        paid = [min(minimum, amount) for amount, (_, _, _, minimum) in zip(owed, debts)]
+        if sum(paid) > budget:
+            paid = [payment * budget / sum(paid) for payment in paid]
+        extra = max(budget - sum(paid), 0)
+        for index in order:
+            top_up = min(extra, owed[index] - paid[index])
+            paid[index] += top_up
+            extra -= top_up
+        balances = [amount - payment for amount, payment in zip(owed, paid)]
+        balances = [0.0 if balance < 0.005 else balance for balance in balances]
+    return (max_months if not any(balance > 0 for balance in balances) else 0), interest_total
+
+
+def test_strategy_orders_on_the_sample_debts():
+    result = tools.simulate_payoff(SAMPLE_DEBTS, 1500)
+    # Avalanche: highest rate first; snowball: smallest balance first
+    assert result['orders'].tolist() == [[0, 1, 4, 2, 3], [4, 1, 0, 2, 3]]
+
+
+def test_avalanche_and_snowball_on_the_sample_debts():
+    result = tools.simulate_payoff(SAMPLE_DEBTS, 1500)
+    for strategy, order in enumerate(result['orders'].tolist()):
+        months, interest = reference_payoff(SAMPLE_DEBTS, 1500, order)
+        assert result['months'][strategy] == months == 43
+        assert result['interest'][strategy] == pytest.approx(interest)
+    assert result['interest'].tolist() == pytest.approx([8082.29, 8494.11], abs=0.01)
+    # Every dollar paid is the principal plus the interest
+    principal = sum(balance for _, balance, _, _ in SAMPLE_DEBTS)
+    assert result['total_paid'] == pytest.approx(principal + result['interest'])
+    # Snowball clears its first (smallest) debt sooner; avalanche pays less interest
+    assert result['debt_months'][1].min() < result['debt_months'][0].min()
+    assert result['interest'][0] < result['interest'][1]
+
+
+def test_interest_free_debt_is_paid_in_equal_installments():
+    result = tools.simulate_payoff([('Loan', 1000, 0.0, 100)], 100)
+    assert result['months'].tolist() == [10, 10]
+    assert result['interest'].tolist() == [0, 0]
+    assert result['payments'][0, :, 0].tolist() == [100] * 10
+
+
+def test_freed_minimums_roll_over_to_the_next_debt():
+    debts = [('Small', 100, 0.0, 50), ('Large', 1000, 0.0, 50)]
+    result = tools.simulate_payoff(debts, 150)
+    # Month 1 pays all of Small; from month 2 Large gets the whole budget
+    assert result['payments'][1, :2].tolist() == [[100, 50], [0, 150]]
+    assert result['months'].tolist() == [8, 8]
+
+
+def test_one_month_of_interest_at_twelve_percent():
+    result = tools.simulate_payoff([('Card', 1200, 0.12, 25)], 1212)
+    assert result['months'].tolist() == [1, 1]
+    assert result['interest'].tolist() == pytest.approx([12, 12])
+
+
+def test_budget_below_the_interest_never_pays_off():
+    result = tools.simulate_payoff([('Card', 10000, 0.24, 100)], 150, max_months=120)
+    assert result['months'].tolist() == [0, 0]
+    assert result['debt_months'].tolist() == [[0], [0]]
+
+
+def test_budget_below_the_minimums_is_shared_in_proportion():
+    debts = [('Card A', 1000, 0.0, 100), ('Card B', 500, 0.0, 100)]
+    result = tools.simulate_payoff(debts, 100)
+    # $50 each until Card B is gone in month 10, then Card A gets the whole $100
+    assert result['payments'][0, 0].tolist() == [50, 50]
+    assert result['payments'].sum(axis=2).max() == pytest.approx(100)
+    assert result['months'].tolist() == [15, 15]
+    assert reference_payoff(debts, 100, [0, 1]) == (15, 0)
+
+
+def comparison_sheet(path):
+    ws = load_workbook(path)["Comparison"]
+    return {ws.cell(row=row, column=2).value: [ws.cell(row=row, column=col).value for col in (3, 4, 5)]
+            for row in range(1, ws.max_row + 1)}
+
+
+def test_a_strategy_that_never_clears_a_debt_is_not_faster(tmp_path):
+    # Avalanche puts the cent of extra on the card, which it can't clear in 50
+    # years; snowball clears the $1 loan in month 100
+    debts = [('Card', 100000, 0.24, 2000), ('Loan', 1, 0.0, 0)]
+    path = str(tmp_path / "debt.xlsx")
+    tools.create_debt_destruction_planner(path, {'debts': debts, 'monthly_budget': 2000.01})
+    assert comparison_sheet(path)['First Debt Paid Off'] == ['Never', 'Month 100', 'Snowball faster']
+
+
+def test_budget_short_of_the_minimums_is_called_out(tmp_path):
+    path = str(tmp_path / "debt.xlsx")
+    tools.create_debt_destruction_planner(path, {'debts': [('Card', 5000, 0.2, 150), ('Loan', 9000, 0.07, 200)],
+                                                 'monthly_budget': 300})
+    assert "Your budget is $50.00 short of your minimum payments." in comparison_sheet(path)
+
+
+def test_no_debts():
+    result = tools.simulate_payoff([], 1500)
+    assert result['months'].tolist() == [0, 0]
+    assert result['payments'].shape == (2, 0, 0)
+
+
+def test_sensitivity_matches_one_simulation_per_extra_payment():
+    extras = [0, 100, 500]
+    grid = tools.payoff_sensitivity(SAMPLE_DEBTS, 1500, extras)
+    assert grid['months'].tolist() == [[43, 40, 31], [43, 40, 31]]
+    for column, extra in enumerate(extras):
+        result = tools.simulate_payoff(SAMPLE_DEBTS, 1500 + extra)
+        assert grid['months'][:, column].tolist() == result['months'].tolist()
+        assert grid['interest'][:, column] == pytest.approx(result['interest'])
+
+
+def test_sensitivity_marks_budgets_that_never_pay_off():
+    grid = tools.payoff_sensitivity([('Card', 10000, 0.24, 100)], 150, [0, 1000], max_months=120)
+    # $1,150 a month at 2% a month: -ln(1 - 0.02 * 10000 / 1150) / ln(1.02) = 9.65 months
+    assert grid['months'].tolist() == [[0, 10], [0, 10]]
+
+
+@pytest.mark.parametrize("budget, step", [(300, 10), (1500, 50), (4000, 100), (30000, 1000), (90000, 1000)])
+def test_extra_payment_grid_step_reaches_the_budget(budget, step):
+    grid = tools.extra_payment_grid(budget)
+    assert len(grid) == tools.EXTRA_PAYMENT_STEPS + 1
+    assert grid[:2] == [0, step]
@@ -0,0 +1,67 @@
+"""Investment Fee Analyzer built from imported holdings CSVs"""
+
+import pytest
+from openpyxl import load_workbook
+
+import generate_premium_tools as tools
+
+
+def build(tmp_path, lines, **data):
+    csv_path = tmp_path / "holdings.csv"
+    csv_path.write_text("name,ticker,value,expense_ratio\n" + "".join(f"{line}\n" for line in lines))
+    path = str(tmp_path / "fees.xlsx")
+    tools.create_investment_fee_analyzer(path, dict(data, holdings_csv=str(csv_path), simulation_paths=0))
+    return load_workbook(path, data_only=True)
+
+
+def summary(wb):
+    ws = wb["Portfolio Analysis"]
+    return {ws.cell(row=row, column=2).value: ws.cell(row=row, column=3).value for row in range(1, 15)}
+
+
+@pytest.mark.parametrize("lines", [[], ["Cash,N/A,0,0.001", "Closed,N/A,$0.00,0.5%"]])
+def test_empty_or_zero_value_portfolio_has_no_division_error(tmp_path, lines):
+    values = summary(build(tmp_path, lines))
+    assert values["Total Portfolio Value"] == 0
+    assert values["Weighted Average Expense Ratio"] == 0
+    assert values["Annual Fee Cost"] == 0
+
+
+def test_weighted_expense_ratio(tmp_path):
+    values = summary(build(tmp_path, ["A,N/A,3000,0.01", "B,N/A,1000,0.05%"]))
+    assert values["Total Portfolio Value"] == 4000
+    assert values["Weighted Average Expense Ratio"] == pytest.approx((30 + 0.5) / 4000)
+
+
+def test_large_portfolio_streams_values_and_compares_the_biggest_savings(tmp_path):
+    count = tools.LARGE_PORTFOLIO_HOLDINGS
+    # VFIAX (0.04%) can move to FXAIX (0.015%); the unknown ticker has no alternative
+    lines = [f"Holding {i},{'VFIAX' if i % 2 else 'ZZZ'},{1000 + i},0.0004" for i in range(count)]
+    wb = build(tmp_path, lines)
+    values = summary(wb)
+    total = sum(1000 + i for i in range(count))
+    assert values["Total Portfolio Value"] == total
+    assert values["Weighted Average Expense Ratio"] == pytest.approx(0.0004)
+
+    ws = wb["Portfolio Analysis"]
+    first = next(row for row in range(1, ws.max_row + 1) if ws.cell(row=row, column=2).value == "Holding 1")
+    assert [ws.cell(row=first, column=col).value for col in range(2, 10)] == [
+        "Holding 1", "VFIAX", 1001, 0.0004, pytest.approx(0.4004), "⭐⭐⭐⭐⭐", "FXAIX",
+        pytest.approx(1001 * 0.00025)]
+    assert ws.cell(row=first + 1, column=8).value == "—"
+    assert ws.cell(row=first + 1, column=9).value == 0
+
+    # The odd (VFIAX) holdings with the largest values, in portfolio order
+    compare = wb["Fee Comparison"]
+    compared = [compare.cell(row=row, column=2).value for row in range(1, compare.max_row + 1)
+                if compare.cell(row=row, column=3).value == "VFIAX"
+                and compare.cell(row=row, column=2).font.bold]
+    expected = [i for i in range(count) if i % 2][-tools.LARGE_PORTFOLIO_COMPARISONS:]
+    assert compared == [f"Holding {i}" for i in expected]
+
+
+def test_bad_holding_names_the_line(tmp_path):
+    csv_path = tmp_path / "holdings.csv"
+    csv_path.write_text("name,ticker,value,expense_ratio\nA,VTI,100,0.0003\nB,VTI,lots,0.0003\n")
+    with pytest.raises(ValueError, match=r"holdings.csv:3: bad holding"):
+        list(tools.portfolio_holdings(str(csv_path)))
@@ -0,0 +1,129 @@
+"""Fee impact simulations against closed-form answers"""
+
+import numpy as np
+import pytest
+from openpyxl import load_workbook
+
+import generate_premium_tools as tools
+
+
+def simulate(**overrides):
+    args = dict(start_value=100000, contribution=6000, expected_return=0.07, volatility=0.15,
+                current_er=0.0085, low_er=0.0005, years=10, paths=2000, seed=7)
+    args.update(overrides)
+    return tools.simulate_fee_impact(**args)
+
+
+def test_monte_carlo_is_reproducible_for_a_seed():
+    np.testing.assert_array_equal(simulate(), simulate())
+    assert not np.array_equal(simulate(), simulate(seed=8))
+
+
+def test_monte_carlo_is_the_same_with_and_without_workers():
+    # More paths than one chunk, so the workers each get some
+    paths = tools.FEE_SIMULATION_CHUNK * 2 + 500
+    serial = simulate(paths=paths, years=3)
+    np.testing.assert_array_equal(serial, simulate(paths=paths, years=3, workers=2))
+    np.testing.assert_array_equal(serial, simulate(paths=paths, years=3, workers=4))
+
+
+def test_without_volatility_every_percentile_is_the_compounded_cost():
+    bands = simulate(contribution=0, volatility=0, current_er=0.01, low_er=0.001, years=2)
+    # Year 1: 100000 * (1.07 - 0.001) - 100000 * (1.07 - 0.01)
+    # Year 2: 106900 * 1.069 - 106000 * 1.06
+    assert bands.shape == (len(tools.FEE_PERCENTILES), 2)
+    np.testing.assert_allclose(bands, [[900, 1916.1]] * 3)
+
+
+def test_contributions_go_in_at_the_start_of_each_year():
+    bands = simulate(start_value=0, contribution=1000, volatility=0, current_er=0.01, low_er=0.0, years=1)
+    np.testing.assert_allclose(bands[:, 0], 1000 * 1.07 - 1000 * 1.06)
+
+
+def test_percentiles_are_ordered_and_grow_over_time():
+    low, median, high = simulate()
+    assert (low <= median).all() and (median <= high).all()
+    assert (np.diff(median) > 0).all()
+
+
+def test_equal_expense_ratios_cost_nothing():
+    np.testing.assert_array_equal(simulate(current_er=0.005, low_er=0.005), 0)
+
+
+def test_no_paths():
+    assert simulate(paths=0).tolist() == [[0] * 10] * 3
+
+
+def reference_balances(start, contribution, expected_return, expense_ratio, months, timing, accrual):
+    """Month-end balances one month at a time in plain Python"""
+    growth = (1 + expected_return) ** (1 / 12)
+    if accrual == 'daily':
+        fee = (1 - expense_ratio / 365) ** (365 / 12)
+    else:
+        fee = 1 - expense_ratio / 12
+    balance, balances = start, []
+    for _ in range(months):
+        deposit = contribution / 12 * growth ** tools.CONTRIBUTION_TIMING[timing]
+        balance = (balance * growth + deposit) * fee
+        balances.append(balance)
+    return balances
+
+
+def test_fee_drag_without_fees_is_the_plain_projection():
+    balances = tools.fee_drag_balances(10000, 1200, 0.06, [0.0], 24, timing='end')
+    months = np.arange(1, 25)
+    growth = 1.06 ** (1 / 12)
+    # start * g^t plus $100 a month, each grown from the month after it lands
+    expected = 10000 * growth ** months + 100 * (growth ** months - 1) / (growth - 1)
+    assert balances[0] == pytest.approx(expected)
+    assert balances[0, 11] == pytest.approx(10000 * 1.06 + 100 * (1.06 - 1) / (growth - 1))
+
+
+def test_fee_drag_without_growth_or_fees_adds_the_contributions():
+    balances = tools.fee_drag_balances(500, 1200, 0.0, [0.0], 12)
+    assert balances[0] == pytest.approx(500 + 100 * np.arange(1, 13))
+
+
+@pytest.mark.parametrize("timing", sorted(tools.CONTRIBUTION_TIMING))
+@pytest.mark.parametrize("accrual", tools.FEE_ACCRUALS)
+def test_fee_drag_matches_a_month_by_month_projection(timing, accrual):
+    ers = [0.0, 0.0003, 0.01, 0.02]
+    balances = tools.fee_drag_balances(250000, 24000, 0.08, ers, 360, timing, accrual)
+    for scenario, er in enumerate(ers):
+        expected = reference_balances(250000, 24000, 0.08, er, 360, timing, accrual)
+        assert balances[scenario] == pytest.approx(expected, rel=1e-9)
+
+
+def test_monthly_fee_factors():
+    assert tools.monthly_fee_factor(0.12, 'monthly') == pytest.approx(0.99)
+    # Charged daily, a year of fees comes to (1 - er / 365) ^ 365
+    assert tools.monthly_fee_factor(0.01, 'daily') ** 12 == pytest.approx((1 - 0.01 / 365) ** 365)
+
+
+def test_monthly_fee_factor_rejects_unknown_accruals():
+    assert tools.fee_accrual('monthly') == 'monthly'
+    with pytest.raises(ValueError, match="fee_accrual must be one of daily, monthly, not 'weekly'"):
+        tools.monthly_fee_factor(0.01, 'weekly')
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({'fee_accrual': 'weekly'}, "fee_accrual must be one of daily, monthly, not 'weekly'"),
+    ({'contribution_timing': 'never'}, "contribution_timing must be one of start, mid, end"),
+])
+def test_fee_analyzer_rejects_unknown_options(tmp_path, overrides, message):
+    with pytest.raises(ValueError, match=message):
+        tools.create_investment_fee_analyzer(str(tmp_path / "fees.xlsx"), overrides)
+
+
+def test_zero_fee_scenario_in_the_workbook_is_the_no_fee_projection(tmp_path):
+    path = str(tmp_path / "fees.xlsx")
+    tools.create_investment_fee_analyzer(path, {'simulation_paths': 0})
+    ws = load_workbook(path, data_only=True)["Long-term Impact"]
+    header = next(row for row in range(1, ws.max_row + 1) if ws.cell(row=row, column=2).value == "Expense Ratio")
+    er, balance, cost = (ws.cell(row=header + 1, column=col).value for col in (2, 3, 4))
+    data = tools.FEE_ANALYZER_SAMPLE_DATA
+    start = sum(value for _, _, value, _ in data['investments'])
+    expected = reference_balances(start, data['annual_contribution'], data['expected_return'], 0.0,
+                                  data['projection_years'] * 12, data['contribution_timing'], data['fee_accrual'])
+    assert (er, cost) == (0, 0)
+    assert balance == pytest.approx(expected[-1], abs=0.01)
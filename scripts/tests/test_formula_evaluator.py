@@ -0,0 +1,169 @@
+"""Cached formula results against the values Excel computes for the same formulas"""
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+import generate_premium_tools as tools
+
+
+def evaluate(cells, other=None):
+    """Results by coordinate for a sheet of cells, with an optional 'Other Sheet'"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet"
+    for coordinate, value in cells.items():
+        ws[coordinate] = value
+    if other:
+        ws_other = wb.create_sheet("Other Sheet")
+        for coordinate, value in other.items():
+            ws_other[coordinate] = value
+    results = tools.WorkbookFormulas(wb).evaluate()
+    return {f"{tools.get_column_letter(col)}{row}": value
+            for (title, row, col), value in results.items() if title == "Sheet"}
+
+
+def result(formula, **cells):
+    value = evaluate({**cells, 'Z1': formula}).get('Z1')
+    return value.code if isinstance(value, tools.FormulaError) else value
+
+
+@pytest.mark.parametrize("formula, expected", [
+    ('=1+2*3', 7),
+    ('=(1+2)*3', 9),
+    ('=-2^2', 4),            # negation binds tighter than ^
+    ('=2^3^2', 64),          # ^ is left-associative
+    ('=10%', 0.1),
+    ('=50%*4', 2.0),
+    ('=7/2', 3.5),
+    ('=1/0', '#DIV/0!'),
+    ('=(-8)^(1/3)', '#NUM!'),
+    ('="5"+1', 6.0),
+    ('="a"+1', '#VALUE!'),
+    ('=TRUE+1', 2),
+    ('="a"&1', 'a1'),
+    ('=1&2', '12'),
+    ('=0.1+0.2&""', '0.3'),
+    ('="x"&TRUE', 'xTRUE'),
+    ('="abc"="ABC"', True),
+    ('=1<"a"', True),
+    ('="z"<TRUE', True),
+    ('=2<>2', False),
+    ('=3>=3', True),
+])
+def test_operators(formula, expected):
+    assert result(formula) == expected
+
+
+@pytest.mark.parametrize("formula, expected", [
+    ('=IF(1,"y","n")', 'y'),
+    ('=IF(0,"y")', False),
+    ('=IF(TRUE,1,1/0)', 1),      # only the branch taken is evaluated
+    ('=IF("maybe",1,2)', '#VALUE!'),
+    ('=SUM(A1:A4)', 60),         # text and blanks in a range are skipped
+    ('=SUM(A1:A4,"5")', 65.0),   # text typed as an argument is converted
+    ('=SUM(A3)', 0),
+    ('=MAX(A1:A4)', 30),
+    ('=MIN(A1:A4)', 10),
+    ('=MAX(C1:C3)', 0),          # no numbers at all
+    ('=AND(A1:A4)', True),
+    ('=AND(1,0)', False),
+    ('=OR(0,A2)', True),
+    ('=OR(A3)', '#VALUE!'),      # a range without numbers or logicals
+    ('=SUMPRODUCT(A1:A4,B1:B4)', 10 * 1 + 20 * 2 + 30 * 4),  # text counts as 0
+    ('=SUMPRODUCT(A1:A4,B1:B3)', '#VALUE!'),
+    ('=SUM(A1:A4)/SUM(C1:C3)', '#DIV/0!'),
+])
+def test_functions(formula, expected):
+    cells = {'A1': 10, 'A2': 20, 'A3': "text", 'A4': 30, 'B1': 1, 'B2': 2, 'B3': 3, 'B4': 4}
+    assert result(formula, **cells) == expected
+
+
+@pytest.mark.parametrize("formula, expected", [
+    ('=RANK(20,A1:A4,0)', 2),    # ties share the higher rank
+    ('=RANK(10,A1:A4,0)', 4),
+    ('=RANK(30,A1:A4,1)', 4),
+    ('=RANK(20,A1:A4,1)', 2),
+    ('=RANK(20,A1:A4)', 2),
+    ('=RANK(25,A1:A4,0)', '#N/A'),
+    ('=MATCH(25,A1:A4,1)', 3),
+    ('=MATCH(30,A1:A4,1)', 4),
+    ('=MATCH(5,A1:A4,1)', '#N/A'),
+    ('=MATCH("b",B1:B3,0)', 2),  # exact match ignores case
+    ('=MATCH("z",B1:B3,0)', '#N/A'),
+    ('=INDEX(B1:B3,3)', 'C'),
+    ('=INDEX(B1:B3,4)', '#REF!'),
+    ('=INDEX(A1:A4,MATCH(25,A1:A4,1))', 20),
+    ('=SUMIF(B1:B3,"a",A1:A3)', 10),
+    ('=SUMIF(B1:B3,"A",A1:A3)', 10),
+    ('=SUMIF(B1:B3,"none",A1:A3)', 0),
+])
+def test_lookups(formula, expected):
+    cells = {'A1': 10, 'A2': 20, 'A3': 20, 'A4': 30, 'B1': "A", 'B2': "B", 'B3': "C"}
+    assert result(formula, **cells) == expected
+
+
+def test_blank_cells_compare_equal_to_zero_and_empty_text():
+    assert result('=A1=0') is True
+    assert result('=A1=""') is True
+    assert result('=A1+1') == 1
+
+
+def test_cross_sheet_references():
+    results = evaluate({'A1': "='Other Sheet'!B2*2", 'A2': "=SUM('Other Sheet'!B1:B3)"},
+                       other={'B1': 1, 'B2': 2.5, 'B3': 3})
+    assert results == {'A1': 5.0, 'A2': 6.5}
+
+
+def test_formulas_run_after_the_formulas_they_read():
+    results = evaluate({'A1': '=A2+1', 'A2': '=A3*2', 'A3': 4})
+    assert results == {'A1': 9, 'A2': 8}
+
+
+def test_errors_propagate_to_dependents():
+    results = evaluate({'A1': '=1/0', 'A2': '=A1+1', 'A3': '=IF(A1>0,1,2)'})
+    assert {key: value.code for key, value in results.items()} == {'A1': '#DIV/0!', 'A2': '#DIV/0!',
+                                                                    'A3': '#DIV/0!'}
+
+
+def test_unsupported_formulas_and_cycles_get_no_value():
+    results = evaluate({'A1': '=VLOOKUP(1,B1:C3,2)', 'A2': '=A1+1', 'A3': '=A4', 'A4': '=A3', 'A5': '=1+1'})
+    assert results == {'A5': 2}
+
+
+def test_copied_formulas_share_a_template_but_read_their_own_row():
+    cells = {f'A{row}': row for row in range(1, 6)}
+    cells.update({f'B{row}': f'=A{row}*10+SUM($A$1:A{row})' for row in range(1, 6)})
+    results = evaluate(cells)
+    assert [results[f'B{row}'] for row in range(1, 6)] == [11, 23, 36, 50, 65]
+
+
+def test_streamed_tables_cache_the_same_values_as_in_memory_cells(tmp_path):
+    rows = tools.STREAMING_ROW_THRESHOLD + 100
+
+    def build(path, streamed):
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "History"
+        ws['A1'] = 100
+
+        def body():
+            yield [1, '=$A$1+B2']
+            for row in range(3, rows + 2):
+                yield [row - 1, f'=C{row - 1}+B{row}']
+
+        if streamed:
+            tools.write_table_rows(ws, 2, body, rows)
+        else:
+            for row, values in enumerate(body(), 2):
+                ws[f'B{row}'], ws[f'C{row}'] = values
+        ws['E1'] = f'=C{rows + 1}'
+        ws['E2'] = f'=MAX(C2:C{rows + 1})'
+        tools.save_workbook(wb, path)
+        return load_workbook(path, data_only=True)["History"]
+
+    streamed = build(tmp_path / "streamed.xlsx", True)
+    in_memory = build(tmp_path / "in_memory.xlsx", False)
+    total = 100 + rows * (rows + 1) // 2
+    assert streamed['E1'].value == in_memory['E1'].value == total
+    assert streamed['E2'].value == in_memory['E2'].value == total
+    assert ([cell.value for cell in streamed['C']] == [cell.value for cell in in_memory['C']])
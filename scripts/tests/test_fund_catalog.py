@@ -0,0 +1,56 @@
+"""Fund catalog lookups and the cheapest comparable funds for a holding"""
+
+import pytest
+
+import generate_premium_tools as tools
+
+FUNDS = [
+    ('BBB', 'Beta 500', 'US Large Blend', 'Index', 0.0003, 0.12, 5),
+    ('AAA', 'Alpha 500', 'US Large Blend', 'Index', 0.0003, 0.12, 5),
+    ('CCC', 'Gamma Growth', 'US Large Blend', 'Active', 0.0085, 0.10, 3),
+    ('DDD', 'Delta 500', 'US Large Blend', 'ETF', 0.0001, 0.12, 5),
+    ('EEE', 'Epsilon Bond', 'US Bond', 'Index', 0.0005, 0.02, 4),
+]
+
+
+@pytest.fixture
+def catalog():
+    return tools.FundCatalog(tools.fund_catalog_bytes(FUNDS))
+
+
+def test_cheapest_orders_by_expense_ratio_then_ticker(catalog):
+    picks = catalog.cheapest('US Large Blend', 3)
+    assert [fund[0] for fund in picks] == ['DDD', 'AAA', 'BBB']
+
+
+def test_cheapest_skips_the_held_fund(catalog):
+    picks = catalog.cheapest('US Large Blend', 3, exclude='DDD')
+    assert [fund[0] for fund in picks] == ['AAA', 'BBB', 'CCC']
+
+
+def test_cheapest_stops_at_the_size_of_the_class(catalog):
+    assert [fund[0] for fund in catalog.cheapest('US Bond', 3)] == ['EEE']
+    assert catalog.cheapest('US Bond', 3, exclude='EEE') == []
+    assert catalog.cheapest('Commodities', 3) == []
+
+
+def test_lookup_ignores_case_and_whitespace(catalog):
+    assert catalog.lookup(' ccc ') == ('CCC', 'Gamma Growth', 'US Large Blend', 'Active', 0.0085, 0.10, 3)
+    assert catalog.lookup('ZZZ') is None
+    assert len(catalog) == 5
+
+
+def test_shipped_catalog_matches_a_plain_sort():
+    funds = tools.read_fund_catalog_csv(tools.FUND_CATALOG_FILE)
+    catalog = tools.load_fund_catalog(tools.FUND_CATALOG_FILE)
+    for asset_class in {fund[2] for fund in funds}:
+        expected = sorted((fund for fund in funds if fund[2] == asset_class), key=lambda fund: (fund[4], fund[0]))
+        assert catalog.cheapest(asset_class, len(funds)) == expected
+    assert [fund[0] for fund in catalog.cheapest('US Large Blend', 2, exclude='FXAIX')] == ['SWPPX', 'IVV']
+
+
+def test_bad_catalog_row_names_the_line(tmp_path):
+    path = tmp_path / "funds.csv"
+    path.write_text(",".join(tools.FUND_CATALOG_COLUMNS) + "\nAAA,Alpha,US Bond,Index,cheap,0.02,4\n")
+    with pytest.raises(ValueError, match=r"funds.csv:2: bad fund"):
+        tools.read_fund_catalog_csv(str(path))
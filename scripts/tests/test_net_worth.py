@@ -0,0 +1,134 @@
+"""Net worth history import and the dashboard built from it"""
+
+import pytest
+from openpyxl import load_workbook
+
+import generate_premium_tools as tools
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "balances.csv"
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_snapshots_collapse_to_the_latest_in_each_month(tmp_path):
+    path = write_csv(tmp_path, "Date,Assets,Liabilities\n"
+                               "2024-02-10,\"$1,500.00\",200\n"
+                               "2024-01-31,1000,100\n"
+                               "2024-01-05,900,150\n"
+                               "2024-02-29,1600,250\n")
+    assert list(tools.month_end_history(path)) == [('Jan 2024', 1000, 100), ('Feb 2024', 1600, 250)]
+
+
+def test_bad_snapshot_names_the_line(tmp_path):
+    path = write_csv(tmp_path, "date,assets,liabilities\n2024-01-31,1000,100\nnot a date,5,5\n")
+    with pytest.raises(ValueError, match=r"balances.csv:3: bad snapshot"):
+        list(tools.month_end_history(path))
+
+
+def test_missing_columns(tmp_path):
+    path = write_csv(tmp_path, "date,assets\n2024-01-31,1000\n")
+    with pytest.raises(ValueError, match="expected date, assets and liabilities columns"):
+        list(tools.month_end_history(path))
+
+
+def test_goal_progress_without_a_target_is_zero(tmp_path):
+    path = str(tmp_path / "net_worth.xlsx")
+    tools.create_net_worth_dashboard(path, {'goals': [('No Target', 0), ('Reached', 1000)]})
+    ws = load_workbook(path, data_only=True)["Dashboard"]
+    progress = {ws.cell(row=row, column=2).value: ws.cell(row=row, column=5).value
+                for row in range(1, ws.max_row + 1)}
+    assert progress['No Target'] == 0
+    assert progress['Reached'] == 1
+
+
+def test_series_metrics_on_the_sample_history():
+    series = tools.NetWorthSeries.from_rows(tools.NET_WORTH_SAMPLE_DATA['history'])
+    assert series.column(series.NET_WORTH).tolist() == [55000, 66000, 76000, 86000, 98000, 112000]
+    assert series.column(series.CHANGE).tolist() == [0, 11000, 10000, 10000, 12000, 14000]
+    assert series.mom_change == 14000
+    assert series.mom_pct == pytest.approx(1 / 7)
+    # Five months of growth from $55,000 to $112,000, annualized
+    assert series.cagr == pytest.approx((112000 / 55000) ** (12 / 5) - 1)
+    # Fewer than 13 months: no year-over-year figure yet
+    assert series.yoy_change == series.yoy_pct == 0
+
+
+def test_series_year_over_year_and_growth_past_capacity():
+    series = tools.NetWorthSeries(capacity=4)
+    for month in range(25):
+        series.append(f"M{month}", 1000 + 100 * month, 0)
+    assert len(series) == 25
+    assert series.yoy_change == 1200
+    assert series.yoy_pct == pytest.approx(1200 / 2200)
+    assert series.cagr == pytest.approx((3400 / 1000) ** (12 / 24) - 1)
+    assert list(series.rows())[-1] == ('M24', 3400, 0, 3400, 100, pytest.approx(100 / 3300))
+
+
+def test_cagr_is_zero_across_a_change_of_sign():
+    series = tools.NetWorthSeries.from_rows([('Jan', 100, 500), ('Feb', 900, 500)])
+    assert series.mom_change == 800
+    assert series.cagr == 0
+
+
+def test_series_keeps_goal_progress_current():
+    series = tools.NetWorthSeries([('1-Year', 2000), ('5-Year', 10000), ('No Target', 0)])
+    series.append('Jan', 1500, 500)
+    assert series.goal_progress.tolist() == [0.5, 0.1, 0]
+    series.append('Feb', 3500, 500)
+    assert series.goal_progress.tolist() == [1, 0.3, 0]
+
+
+def goals_table(path):
+    ws = load_workbook(path, data_only=True)["Dashboard"]
+    return {ws.cell(row=row, column=2).value: (ws.cell(row=row, column=4).value,
+                                               ws.cell(row=row, column=5).value)
+            for row in range(1, ws.max_row + 1)}
+
+
+def test_dashboard_goals_come_from_the_series(tmp_path):
+    path = str(tmp_path / "net_worth.xlsx")
+    tools.create_net_worth_dashboard(path)
+    goals = tools.NET_WORTH_SAMPLE_DATA['goals']
+    series = tools.NetWorthSeries.from_rows(tools.NET_WORTH_SAMPLE_DATA['history'], goals)
+    table = goals_table(path)
+    # Measured at the latest month of history (Jun 2024: $112,000)
+    for (goal, _), progress in zip(goals, series.goal_progress.tolist()):
+        assert table[goal] == (112000, pytest.approx(progress))
+    assert table['1-Year Goal'][1] == pytest.approx(112000 / 150000)
+
+
+def test_dashboard_goals_without_history_follow_the_live_net_worth(tmp_path):
+    path = str(tmp_path / "net_worth.xlsx")
+    tools.create_net_worth_dashboard(path, {'history': [], 'goals': [('Retire', 1e9)]})
+    ws = load_workbook(path)["Dashboard"]
+    (row,) = [row for row in range(1, ws.max_row + 1) if ws.cell(row=row, column=2).value == 'Retire']
+    assert ws.cell(row=row, column=5).value == f'=IF(C{row}>0,MIN(1,D{row}/C{row}),0)'
+
+
+def test_dashboard_trend_comes_from_the_series(tmp_path):
+    lines = [f"2023-{month:02d}-28,{1000 + 100 * month},100" for month in range(1, 13)]
+    lines += ["2024-01-28,2500,100"]
+    csv_path = write_csv(tmp_path, "date,assets,liabilities\n" + "\n".join(lines) + "\n")
+    path = str(tmp_path / "net_worth.xlsx")
+    tools.create_net_worth_dashboard(path, {'history_csv': csv_path})
+    ws = load_workbook(path, data_only=True)["Dashboard"]
+    trend = {ws.cell(row=row, column=2).value: (ws.cell(row=row, column=3).value,
+                                                ws.cell(row=row, column=4).value)
+             for row in range(1, ws.max_row + 1)}
+    assert trend['Latest Month'][0] == 'Jan 2024'
+    # Net worth runs $1,000 (Jan 2023) to $2,100 (Dec 2023), then $2,400
+    assert trend['Month-over-Month'] == (300, pytest.approx(300 / 2100))
+    assert trend['Year-over-Year'] == (1400, pytest.approx(1.4))
+    assert trend['Annual Growth (CAGR)'][0] == pytest.approx(1.4)
+
+
+def test_dashboard_trend_needs_enough_months(tmp_path):
+    path = str(tmp_path / "net_worth.xlsx")
+    tools.create_net_worth_dashboard(path, {'history': [('Jan 2024', 1000, 0)]})
+    ws = load_workbook(path, data_only=True)["Dashboard"]
+    trend = {ws.cell(row=row, column=2).value: ws.cell(row=row, column=3).value
+             for row in range(1, ws.max_row + 1)}
+    assert trend['Latest Month'] == 'Jan 2024'
+    assert trend['Month-over-Month'] == trend['Year-over-Year'] == trend['Annual Growth (CAGR)'] == 'n/a'
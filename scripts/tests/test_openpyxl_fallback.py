@@ -0,0 +1,45 @@
+"""Builds without the openpyxl internals match the fast path, minus cached results"""
+
+import pytest
+from openpyxl import load_workbook
+
+import generate_premium_tools as tools
+
+# History past STREAMING_ROW_THRESHOLD so the fast path streams that table
+LONG_HISTORY = [(f"Month {i}", 1000 + i, 500) for i in range(tools.STREAMING_ROW_THRESHOLD + 100)]
+
+
+def cells(path):
+    """Every written cell's value and main style attributes, by sheet and coordinate"""
+    wb = load_workbook(path)
+    return {(ws.title, cell.coordinate): (cell.value, cell.number_format, cell.font.b,
+                                          cell.font.color and cell.font.color.rgb,
+                                          cell.fill.fgColor.rgb, cell.alignment.horizontal)
+            for ws in wb.worksheets for row in ws.iter_rows() for cell in row
+            if cell.value is not None or cell.has_style}
+
+
+@pytest.mark.parametrize("name, builder, data", [
+    *[(name, builder, None) for name, builder, _ in tools.BUILDERS],
+    ('net_worth streamed', tools.create_net_worth_dashboard, {'history': LONG_HISTORY}),
+])
+def test_public_openpyxl_path_writes_the_same_cells(tmp_path, monkeypatch, name, builder, data):
+    fast, public = str(tmp_path / "fast.xlsx"), str(tmp_path / "public.xlsx")
+    builder(fast, data)
+    monkeypatch.setattr(tools, 'OPENPYXL_INTERNALS', False)
+    builder(public, data)
+    assert cells(public) == cells(fast)
+
+
+def test_missing_internals_are_detected(monkeypatch):
+    assert tools._openpyxl_internals()
+    monkeypatch.setattr(tools, 'WorksheetWriter', object)
+    assert not tools._openpyxl_internals()
+
+
+def test_renamed_internals_are_detected(monkeypatch):
+    class Writer:
+        def rows(self):
+            pass
+    monkeypatch.setattr(tools, 'WorksheetWriter', Writer)
+    assert not tools._openpyxl_internals()
@@ -0,0 +1,146 @@
+"""Federal and state tax engine against hand-computed answers and the Tax Estimator sheet"""
+
+import numpy as np
+import pytest
+from openpyxl import load_workbook
+
+import generate_premium_tools as tools
+
+ZERO_PROFILE = {group: {field: 0 for field in fields} for group, fields in tools.TAX_PROFILE_FIELDS.items()}
+ZERO_PROFILE['mortgage_interest'] = 0
+
+
+def wages_only(wages, status='Single', year=2024, state='TX'):
+    return {**ZERO_PROFILE, 'income': {**ZERO_PROFILE['income'], 'w2_wages': wages},
+            'filing_status': status, 'tax_year': year, 'state': state}
+
+
+def taxes(*profiles):
+    return tools.compute_taxes(tools.tax_profile_columns(list(profiles)))
+
+
+# 2024 Single: taxable income is wages less the 14,600 standard deduction
+@pytest.mark.parametrize("taxable, federal, marginal", [
+    (0, 0, 0.10),
+    (11600, 1160, 0.12),         # nothing is taxed at a bracket's rate until past its start
+    (11601, 1160.12, 0.12),
+    (47149, 5425.88, 0.12),
+    (47150, 5426, 0.22),
+    (47151, 5426.22, 0.22),
+    (100525, 17168.5, 0.24),
+    (609350, 183647.25, 0.37),
+    (609351, 183647.62, 0.37),
+])
+def test_bracket_tax_at_bracket_edges(taxable, federal, marginal):
+    result = taxes(wages_only(taxable + 14600))
+    assert result['taxable_income'][0] == taxable
+    assert result['federal_tax'][0] == pytest.approx(federal)
+    assert result['marginal_rate'][0] == marginal
+
+
+def test_wages_below_the_standard_deduction_owe_nothing():
+    result = taxes(wages_only(10000))
+    assert result['taxable_income'][0] == 0
+    assert result['total_tax'][0] == 0
+
+
+def test_joint_filers_use_their_own_brackets():
+    result = taxes(wages_only(94300 + 29200, status='Married Filing Jointly'))
+    assert result['federal_tax'][0] == pytest.approx(10852)
+
+
+def test_sample_profile_line_by_line():
+    result = taxes(tools.TAX_PLANNING_SAMPLE_DATA)
+    # 116,200 gross - 15,062.50 adjustments - 18,500 itemized deductions
+    assert result['taxable_income'][0] == pytest.approx(82637.5)
+    # 5,426 + 22% of the 31,487.50 ordinary income over 47,150
+    assert result['ordinary_tax'][0] == pytest.approx(12353.25)
+    # 1,000 qualified dividends + 3,000 long-term gains at 15%
+    assert result['gains_tax'][0] == pytest.approx(600)
+    assert result['federal_tax'][0] == pytest.approx(12953.25)
+    assert result['se_tax'][0] == pytest.approx(25000 * 0.153)
+
+
+def test_unknown_tax_year_is_nan():
+    result = taxes(wages_only(50000, year=1999))
+    assert np.isnan(result['federal_tax'][0])
+    assert result['gross_income'][0] == 50000
+
+
+@pytest.mark.parametrize("profile", [
+    {},
+    {'filing_status': 'Head of Household', 'tax_year': 2025, 'state': 'CA'},
+    {'income': {'w2_wages': 650000, 'long_term_gains': 80000}, 'state': 'NY'},
+    {'filing_status': 'Married Filing Jointly', 'salt': {'property_tax': 0}, 'mortgage_interest': 0},
+    {'filing_status': 'Married Filing Jointly', 'state': 'CA'},
+    {'filing_status': 'Married Filing Jointly', 'income': {'w2_wages': 400000}, 'state': 'NY'},
+])
+def test_engine_matches_the_tax_estimator_sheet(tmp_path, profile):
+    path = tmp_path / "tax.xlsx"
+    tools.create_tax_planning_command_center(str(path), profile)
+    ws = load_workbook(path, data_only=True)["Tax Estimator"]
+    sheet = {ws.cell(row=row, column=2).value: ws.cell(row=row, column=3).value for row in range(1, ws.max_row + 1)}
+    result = taxes(profile)
+    for label, line in [('TAXABLE INCOME', 'taxable_income'), ('Federal Income Tax', 'federal_tax'),
+                        ('State Income Tax', 'state_tax'), ('TOTAL TAX LIABILITY', 'total_tax'),
+                        ('Marginal Tax Rate', 'marginal_rate')]:
+        assert sheet[label] == pytest.approx(result[line][0]), label
+
+
+@pytest.mark.parametrize("state", ['TX', 'FL', 'WA'])
+def test_states_without_an_income_tax_owe_nothing(state):
+    assert tools.compute_state_taxes([0, 85000, 2500000], [state] * 3).tolist() == [0, 0, 0]
+
+
+def test_flat_tax_state():
+    # North Carolina: 4.5% of every dollar
+    assert tools.compute_state_taxes([0, 85000], ['NC', 'NC']).tolist() == pytest.approx([0, 3825])
+
+
+def test_graduated_state_brackets():
+    # Alabama: 2% of the first 500, 4% up to 3,000, 5% above
+    assert tools.compute_state_taxes([400, 3000, 10000], ['AL'] * 3).tolist() == pytest.approx(
+        [8, 10 + 100, 10 + 100 + 350])
+
+
+def test_mixed_states_and_unknown_codes():
+    tax = tools.compute_state_taxes([50000, 50000, 50000], ['NC', 'XX', 'TX'])
+    assert tax[0] == pytest.approx(2250)
+    assert np.isnan(tax[1])
+    assert tax[2] == 0
+    tables = [(state, schedule) for state, schedule, _ in tools.state_tax_tables()]
+    np.testing.assert_array_equal(tools.state_indexes(['NC', 'XX', 'NC'], ['Single', 'Single',
+                                                                          'Married Filing Jointly']),
+                                  [tables.index(('NC', 'Single')), -1,
+                                   tables.index(('NC', 'Married Filing Jointly'))])
+
+
+def test_state_tax_is_on_federal_taxable_income():
+    result = taxes(wages_only(100000, state='NC'), wages_only(100000, state='TX'))
+    assert result['state_tax'].tolist() == pytest.approx([(100000 - 14600) * 0.045, 0])
+    assert result['total_tax'][0] - result['total_tax'][1] == pytest.approx(85400 * 0.045)
+
+
+# California 2024 on $100,000 of taxable income, bracket by bracket
+CA_SINGLE_100K = (10756 * 0.01 + (25499 - 10756) * 0.02 + (40245 - 25499) * 0.04 + (55866 - 40245) * 0.06
+                  + (70606 - 55866) * 0.08 + (100000 - 70606) * 0.093)
+CA_JOINT_100K = 21512 * 0.01 + (50998 - 21512) * 0.02 + (80490 - 50998) * 0.04 + (100000 - 80490) * 0.06
+
+
+def test_joint_filers_use_the_state_joint_schedule():
+    tax = tools.compute_state_taxes([100000] * 3, ['CA'] * 3,
+                                    ['Single', 'Married Filing Jointly', 'Married Filing Separately'])
+    assert tax.tolist() == pytest.approx([CA_SINGLE_100K, CA_JOINT_100K, CA_SINGLE_100K])
+
+
+def test_joint_profiles_in_graduated_states():
+    result = taxes(wages_only(100000 + 29200, status='Married Filing Jointly', state='CA'),
+                   wages_only(100000 + 29200, status='Married Filing Jointly', state='NY'),
+                   wages_only(100000 + 29200, status='Married Filing Jointly', state='NC'))
+    ny = 17150 * 0.04 + (23600 - 17150) * 0.045 + (27900 - 23600) * 0.0525 + (100000 - 27900) * 0.055
+    assert result['state_tax'].tolist() == pytest.approx([CA_JOINT_100K, ny, 100000 * 0.045])
+
+
+def test_california_surcharge_starts_at_a_million_for_joint_filers():
+    low, high = tools.compute_state_taxes([1000000, 1000001], ['CA', 'CA'], 'Married Filing Jointly')
+    assert high - low == pytest.approx(0.123)
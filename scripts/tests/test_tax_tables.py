@@ -0,0 +1,51 @@
+"""Tax tables against the published schedules, and the workbook lookups into them"""
+
+import pytest
+from openpyxl import load_workbook
+
+import generate_premium_tools as tools
+
+
+def bracket_bases(table):
+    return [(start, rate, base) for name, _, start, rate, base in tools.tax_bracket_rows() if name == table]
+
+
+def test_single_2024_tax_below_each_bracket_matches_the_irs_schedule():
+    assert bracket_bases("2024 Single") == [
+        (0, 0.10, 0), (11600, 0.12, 1160), (47150, 0.22, 5426), (100525, 0.24, 17168.5),
+        (191950, 0.32, 39110.5), (243725, 0.35, 55678.5), (609350, 0.37, 183647.25)]
+
+
+def test_joint_2024_tax_below_each_bracket_matches_the_irs_schedule():
+    assert [base for _, _, base in bracket_bases("2024 Married Filing Jointly")] == [
+        0, 2320, 10852, 34337, 78221, 111357, 196669.5]
+
+
+def test_lookup_keys_are_sorted_for_match():
+    # MATCH(..., 1) needs every key column in ascending order
+    for rows in (list(tools.tax_bracket_rows()), list(tools.state_bracket_rows())):
+        keys = [key for _, key, _, _, _ in rows]
+        assert keys == sorted(keys)
+        assert len(set(keys)) == len(keys)
+
+
+def test_every_year_has_a_table_per_filing_status():
+    tables = [(year, status) for year, status, _, _, _ in tools.tax_tables()]
+    assert tables == [(year, status) for year in tools.TAX_BRACKET_THRESHOLDS for status in tools.FILING_STATUSES]
+    for year in tools.TAX_BRACKET_THRESHOLDS:
+        assert year in tools.STANDARD_DEDUCTIONS
+        assert year in tools.CAPITAL_GAIN_THRESHOLDS
+        assert year in tools.CONTRIBUTION_LIMITS
+
+
+@pytest.mark.parametrize("year, status, deduction", [
+    (2024, 'Single', 14600),
+    (2024, 'Head of Household', 21900),
+    (2025, 'Married Filing Jointly', 31500),
+])
+def test_workbook_looks_up_the_selected_table(tmp_path, year, status, deduction):
+    path = tmp_path / "tax.xlsx"
+    tools.create_tax_planning_command_center(str(path), {'tax_year': year, 'filing_status': status})
+    ws = load_workbook(path, data_only=True)["Tax Estimator"]
+    labels = {ws.cell(row=row, column=2).value: ws.cell(row=row, column=3).value for row in range(1, ws.max_row + 1)}
+    assert labels['Standard Deduction'] == deduction
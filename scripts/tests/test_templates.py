@@ -0,0 +1,79 @@
+"""Workbooks patched from a member template match full builds byte for byte"""
+
+import random
+
+import pytest
+
+import generate_premium_tools as tools
+
+
+@pytest.fixture(autouse=True)
+def fresh_templates(monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    monkeypatch.setattr(tools, '_templates', {})
+    monkeypatch.setattr(tools, '_template_shapes', set())
+
+
+def cash_flow_member(rng):
+    return {
+        'income_sources': [('Salary', 'W-2', 'Bi-weekly', rng.randint(1000, 9000)),
+                           ('Freelance', '1099', 'Variable', round(rng.random() * 900, 2))],
+        'variable_expenses': [('Groceries', rng.randint(300, 900), rng.randint(0, 900)),
+                              ('Dining Out', 300, rng.random() * 600)],
+        'planned_expenses': [('Vacation', 7, rng.randint(0, 5000))],
+        'settings': {'emergency_fund': rng.randint(0, 50000), 'income_growth': rng.random() / 10},
+    }
+
+
+def net_worth_member(rng):
+    return {
+        'cash_accounts': [('Checking', 'Chase', rng.randint(0, 20000)),
+                          ('Savings', 'Ally', round(rng.random() * 1e5, 2))],
+        'mortgage': ('Home', 'Wells Fargo', rng.randint(100000, 500000), 0.06, rng.randint(1000, 3000)),
+        'credit_cards': [('Visa', 'Chase', rng.randint(0, 9000), rng.random() / 4, 10000)],
+        'real_estate': {'primary_residence': rng.randint(0, 900000)},
+    }
+
+
+@pytest.mark.parametrize("builder, member", [
+    (tools.create_cash_flow_command_center, cash_flow_member),
+    (tools.create_net_worth_dashboard, net_worth_member),
+])
+def test_patched_members_match_full_builds(tmp_path, builder, member):
+    rng = random.Random(7)
+    for i in range(5):
+        data = member(rng)
+        patched, built = tmp_path / f"patched{i}.xlsx", tmp_path / f"built{i}.xlsx"
+        tools.build_from_template(builder, str(patched), data)
+        builder(str(built), data)
+        assert patched.read_bytes() == built.read_bytes()
+    assert list(tools._templates.values())[0] is not None
+
+
+def test_labels_are_part_of_the_shape(tmp_path):
+    builder = tools.create_net_worth_dashboard
+    for name in ('Checking', 'Checking', 'Joint Checking'):
+        tools.build_from_template(builder, str(tmp_path / "member.xlsx"),
+                                  {'cash_accounts': [(name, 'Chase', 1200)]})
+    assert len(tools._templates) == 1
+    assert len(tools._template_shapes) == 2
+
+
+def test_fields_that_change_the_layout_are_never_templated(tmp_path, monkeypatch):
+    # projection_months sizes the Dashboard grid, so it is no plain input cell
+    builder = tools.create_cash_flow_command_center
+    monkeypatch.setitem(tools.TEMPLATE_FIELDS, builder, [('settings', 'projection_months')])
+    for months in (24, 36, 12):
+        data = {'settings': {'projection_months': months}}
+        patched, built = tmp_path / "patched.xlsx", tmp_path / "built.xlsx"
+        tools.build_from_template(builder, str(patched), data)
+        builder(str(built), data)
+        assert patched.read_bytes() == built.read_bytes()
+    assert list(tools._templates.values()) == [None]
+
+
+def test_tools_without_fields_always_build(tmp_path):
+    for state in ('CA', 'CA', 'NY'):
+        tools.build_from_template(tools.create_tax_planning_command_center,
+                                  str(tmp_path / "tax.xlsx"), {'state': state})
+    assert not tools._templates and not tools._template_shapes
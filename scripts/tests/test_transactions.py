@@ -0,0 +1,102 @@
+"""Bank transaction exports: parsing, rule order and the averages folded into a profile"""
+
+import pytest
+
+import generate_premium_tools as tools
+
+RULES = tools.CASH_FLOW_SAMPLE_DATA['transaction_rules']
+INCOME_RULES = tools.CASH_FLOW_SAMPLE_DATA['income_rules']
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240105120000<TRNAMT>-54.20<NAME>WHOLE FOODS #123</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240115<TRNAMT>2500.00<MEMO>ACME PAYROLL</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240203<TRNAMT>-12.00<NAME>Starbucks</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def categorize(*descriptions):
+    spent, _, _ = tools.categorize_transactions(
+        [((2024, 1), description, -10.0) for description in descriptions], RULES, INCOME_RULES)
+    return {category for category, _ in spent}
+
+
+def test_first_listed_rule_wins_not_the_first_match_in_the_text():
+    # AMAZON comes first in the description but WHOLE FOODS comes first in the rules
+    assert categorize("AMAZON WHOLE FOODS MKT") == {'Groceries'}
+    assert categorize("UBER EATS 8005928996") == {'Dining Out'}
+    assert categorize("UBER TRIP") == {'Gas/Transportation'}
+
+
+def test_unmatched_skipped_and_income_transactions():
+    transactions = [((2024, 1), "corner store", -20.0), ((2024, 1), "NETFLIX.COM", -15.99),
+                    ((2024, 1), "ACME PAYROLL", 3000.0), ((2024, 2), "Venmo from Sam", 40.0),
+                    ((2024, 2), "acme payroll", 3000.0)]
+    spent, received, months = tools.categorize_transactions(transactions, RULES, INCOME_RULES)
+    assert spent == {('Miscellaneous', (2024, 1)): 20.0}
+    assert received == {('Primary Salary', (2024, 1)): 3000.0, ('Other Income', (2024, 2)): 40.0,
+                        ('Primary Salary', (2024, 2)): 3000.0}
+    assert months == {(2024, 1), (2024, 2)}
+
+
+def test_rules_given_as_lists_as_in_a_json_profile():
+    spent, _, _ = tools.categorize_transactions([((2024, 1), "Kroger", -5.0)], [["KROGER", "Groceries"]], [])
+    assert spent == {('Groceries', (2024, 1)): 5.0}
+
+
+def test_csv_transactions(tmp_path):
+    path = write(tmp_path, "export.csv", "Date,Description,Amount\n"
+                                         "2024-01-05,WHOLE FOODS,-54.20\n"
+                                         "01/15/2024,ACME PAYROLL,\"$2,500.00\"\n"
+                                         "\n"
+                                         "2/3/24,Starbucks,-12\n")
+    assert list(tools.read_transactions(path)) == [
+        ((2024, 1), 'WHOLE FOODS', -54.2), ((2024, 1), 'ACME PAYROLL', 2500.0), ((2024, 2), 'Starbucks', -12.0)]
+
+
+@pytest.mark.parametrize("row", ["2024-13-01,Bad month,-5", "2024-01-05,No amount,ten", "2024-01-05"])
+def test_malformed_csv_row_names_the_line(tmp_path, row):
+    path = write(tmp_path, "export.csv", f"date,description,amount\n2024-01-04,Fine,-1\n{row}\n")
+    with pytest.raises(ValueError, match=r"export.csv:3: bad transaction"):
+        list(tools.read_transactions(path))
+
+
+def test_csv_needs_its_columns(tmp_path):
+    path = write(tmp_path, "export.csv", "date,memo,amount\n2024-01-04,Fine,-1\n")
+    with pytest.raises(ValueError, match="expected date, description and amount columns"):
+        list(tools.read_transactions(path))
+
+
+@pytest.mark.parametrize("chunk_size", [tools.TRANSACTION_CHUNK_SIZE, 7])
+def test_ofx_transactions(tmp_path, monkeypatch, chunk_size):
+    # Small chunks split transactions across reads
+    monkeypatch.setattr(tools, 'TRANSACTION_CHUNK_SIZE', chunk_size)
+    path = write(tmp_path, "export.qfx", OFX)
+    assert list(tools.read_transactions(path)) == [
+        ((2024, 1), 'WHOLE FOODS #123', -54.2), ((2024, 1), 'ACME PAYROLL', 2500.0), ((2024, 2), 'Starbucks', -12.0)]
+
+
+def test_malformed_ofx_transaction(tmp_path):
+    path = write(tmp_path, "export.ofx", OFX.replace("<TRNAMT>2500.00", ""))
+    with pytest.raises(ValueError, match=r"export.ofx: bad transaction '<STMTTRN><TRNTYPE>CREDIT"):
+        list(tools.read_transactions(path))
+
+
+def test_export_averages_replace_actuals_and_income(tmp_path):
+    path = write(tmp_path, "export.ofx", OFX)
+    data = tools.apply_transactions(tools.merge_profile(tools.CASH_FLOW_SAMPLE_DATA, {'transactions': path}))
+    variable = {category: (budget, actual) for category, budget, actual in data['variable_expenses']}
+    # Two months in the export, so each total is halved
+    assert variable['Groceries'] == (600, 27.1)
+    assert variable['Dining Out'] == (300, 6.0)
+    assert variable['Shopping'] == (200, 0)
+    assert data['income_sources'] == [('Primary Salary', 'Imported', 'Monthly', 1250.0)]